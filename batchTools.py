@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+# Version 23.2.1.1
+# Copyright 2023 Chip Copper
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this
+# software and associated documentation files (the "Software"), to deal in the Software
+# without restriction, including without limitation the rights to use, copy, modify, merge,
+# publish, distribute, sublicense, and/or sell copies of the Software, and to permit persons
+# to whom the Software is furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all copies or
+# substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING
+# BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM,
+# DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+# One entry point for all the tools.  The first argument picks the tool and the rest
+# are passed to it unchanged, so
+#
+#   batchTools.py check -e effective.json -d defined.json -z zones.txt -w wwns.txt
+#
+# behaves exactly like checks.py with the same options.  Only the module of the chosen
+# tool is imported, so the offline subcommands never load requests and a wrapper that
+# runs the tools thousands of times does not pay for modules it does not use.
+#
+# usage: batchTools.py <command> [options]
+#        batchTools.py <command> -h
+
+import sys
+import importlib
+
+# command -> (module, description)
+COMMANDS = {
+    'fetch': ('getConfigs', "Save the defined and effective configurations of a fabric"),
+    'check': ('checks', "Validate zone and WWN delete lists against saved configurations"),
+    'resolve': ('wwnsToAliases', "List the aliases holding a list of WWNs"),
+    'delete': ('deleteZoneObject', "Delete zoning objects from a fabric"),
+    'restore': ('putBack', "Put zoning objects back from a saved defined configuration"),
+    'pipeline': ('pipeline', "Fetch, check, delete and save in one session"),
+    'dryrun': ('dryrun', "Show what a delete would do to a saved defined configuration"),
+    'diff': ('snapshotDiff', "Compare two saved configurations"),
+    'reconcile': ('reconcile', "Bring a fabric back to a saved defined configuration"),
+    'index': ('snapshotIndex', "Build a SQLite index of a saved defined configuration"),
+    'binary': ('binarySnapshot', "Build a binary snapshot of a saved defined configuration")
+}
+
+
+def printUsage(program):
+    print("usage: {} <command> [options]\n\ncommands:".format(program))
+    for command, (module, description) in COMMANDS.items():
+        print("    {:<10} {}".format(command, description))
+    print("\n'{} <command> -h' shows the options of a command.".format(program))
+
+
+def main(argv):
+    if len(argv) < 2 or argv[1] in ("-h", "--help"):
+        printUsage(argv[0])
+        sys.exit(0 if len(argv) >= 2 else 2)
+
+    command = argv[1]
+    if command not in COMMANDS:
+        print("Unknown command {}.".format(command))
+        printUsage(argv[0])
+        sys.exit(2)
+
+    # The tools read sys.argv for their usage messages and argparse for its program name
+    toolArgv = ["{} {}".format(argv[0], command)] + argv[2:]
+    sys.argv = toolArgv
+    importlib.import_module(COMMANDS[command][0]).main(toolArgv)
+
+
+if __name__ == "__main__":
+    main(sys.argv)
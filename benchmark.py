@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+# Version 23.2.1.1
+# Copyright 2023 Chip Copper
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this
+# software and associated documentation files (the "Software"), to deal in the Software
+# without restriction, including without limitation the rights to use, copy, modify, merge,
+# publish, distribute, sublicense, and/or sell copies of the Software, and to permit persons
+# to whom the Software is furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all copies or
+# substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING
+# BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM,
+# DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+# Times the offline stages of the tools against a synthetic fabric from
+# fabricGenerator.py and records the peak memory each one allocates.  The stages follow
+# what the tools do: parse the saved configurations, build the zone database (which
+# replaced the old alias to WWN tables), run the checks.py validations, classify a
+# deleteZoneObject.py list and build and open the SQLite and binary snapshots.
+# Results are written as JSON so runs can be compared over time.
+#
+# usage: benchmark.py -a <aliases> -z <zones> [-p <peerFraction>] [-o <resultsFile>]
+#            [-w <workDir>] [-s <seed>] [-t]
+
+import os
+import sys
+import json
+import time
+import getopt
+import shutil
+import platform
+import tempfile
+import tracemalloc
+from fabricGenerator import generateFabric, writeFabric
+from zoneDatabase import ZoneDatabase, getConfigurationFromFile
+from wwn import WwnSet
+from checks import getSetFromFile, DeleteChecks
+from snapshotIndex import importSnapshot, SnapshotIndex
+from binarySnapshot import writeBinarySnapshot, BinarySnapshot
+
+
+class StageTimer:
+
+    def __init__(self, traceMemory=True):
+        self.traceMemory = traceMemory
+        self.stages = list()
+
+    def run(self, name, function, *args):
+        if self.traceMemory:
+            tracemalloc.start()
+        start = time.perf_counter()
+        result = function(*args)
+        seconds = time.perf_counter() - start
+        peak = None
+        if self.traceMemory:
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+
+        self.stages.append({"stage": name, "seconds": seconds, "peakBytes": peak})
+        return result
+
+
+def buildZoneDatabase(defined):
+    # The tables are built on first use; build them all so this stage is the whole build
+    zoneDB = ZoneDatabase(defined)
+    for table in ('aliases', 'zones', 'cfgs', 'objectTypes', 'wwnToAliases', 'memberToZones', 'zoneToCfgs'):
+        getattr(zoneDB, table)
+
+    return zoneDB
+
+
+def runChecks(zoneDB, effective, wwnFile, zoneFile):
+    # The validations checks.py makes before it reports
+    wwnsToDelete, invalidWwns = WwnSet.fromFile(wwnFile)
+    checks = DeleteChecks(zoneDB, effective, getSetFromFile(zoneFile), wwnsToDelete, invalidWwns)
+
+    return {
+        "invalidWwns": len(checks.invalidWwns),
+        "notFoundWwns": len(checks.notFoundWwns),
+        "notFoundZones": len(checks.notFoundZones),
+        "zoneOverlap": len(checks.zoneOverlap),
+        "wwnOverlap": len(checks.wwnOverlap),
+        "aliasesToDelete": len(checks.aliasesToDelete),
+        "zonesAffected": len(checks.impact.zoneMembersLeft)
+    }
+
+
+def classifyTargets(zoneDB, objectFile):
+    # deleteZoneObject.py resolves each name in its list to an object type
+    with open(objectFile, "r") as fd:
+        delObjects = [i.strip() for i in fd.readlines()]
+
+    return [(zoneDB.objectType(target), target) for target in delObjects
+            if zoneDB.objectType(target) is not None]
+
+
+def runBenchmark(aliasCount, zoneCount, peerFraction, workDir, seed, traceMemory):
+    timer = StageTimer(traceMemory)
+
+    fabric = timer.run("generate", generateFabric, aliasCount, zoneCount, peerFraction, 0.05, seed)
+    files = timer.run("write files", writeFabric, workDir, *fabric)
+    del fabric
+
+    defined = timer.run("getConfigurationFromFile defined", getConfigurationFromFile, files["defined"])
+    effective = timer.run("getConfigurationFromFile effective", getConfigurationFromFile, files["effective"])
+    zoneDB = timer.run("ZoneDatabase build", buildZoneDatabase, defined)
+    checkCounts = timer.run("checks validations", runChecks, zoneDB, effective, files["wwns"], files["zones"])
+    targets = timer.run("deleteZoneObject classification", classifyTargets, zoneDB, files["objects"])
+
+    indexFile = os.path.join(workDir, "defined.db")
+    binaryFile = os.path.join(workDir, "defined.bin")
+    timer.run("SQLite snapshot import", importSnapshot, zoneDB, indexFile)
+    timer.run("binary snapshot write", writeBinarySnapshot, zoneDB, binaryFile)
+    del defined, zoneDB
+
+    index = timer.run("SQLite snapshot open", SnapshotIndex, indexFile)
+    timer.run("checks validations on SQLite", runChecks, index, effective, files["wwns"], files["zones"])
+    binary = timer.run("binary snapshot open", BinarySnapshot, binaryFile)
+    timer.run("checks validations on binary", runChecks, binary, effective, files["wwns"], files["zones"])
+
+    return {
+        "parameters": {"aliases": aliasCount, "zones": zoneCount, "peerFraction": peerFraction, "seed": seed,
+                       "memoryTraced": traceMemory},
+        "environment": {"python": platform.python_version(), "platform": platform.platform()},
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "files": {name: os.path.getsize(path) for name, path in files.items()},
+        "checks": checkCounts,
+        "targets": len(targets),
+        "stages": timer.stages
+    }
+
+
+def main(argv):
+    aliasCount = 200000
+    zoneCount = 100000
+    peerFraction = 0.1
+    resultsFile = "benchmark.json"
+    workDir = None
+    seed = 0
+    traceMemory = True
+    usage = ("usage: {} -a <aliases> -z <zones> [-p <peerFraction>] [-o <resultsFile>] [-w <workDir>] "
+             "[-s <seed>] [-t]").format(argv[0])
+
+    # Retrieve and parse command line arguments.
+    try:
+        opts, args = getopt.getopt(argv[1:], "a:z:p:o:w:s:th",
+            ["aliases=", "zones=", "peer=", "outfile=", "workdir=", "seed=", "time-only"])
+    except getopt.GetoptError:
+        print(usage)
+        sys.exit(2)
+    for opt, arg in opts:
+        if opt == '-h':
+            print(usage)
+            sys.exit()
+        elif opt in ("-a", "--aliases"):
+            aliasCount = int(arg)
+        elif opt in ("-z", "--zones"):
+            zoneCount = int(arg)
+        elif opt in ("-p", "--peer"):
+            peerFraction = float(arg)
+        elif opt in ("-o", "--outfile"):
+            resultsFile = arg
+        elif opt in ("-w", "--workdir"):
+            workDir = arg
+        elif opt in ("-s", "--seed"):
+            seed = int(arg)
+        elif opt in ("-t", "--time-only"):
+            # tracemalloc slows the stages down; leave it off for clean timings
+            traceMemory = False
+
+    # Without a work directory the generated files are removed afterwards
+    keepFiles = workDir is not None
+    if workDir is None:
+        workDir = tempfile.mkdtemp(prefix="benchmark")
+
+    try:
+        results = runBenchmark(aliasCount, zoneCount, peerFraction, workDir, seed, traceMemory)
+    finally:
+        if not keepFiles:
+            shutil.rmtree(workDir, ignore_errors=True)
+
+    with open(resultsFile, "w") as fp:
+        json.dump(results, fp, indent=2)
+
+    print("{:<40} {:>10} {:>14}".format("Stage", "Seconds", "Peak bytes"))
+    for stage in results["stages"]:
+        peak = stage["peakBytes"] if stage["peakBytes"] is not None else "-"
+        print("{:<40} {:>10.3f} {:>14}".format(stage["stage"], stage["seconds"], peak))
+    print("\nResults written to {}.".format(resultsFile))
+
+
+if __name__ == "__main__":
+    main(sys.argv)
@@ -0,0 +1,320 @@
+#!/usr/bin/env python3
+# Version 23.2.1.1
+# Copyright 2023 Chip Copper
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this
+# software and associated documentation files (the "Software"), to deal in the Software
+# without restriction, including without limitation the rights to use, copy, modify, merge,
+# publish, distribute, sublicense, and/or sell copies of the Software, and to permit persons
+# to whom the Software is furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all copies or
+# substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING
+# BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM,
+# DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+# Compact binary form of a defined configuration that is memory-mapped and read lazily.
+# Every name and member is stored once in a string table and referred to by number.
+# Membership lists, and the reverse lists the tools look things up by, are stored as
+# offset/value arrays of 32-bit integers, so opening a snapshot only reads the header
+# and a lookup only touches the pages it needs.  BinarySnapshot answers the same
+# queries as ZoneDatabase.
+#
+# usage: binarySnapshot.py -d <definedDB> -o <binaryFile>
+
+import sys
+import mmap
+import array
+import getopt
+import struct
+import fnmatch
+from zoneDatabase import ZoneDatabase, ZoneQueries, getConfigurationFromFile
+from phaseProfiler import PhaseProfiler
+
+MAGIC = b"BZDBSNAP"
+VERSION = 1
+BYTE_ORDER_MARK = 0x01020304
+
+# Section name and array type code, in file order
+SECTIONS = (
+    ('stringOffsets', 'I'),
+    ('stringData', 'B'),
+    ('sortedStrings', 'I'),
+    ('objectTypes', 'B'),
+    ('objectIndexes', 'I'),
+    ('aliasNames', 'I'),
+    ('aliasMemberOffsets', 'I'),
+    ('aliasMembers', 'I'),
+    ('zoneNames', 'I'),
+    ('zoneTypes', 'I'),
+    ('zoneMemberOffsets', 'I'),
+    ('zoneMembers', 'I'),
+    ('zonePrincipalOffsets', 'I'),
+    ('zonePrincipals', 'I'),
+    ('cfgNames', 'I'),
+    ('cfgMemberOffsets', 'I'),
+    ('cfgMembers', 'I'),
+    ('aliasesByWwnOffsets', 'I'),
+    ('aliasesByWwn', 'I'),
+    ('zonesByMemberOffsets', 'I'),
+    ('zonesByMember', 'I'),
+    ('cfgsByZoneOffsets', 'I'),
+    ('cfgsByZone', 'I'),
+)
+
+# Native byte order throughout; the mark in the header shows up reversed on a foreign machine
+HEADER = struct.Struct("=8sII" + "II" * len(SECTIONS))
+
+OBJECT_TYPES = (None, 'alias', 'zone', 'cfg')
+
+
+def buildLists(count, lists):
+    # Flatten per-item lists into an offsets array and a values array
+    offsets = array.array('I', [0])
+    values = array.array('I')
+    for i in range(count):
+        values.extend(lists(i))
+        offsets.append(len(values))
+    return offsets, values
+
+
+def writeBinarySnapshot(zoneDB, filename):
+    stringIds = {}
+    strings = []
+
+    def sid(s):
+        i = stringIds.get(s)
+        if i is None:
+            i = stringIds[s] = len(strings)
+            strings.append(s)
+        return i
+
+    aliases = list(zoneDB.aliases.values())
+    zones = list(zoneDB.zones.values())
+    cfgs = list(zoneDB.cfgs.values())
+
+    aliasNames = array.array('I', (sid(r.name) for r in aliases))
+    zoneNames = array.array('I', (sid(r.name) for r in zones))
+    cfgNames = array.array('I', (sid(r.name) for r in cfgs))
+    aliasMemberOffsets, aliasMembers = buildLists(len(aliases), lambda i: [sid(m) for m in aliases[i].members])
+    zoneMemberOffsets, zoneMembers = buildLists(len(zones), lambda i: [sid(m) for m in zones[i].members])
+    zonePrincipalOffsets, zonePrincipals = buildLists(len(zones),
+                                                      lambda i: [sid(m) for m in zones[i].principalMembers])
+    cfgMemberOffsets, cfgMembers = buildLists(len(cfgs), lambda i: [sid(m) for m in cfgs[i].members])
+
+    # Per string: what object it names and the reverse membership lists
+    aliasIndex = {r.name: i for i, r in enumerate(aliases)}
+    zoneIndex = {r.name: i for i, r in enumerate(zones)}
+    cfgIndex = {r.name: i for i, r in enumerate(cfgs)}
+    objectTypes = array.array('B', bytes(len(strings)))
+    objectIndexes = array.array('I', bytes(4 * len(strings)))
+    for typeCode, index in ((1, aliasIndex), (2, zoneIndex), (3, cfgIndex)):
+        for name, i in index.items():
+            objectTypes[stringIds[name]] = typeCode
+            objectIndexes[stringIds[name]] = i
+
+    aliasesByWwnOffsets, aliasesByWwn = buildLists(
+        len(strings), lambda i: [aliasIndex[a] for a in zoneDB.wwnToAliases.get(strings[i], [])])
+    zonesByMemberOffsets, zonesByMember = buildLists(
+        len(strings), lambda i: [zoneIndex[z] for z in zoneDB.memberToZones.get(strings[i], [])])
+    cfgsByZoneOffsets, cfgsByZone = buildLists(
+        len(strings), lambda i: [cfgIndex[c] for c in zoneDB.zoneToCfgs.get(strings[i], [])])
+
+    # String table, plus the ids in byte order for binary search by name
+    encoded = [s.encode() for s in strings]
+    stringOffsets = array.array('I', [0])
+    stringData = bytearray()
+    for i in encoded:
+        stringData += i
+        stringOffsets.append(len(stringData))
+    sortedStrings = array.array('I', sorted(range(len(encoded)), key=encoded.__getitem__))
+
+    sectionData = {
+        'stringOffsets': stringOffsets,
+        'stringData': array.array('B', stringData),
+        'sortedStrings': sortedStrings,
+        'objectTypes': objectTypes,
+        'objectIndexes': objectIndexes,
+        'aliasNames': aliasNames,
+        'aliasMemberOffsets': aliasMemberOffsets,
+        'aliasMembers': aliasMembers,
+        'zoneNames': zoneNames,
+        'zoneTypes': array.array('I', (r.zoneType for r in zones)),
+        'zoneMemberOffsets': zoneMemberOffsets,
+        'zoneMembers': zoneMembers,
+        'zonePrincipalOffsets': zonePrincipalOffsets,
+        'zonePrincipals': zonePrincipals,
+        'cfgNames': cfgNames,
+        'cfgMemberOffsets': cfgMemberOffsets,
+        'cfgMembers': cfgMembers,
+        'aliasesByWwnOffsets': aliasesByWwnOffsets,
+        'aliasesByWwn': aliasesByWwn,
+        'zonesByMemberOffsets': zonesByMemberOffsets,
+        'zonesByMember': zonesByMember,
+        'cfgsByZoneOffsets': cfgsByZoneOffsets,
+        'cfgsByZone': cfgsByZone,
+    }
+
+    # Sections start on 8 byte boundaries so they can be cast in place once mapped
+    layout = []
+    offset = HEADER.size
+    for name, code in SECTIONS:
+        offset = (offset + 7) & ~7
+        size = len(sectionData[name]) * sectionData[name].itemsize
+        layout.extend((offset, size))
+        offset += size
+
+    with open(filename, "wb") as fp:
+        fp.write(HEADER.pack(MAGIC, VERSION, BYTE_ORDER_MARK, *layout))
+        for i, (name, code) in enumerate(SECTIONS):
+            fp.write(bytes(layout[2 * i] - fp.tell()))
+            sectionData[name].tofile(fp)
+
+
+class BinarySnapshot(ZoneQueries):
+
+    def __init__(self, filename):
+        with open(filename, "rb") as fp:
+            self.mm = mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ)
+
+        fields = HEADER.unpack_from(self.mm, 0)
+        magic, version, byteOrder = fields[:3]
+        if magic != MAGIC or version != VERSION:
+            raise ValueError("{} is not a version {} binary snapshot".format(filename, VERSION))
+        if byteOrder != BYTE_ORDER_MARK:
+            raise ValueError("{} was written on a machine with a different byte order".format(filename))
+
+        view = memoryview(self.mm)
+        for i, (name, code) in enumerate(SECTIONS):
+            offset, size = fields[3 + 2 * i], fields[4 + 2 * i]
+            setattr(self, name, view[offset:offset + size].cast(code))
+
+    def string(self, i):
+        return bytes(self.stringData[self.stringOffsets[i]:self.stringOffsets[i + 1]]).decode()
+
+    def stringBytes(self, i):
+        return bytes(self.stringData[self.stringOffsets[i]:self.stringOffsets[i + 1]])
+
+    def lowerBound(self, key):
+        low, high = 0, len(self.sortedStrings)
+        while low < high:
+            middle = (low + high) // 2
+            if self.stringBytes(self.sortedStrings[middle]) < key:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def stringId(self, s):
+        key = s.encode()
+        position = self.lowerBound(key)
+        if position < len(self.sortedStrings) and self.stringBytes(self.sortedStrings[position]) == key:
+            return self.sortedStrings[position]
+        return None
+
+    def related(self, s, offsets, values, names):
+        i = self.stringId(s)
+        if i is None:
+            return []
+        return [self.string(names[j]) for j in values[offsets[i]:offsets[i + 1]]]
+
+    def objectAt(self, name):
+        i = self.stringId(name)
+        if i is None or self.objectTypes[i] == 0:
+            return None, None
+        return OBJECT_TYPES[self.objectTypes[i]], self.objectIndexes[i]
+
+    def objectType(self, name):
+        return self.objectAt(name)[0]
+
+    def matchNames(self, pattern):
+        # Only scan the stretch of the sorted string table sharing the pattern's literal prefix
+        prefix = pattern
+        for c in "*?[":
+            prefix = prefix.split(c)[0]
+        prefixBytes = prefix.encode()
+
+        names = []
+        for position in range(self.lowerBound(prefixBytes), len(self.sortedStrings)):
+            i = self.sortedStrings[position]
+            if not self.stringBytes(i).startswith(prefixBytes):
+                break
+            if self.objectTypes[i] != 0:
+                name = self.string(i)
+                if fnmatch.fnmatchcase(name, pattern):
+                    names.append(name)
+        return sorted(names)
+
+    def members(self, offsets, values, index):
+        return [self.string(j) for j in values[offsets[index]:offsets[index + 1]]]
+
+    def wwnsForAlias(self, alias):
+        objectType, index = self.objectAt(alias)
+        if objectType != 'alias':
+            return []
+        return self.members(self.aliasMemberOffsets, self.aliasMembers, index)
+
+    def aliasesForWwn(self, wwn):
+        return self.related(wwn, self.aliasesByWwnOffsets, self.aliasesByWwn, self.aliasNames)
+
+    def zonesForMember(self, member):
+        return self.related(member, self.zonesByMemberOffsets, self.zonesByMember, self.zoneNames)
+
+    def cfgsForZone(self, zone):
+        return self.related(zone, self.cfgsByZoneOffsets, self.cfgsByZone, self.cfgNames)
+
+    def zoneEntry(self, zone):
+        objectType, index = self.objectAt(zone)
+        return (self.zoneTypes[index], self.members(self.zoneMemberOffsets, self.zoneMembers, index),
+                self.members(self.zonePrincipalOffsets, self.zonePrincipals, index))
+
+    def cfgZones(self, cfg):
+        objectType, index = self.objectAt(cfg)
+        return self.members(self.cfgMemberOffsets, self.cfgMembers, index)
+
+
+def main(argv):
+    defCfgFile = None
+    binaryFile = None
+    profile = False
+
+    # Retrieve and parse command line arguments.
+    try:
+        opts, args = getopt.getopt(argv[1:], "d:o:h",
+            ["definedDB=", "outfile=", "profile"])
+    except getopt.GetoptError:
+        print("usage: {} -d <definedDB> -o <binaryFile> [--profile]".format(argv[0]))
+        sys.exit(2)
+    for opt, arg in opts:
+        if opt == '-h':
+            print("usage: {} -d <definedDB> -o <binaryFile> [--profile]".format(argv[0]))
+            sys.exit()
+        elif opt in ("-d", "--definedDB"):
+            defCfgFile = arg
+        elif opt in ("-o", "--outfile"):
+            binaryFile = arg
+        elif opt in ("--profile"):
+            profile = True
+
+    if (defCfgFile is None or binaryFile is None):
+        print("usage: {} -d <definedDB> -o <binaryFile> [--profile]".format(argv[0]))
+        sys.exit(2)
+
+    profiler = PhaseProfiler(profile, argv[0])
+
+    profiler.begin("load")
+    defined = getConfigurationFromFile(defCfgFile)
+
+    profiler.begin("index build")
+    zoneDB = ZoneDatabase(defined)
+
+    profiler.begin("write")
+    writeBinarySnapshot(zoneDB, binaryFile)
+
+
+if __name__ == "__main__":
+    main(sys.argv)
@@ -17,21 +17,14 @@
 # DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, 
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
 
-import json
 import sys
 import getopt
 from sortedcontainers import SortedSet, SortedList
-import re
-
-def getConfigurationFromFile(filename):
-
-    with open(filename, "r") as fp:
-        config = json.load(fp)
-
-    if "Response" in config.keys():
-        config = config["Response"]
-
-    return config
+from zoneDatabase import readDefinedFile, indexDefinedConfiguration, getConfigurationFromFile, \
+    getZonesAndWWPNsFromEffectiveConfig
+from wwn import WwnSet
+from deleteImpact import DeleteImpact
+from phaseProfiler import PhaseProfiler
 
 def getSetFromFile(filename):
     with open(filename, "r") as fp:
@@ -43,71 +36,117 @@ def getSetFromFile(filename):
 
     return fileSet
 
-def buildAliasToWwn(config):
+def getAliasesFromWwns(zoneDB, wwnList):
+    aliasList = SortedSet(zoneDB.aliasesForWwns(wwnList))
 
-    aliasTable = {}
+    return aliasList
 
-    aliases = config['defined-configuration']['alias']
 
-    for i in aliases:
-        aliasTable[i['alias-name']] = i['member-entry']['alias-entry-name']
+class DeleteChecks:
+    # The validations made before anything is deleted, apart from the report so they can
+    # be run on configurations that were fetched rather than read from files
 
-    return aliasTable
+    def __init__(self, zoneDB, effective, zonesToDelete, wwnsToDelete, invalidWwns):
+        self.invalidWwns = invalidWwns
+        self.effZones, self.effWWPNs = getZonesAndWWPNsFromEffectiveConfig(effective)
 
-def flipAliastoWWN(aliasTable):
-    wwnTable = {}
-    for i in aliasTable.keys():
-        for j in aliasTable[i]:
-            if j not in wwnTable.keys():
-                wwnTable[j] = list()
-            wwnTable[j].append(i)
-    return wwnTable
+        # From here on the WWNs are in canonical form and sorted
+        self.wwnStrings = wwnsToDelete.strings()
+        self.notFoundWwns = [i for i in self.wwnStrings if len(zoneDB.aliasesForWwn(i)) == 0]
+        self.aliasesToDelete = getAliasesFromWwns(zoneDB, self.wwnStrings)
+        self.notFoundZones = {i for i in zonesToDelete if zoneDB.objectType(i) != 'zone'}
+        self.zonesToDelete = {i for i in zonesToDelete if len(i) > 0}
 
-def getZonesAndWWPNsFromEffectiveConfig(config):
-    enabledZone = config['effective-configuration']['enabled-zone']
+        # Nothing in use by the active cfg may be deleted
+        self.zoneOverlap = self.effZones.intersection(zonesToDelete)
+        self.wwnOverlap = wwnsToDelete.intersection(WwnSet.fromStrings(self.effWWPNs)[0])
 
-    zoneNames = set()
-    wwns = set()
+        self.impact = DeleteImpact(zoneDB, self.aliasesToDelete, self.zonesToDelete)
 
-    for i in enabledZone:
-        zoneName = i['zone-name']
-        zoneNames.add(zoneName)
-        if 'entry-name' in i['member-entry'].keys():
-            for j in i['member-entry']['entry-name']:
-                wwns.add(j)
-        if 'principal-entry-name' in i['member-entry'].keys():
-            for j in i['member-entry']['principal-entry-name']:
-                wwns.add(j)
+    def ok(self):
+        return (len(self.invalidWwns) == 0 and len(self.notFoundWwns) == 0 and len(self.notFoundZones) == 0
+                and len(self.zoneOverlap) == 0 and len(self.wwnOverlap) == 0 and not self.impact.hasErrors())
 
-    return zoneNames, wwns
 
-def getZonesAndMembersFromDefinedConfig(config):
-    zoneList = config['defined-configuration']['zone']
+def printProblems(checks):
+    # Checks 1 to 3, returning False if any of them failed
+    # Check 1: Verify format of all WWNs
+    if len(checks.invalidWwns) > 0:
+        print("\nError: Non-WWN(s) found in WWN Delete List:")
+        for i in checks.invalidWwns:
+            print("\t{}".format(i))
+        return False
 
-    zoneNames = set()
-    members = set()
+    # Check 2: Verify all WWNs are currently assigned an alias
+    if len(checks.notFoundWwns) > 0:
+        print("\nERROR: WWNs in delete list do not have corresponding aliases:")
+        for i in checks.notFoundWwns:
+            print("\t{}".format(i))
 
-    for i in zoneList:
-        zoneName = i['zone-name']
-        zoneNames.add(zoneName)
-        #print(i['member-entry'].keys())
-        if 'entry-name' in i['member-entry'].keys():
-            for j in i['member-entry']['entry-name']:
-                members.add(j)
-        if 'principal-entry-name' in i['member-entry'].keys():
-            for j in i['member-entry']['principal-entry-name']:
-                members.add(j)
+    # Check 3: Verify all zone names in delete list are defined
+    if len(checks.notFoundZones) > 0:
+        print("\nERROR: Zone names in delete list do not have corresponding zone definitions:")
+        for i in SortedList(checks.notFoundZones):
+            if len(i) > 0:
+                print("\t{}".format(i))
 
-    return zoneNames, members
+    return len(checks.notFoundWwns) == 0 and len(checks.notFoundZones) == 0
 
-def getAliasesFromWwns(wwnLookupTable, wwnList):
-    aliasList = SortedSet()
-    for i in wwnList:
-        if i in wwnLookupTable.keys():
-            for j in wwnLookupTable[i]:
-                aliasList.add(j)
 
-    return aliasList
+def printOverlaps(checks):
+    # Checks 4 and 5, returning False if either of them failed
+    # Check 4: Check for non-removable zones
+    if len(checks.zoneOverlap) > 0:
+        print("\nERROR: Zones in delete list appear in the active configuration!")
+        print("Offending zones:")
+        for i in SortedList(checks.zoneOverlap):
+            print("\t{}".format(i))
+    else:
+        print("\nThere are no zones in the delete list that appear in the active configuration.")
+
+
+    # Check 5: Check for non-removable wwns
+    if len(checks.wwnOverlap) > 0:
+        print("\nERROR: WWNs in delete list appear in the active configuration!")
+        print("Offending WWNs:")
+        for i in checks.wwnOverlap.strings():
+            print("\t{}".format(i))
+    else:
+        print("\nThere are no WWNs in the delete list that appear in the active configuration.")
+
+    return len(checks.zoneOverlap) == 0 and len(checks.wwnOverlap) == 0
+
+
+def printImpact(impact):
+    # Returns False if a kept zone or cfg would be left empty
+    print("\nZones losing members when the aliases are deleted:")
+    for i in impact.affectedZones():
+        print("\t{} -> {} member(s) left".format(i, len(impact.zoneMembersLeft[i])))
+
+    if len(impact.emptiedZones) > 0:
+        print("\nERROR: Zones left with no members, add them to the zone delete list:")
+        for i in impact.emptiedZones:
+            print("\t{}".format(i))
+
+    if len(impact.undersizedZones) > 0:
+        print("\nWARNING: Zones left with fewer than two members:")
+        for i in impact.undersizedZones:
+            print("\t{} -> {}".format(i, impact.zoneMembersLeft[i]))
+
+    if len(impact.danglingCfgMembers) > 0:
+        print("\nWARNING: Cfgs that lose zones when the zones are deleted:")
+        for i in sorted(impact.danglingCfgMembers):
+            print("\t{} -> {}".format(i, impact.danglingCfgMembers[i]))
+
+    if len(impact.emptiedCfgs) > 0:
+        print("\nERROR: Cfgs left with no zones, delete them or give them another zone first:")
+        for i in impact.emptiedCfgs:
+            print("\t{}".format(i))
+
+    if not (impact.hasErrors() or impact.hasWarnings()):
+        print("\nNo zones or cfgs in the defined configuration are left empty or lose members.")
+
+    return not impact.hasErrors()
 
 def main(argv):
 
@@ -115,17 +154,18 @@ def main(argv):
     defCfgFile = None
     zoneDelFile = None
     wwnDelFile = None
+    profile = False
 
     # Retrieve and parse command line arguments.
     try:
         opts, args = getopt.getopt(argv[1:],"e:d:w:z:",
-            ["effectiveDB=", "definedDB=", "zoneFile=", "wwnFile="])
+            ["effectiveDB=", "definedDB=", "zoneFile=", "wwnFile=", "profile"])
     except getopt.GetoptError:
-        print("usage: {} -e <effectiveDBFile> -d <definedDBFile> -z <zonesFile> -w <wwnsFile>".format(argv[0]))
+        print("usage: {} -e <effectiveDBFile> -d <definedDBFile> -z <zonesFile> -w <wwnsFile> [--profile]".format(argv[0]))
         sys.exit(2)
     for opt, arg in opts:
         if opt == '-h':
-            print("usage: {} -e <effectiveDBFile> -d <definedDBFile> -z <zonesFile> -w <wwnsFile>".format(argv[0]))
+            print("usage: {} -e <effectiveDBFile> -d <definedDBFile> -z <zonesFile> -w <wwnsFile> [--profile]".format(argv[0]))
             sys.exit()
         elif opt in ("-e", "--effectiveDB"):
             effCfgFile = arg
@@ -137,61 +177,36 @@ def main(argv):
             wwnDelFile = arg
         elif opt in ("--insecure"):
             prefix = "http"
+        elif opt in ("--profile"):
+            profile = True
 
 
     if (effCfgFile is None or defCfgFile is None or zoneDelFile is None or wwnDelFile is None):
-        print("usage: {} -e <effectiveDBFile> -d <definedDBFile> -z <zonesFile> -w <wwnsFile>".format(argv[0]))
+        print("usage: {} -e <effectiveDBFile> -d <definedDBFile> -z <zonesFile> -w <wwnsFile> [--profile]".format(argv[0]))
         sys.exit(2)
 
 
+    profiler = PhaseProfiler(profile, argv[0])
 
-    defined = getConfigurationFromFile(defCfgFile)
+    profiler.begin("load")
+    defined = readDefinedFile(defCfgFile)
     effective = getConfigurationFromFile(effCfgFile)
     zonesToDelete = getSetFromFile(zoneDelFile)
-    wwnsToDelete = getSetFromFile(wwnDelFile)
-
-    aliasTable = buildAliasToWwn(defined)
-    wwnLookupTable = flipAliastoWWN(aliasTable)
-
-    effZones, effWWPNs = getZonesAndWWPNsFromEffectiveConfig(effective)
-    defZones, defAliases = getZonesAndMembersFromDefinedConfig(defined)
+    wwnsToDelete, invalidWwns = WwnSet.fromFile(wwnDelFile)
 
+    profiler.begin("index build")
+    zoneDB = indexDefinedConfiguration(defined)
 
-    # Check 1: Verify format of all WWNs
-    problem = False
-    for i in wwnsToDelete:
-        if not re.search("([0-9a-fA-F]{2}:){7}[0-9a-fA-F]{2}", i):
-            if not problem:
-                print("\nError: Non-WWN(s) found in WWN Delete List:")
-            problem = True
-            print("\t{}".format(i))
-    if problem:
-        exit(2)   
+    profiler.begin("validation")
+    checks = DeleteChecks(zoneDB, effective, zonesToDelete, wwnsToDelete, invalidWwns)
 
-    # Check 2: Verify all WWNs are currently assigned an alias
-    notFoundList = wwnsToDelete - set(wwnLookupTable.keys())
-    if len(notFoundList) > 0:
-        problem = True
-        print("\nERROR: WWNs in delete list do not have corresponding aliases:")
-        for i in notFoundList:
-            print("\t{}".format(i))
-
-    aliasesToDelete = getAliasesFromWwns(wwnLookupTable, wwnsToDelete)
-
-    # Check 3: Verify all zone names in delete list are defined
-    notFoundList = zonesToDelete.difference(defZones)
-    if len(notFoundList) > 0:
-        problem = True
-        print("\nERROR: Zone names in delete list do not have corresponding zone definitions:")
-        for i in SortedList(notFoundList):
-            if len(i) > 0:
-                print("\t{}".format(i))
-    if problem:
-        exit(2)   
+    profiler.begin("report")
+    if not printProblems(checks):
+        exit(2)
 
     # Print information for human verification of results
     print("Zones in active cfg:")
-    for i in SortedList(effZones):
+    for i in SortedList(checks.effZones):
         print("\t{}".format(i))
 
     print("\nZones to be deleted:")
@@ -199,53 +214,35 @@ def main(argv):
         print("\t{}".format(i))
 
     print("\nWWNs in active cfg:")
-    for i in SortedList(effWWPNs):
+    for i in SortedList(checks.effWWPNs):
         print("\t{}".format(i))
 
     print("\nWWNs to be deleted:")
-    for i in SortedList(wwnsToDelete):
+    for i in checks.wwnStrings:
         print("\t{}".format(i))
 
-    # Check 4: Check for non-removable zones
-    zoneOverlap = effZones.intersection(zonesToDelete)
-    if len(zoneOverlap) > 0:
-        problem = True
-        print("\nERROR: Zones in delete list appear in the active configuration!")
-        print("Offending zones:")
-        for i in SortedList(zoneOverlap):
-            print("\t{}".format(i))
-    else:
-        print("\nThere are no zones in the delete list that appear in the active configuration.")
-
-
-    # Check 5: Check for non-removable wwns
-    wwnOverlap = effWWPNs.intersection(wwnsToDelete)
-    if len(wwnOverlap) > 0:
-        problem = True
-        print("\nERROR: WWNs in delete list appear in the active configuration!")
-        print("Offending WWNs:")
-        for i in SortedList(wwnOverlap):
-            print("\t{}".format(i))
-    else:
-        print("\nThere are no WWNs in the delete list that appear in the active configuration.")
-
-
-    if problem:
+    if not printOverlaps(checks):
         print("\nSTOP!  Do not proceed until the problems listed above have been addressed.")
         exit(2)
 
     # Print cross reference table for aliases
     print("\nWWN to Alias Translation Table:")
-    for i in SortedList(wwnsToDelete):
-        print("\t{} -> {}".format(i, wwnLookupTable[i]))
+    for i in checks.wwnStrings:
+        print("\t{} -> {}".format(i, zoneDB.aliasesForWwn(i)))
 
     # Show reolved aliases to be deleted from definedDB
     print("\nAliases to be deleted to remove WWNs in list:")
-    for i in SortedList(aliasesToDelete):
+    for i in SortedList(checks.aliasesToDelete):
         print("\t{}".format(i))
 
+    # Show what the deletions do to the rest of the defined configuration
+    if not printImpact(checks.impact):
+        print("\nSTOP!  Do not proceed until the problems listed above have been addressed.")
+        exit(2)
+
     print("\nReview the above and if appropriate proceed to the deletion step.")
     print("Do not proceed unless the above has been verified independently as correct.")
 
+
 if __name__ == "__main__":
-    main(sys.argv)
\ No newline at end of file
+    main(sys.argv)
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+# Version 23.2.1.1
+# Copyright 2023 Chip Copper
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this
+# software and associated documentation files (the "Software"), to deal in the Software
+# without restriction, including without limitation the rights to use, copy, modify, merge,
+# publish, distribute, sublicense, and/or sell copies of the Software, and to permit persons
+# to whom the Software is furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all copies or
+# substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING
+# BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM,
+# DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+# Copy-on-write view of a defined configuration for trying out changes.  An overlay
+# sits on top of a ZoneDatabase, a SnapshotIndex, a BinarySnapshot or another overlay
+# and only records its own removals and additions, with reverse indexes for the
+# objects it adds.  Queries answer for the merged view, so many scenarios can share
+# one loaded configuration and creating one costs nothing until it is changed.
+#
+#   overlay = ConfigOverlay(zoneDB)
+#   overlay.remove('alias1')
+#   overlay.add('zone', 'zone1', {'member-entry': {'entry-name': ['alias2', 'alias3']}})
+#   DeleteImpact(overlay, ...)
+
+import fnmatch
+from zoneDatabase import MEMBER_KEYS, ZoneQueries
+
+
+
+def payloadMembers(objectType, payload):
+    container, keys = MEMBER_KEYS[objectType]
+    members = []
+    for key in keys:
+        members.extend(payload[container].get(key, []))
+
+    return members
+
+
+class ConfigOverlay(ZoneQueries):
+
+    def __init__(self, base):
+        self.base = base
+        self.removed = set()
+        self.added = {}
+        self.wwnToAliases = {}
+        self.memberToZones = {}
+        self.zoneToCfgs = {}
+
+    def reverseIndex(self, objectType):
+        return {'alias': self.wwnToAliases, 'zone': self.memberToZones, 'cfg': self.zoneToCfgs}[objectType]
+
+    def unindex(self, name):
+        objectType, payload = self.added.pop(name)
+        index = self.reverseIndex(objectType)
+        for member in payloadMembers(objectType, payload):
+            names = index.get(member)
+            if names is not None and name in names:
+                names.remove(name)
+                if len(names) == 0:
+                    del index[member]
+
+    def remove(self, name):
+        if name in self.added:
+            self.unindex(name)
+        if self.base.objectType(name) is not None:
+            self.removed.add(name)
+
+    def add(self, objectType, name, payload):
+        # Adding a name the base already has replaces it in this view
+        self.remove(name)
+        self.added[name] = (objectType, payload)
+        index = self.reverseIndex(objectType)
+        for member in payloadMembers(objectType, payload):
+            names = index.setdefault(member, [])
+            if name not in names:
+                names.append(name)
+
+    def hidden(self, name):
+        # Base objects this overlay has removed or replaced
+        return name in self.removed or name in self.added
+
+    def merged(self, baseNames, addedNames):
+        return [i for i in baseNames if not self.hidden(i)] + addedNames
+
+    def changes(self):
+        return sorted(self.removed.difference(self.added)), sorted(self.added)
+
+    def objectType(self, name):
+        if name in self.added:
+            return self.added[name][0]
+        if name in self.removed:
+            return None
+        return self.base.objectType(name)
+
+    def matchNames(self, pattern):
+        return sorted(self.merged(self.base.matchNames(pattern), fnmatch.filter(self.added.keys(), pattern)))
+
+    def wwnsForAlias(self, alias):
+        if alias in self.added:
+            objectType, payload = self.added[alias]
+            return payloadMembers(objectType, payload) if objectType == 'alias' else []
+        if alias in self.removed:
+            return []
+        return self.base.wwnsForAlias(alias)
+
+    def aliasesForWwn(self, wwn):
+        return self.merged(self.base.aliasesForWwn(wwn), self.wwnToAliases.get(wwn, []))
+
+    def zonesForMember(self, member):
+        return self.merged(self.base.zonesForMember(member), self.memberToZones.get(member, []))
+
+    def cfgsForZone(self, zone):
+        return self.merged(self.base.cfgsForZone(zone), self.zoneToCfgs.get(zone, []))
+
+    def payload(self, name):
+        if name in self.added:
+            return self.added[name][1]
+        if name in self.removed:
+            return None
+        return self.base.payload(name)
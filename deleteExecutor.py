@@ -0,0 +1,297 @@
+#!/usr/bin/env python3
+# Version 23.2.1.1
+# Copyright 2023 Chip Copper
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this
+# software and associated documentation files (the "Software"), to deal in the Software
+# without restriction, including without limitation the rights to use, copy, modify, merge,
+# publish, distribute, sublicense, and/or sell copies of the Software, and to permit persons
+# to whom the Software is furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all copies or
+# substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING
+# BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM,
+# DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+# Runs a delete list, the (type, name) targets batchDelete takes, as a graph of steps
+# instead of one type after another.  Nothing is deleted while something that is kept
+# still refers to it:
+#
+#   a cfg that is kept first has the deleted zones taken out of it ('remove' step)
+#   a zone that is kept first has the deleted aliases taken out of it
+#   a zone is deleted after the deleted cfgs listing it and the removals from the others
+#   an alias is deleted after the deleted zones holding it and the removals from the others
+#
+# Steps wait only for the steps they depend on.  Up to 'workers' requests are in flight at
+# once over the client's pooled session, paced by its throttle, and ready steps of the same
+# kind go out together as one list request of up to 'batchSize' objects, falling back to
+# one request per object when a list request fails.  A step whose prerequisite failed is
+# skipped and reported with a status of None.
+#
+# A step the switch refuses with a 400 or 404 is looked up again: if the object is
+# already gone, or no longer lists the members being taken out, the step is done and is
+# reported with a status of 404.
+#
+# Objects that are kept but would be left with no members at all cannot be emptied through
+# the API.  DeleteImpact finds them, as it does for checks.py and the simulator, and they
+# are reported as errors; nothing is run until they are added to the list.
+#
+# Given the effective configuration, the plan also refuses what checks.py stops on:
+# deleting an enabled zone or the effective cfg, deleting an alias holding a WWN that is
+# zoned in the effective configuration, and taking zones out of the effective cfg.
+
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from restClient import NAME_KEYS, DELETE_ORDER, deleteZoneObject, deleteZoneObjects, \
+    removeZoneMembers, updateZoneObjects, getZoneObject
+from zoneDatabase import MEMBER_KEYS, getZonesAndWWPNsFromEffectiveConfig
+from wwn import WwnSet
+from deleteImpact import DeleteImpact
+
+# Statuses of steps that leave the object as the plan wants it; 404 is a step that
+# turned out to have been done already
+DONE_STATUSES = (204, 404)
+
+# Order ready steps are sent in, so that the steps others wait for go first
+STEP_RANK = {('remove', 'cfg'): 0, ('remove', 'zone'): 1,
+             ('delete', 'cfg'): 2, ('delete', 'zone'): 3, ('delete', 'alias'): 4}
+
+
+class DeleteStep:
+
+    def __init__(self, action, objectType, name, payload=None):
+        self.action = action
+        self.objectType = objectType
+        self.name = name
+        self.payload = payload
+        self.prerequisites = set()
+        self.dependents = list()
+
+    def key(self):
+        return (self.action, self.objectType, self.name)
+
+    def kind(self):
+        return (self.action, self.objectType)
+
+
+class DeletePlan:
+
+    def __init__(self, zoneDB, targets, effective=None):
+        self.steps = {}
+        self.errors = []
+
+        deleted = {objectType: set() for objectType in DELETE_ORDER}
+        for objectType, name in targets:
+            deleted[objectType].add(name)
+
+        # Kept cfgs lose the deleted zones and kept zones the deleted aliases
+        removals = {'cfg': {}, 'zone': {}}
+        for zone in deleted['zone']:
+            for cfg in zoneDB.cfgsForZone(zone):
+                if cfg not in deleted['cfg']:
+                    removals['cfg'].setdefault(cfg, []).append(zone)
+        for alias in deleted['alias']:
+            for zone in zoneDB.zonesForMember(alias):
+                if zone not in deleted['zone']:
+                    removals['zone'].setdefault(zone, []).append(alias)
+
+        if effective is not None:
+            self.checkEffective(zoneDB, effective, deleted, removals)
+
+        impact = DeleteImpact(zoneDB, deleted['alias'], deleted['zone'], deleted['cfg'])
+        for cfg in impact.emptiedCfgs:
+            self.errors.append("cfg {} would be left with no zones".format(cfg))
+        for zone in impact.emptiedZones:
+            self.errors.append("zone {} would be left with no members".format(zone))
+
+        for cfg in sorted(removals['cfg']):
+            self.addStep('remove', 'cfg', cfg, self.removalPayload(zoneDB, 'cfg', cfg, removals['cfg'][cfg]))
+        for zone in sorted(removals['zone']):
+            self.addStep('remove', 'zone', zone, self.removalPayload(zoneDB, 'zone', zone, removals['zone'][zone]))
+
+        for objectType in DELETE_ORDER:
+            for name in sorted(deleted[objectType]):
+                self.addStep('delete', objectType, name)
+
+        # Each object waits for whatever still refers to it to be deleted or to let go of it
+        for zone in deleted['zone']:
+            for cfg in zoneDB.cfgsForZone(zone):
+                action = 'delete' if cfg in deleted['cfg'] else 'remove'
+                self.addDependency((action, 'cfg', cfg), ('delete', 'zone', zone))
+        for alias in deleted['alias']:
+            for zone in zoneDB.zonesForMember(alias):
+                action = 'delete' if zone in deleted['zone'] else 'remove'
+                self.addDependency((action, 'zone', zone), ('delete', 'alias', alias))
+
+    def checkEffective(self, zoneDB, effective, deleted, removals):
+        effectiveCfg = effective['effective-configuration'].get('cfg-name')
+        enabledZones, enabledWwns = getZonesAndWWPNsFromEffectiveConfig(effective)
+        enabledWwns = WwnSet.fromStrings(enabledWwns)[0]
+
+        if effectiveCfg in deleted['cfg']:
+            self.errors.append("cfg {} is the effective configuration".format(effectiveCfg))
+        if effectiveCfg in removals['cfg']:
+            self.errors.append("cfg {} is the effective configuration and would lose {}".format(
+                effectiveCfg, ", ".join(sorted(removals['cfg'][effectiveCfg]))))
+        for zone in sorted(deleted['zone'].intersection(enabledZones)):
+            self.errors.append("zone {} is in the effective configuration".format(zone))
+        for alias in sorted(deleted['alias']):
+            if any(i in enabledWwns for i in zoneDB.wwnsForAlias(alias)):
+                self.errors.append("alias {} holds a WWN in the effective configuration".format(alias))
+
+    def addStep(self, action, objectType, name, payload=None):
+        step = DeleteStep(action, objectType, name, payload)
+        self.steps[step.key()] = step
+
+    def addDependency(self, prerequisite, dependent):
+        if prerequisite in self.steps[dependent].prerequisites:
+            return
+        self.steps[dependent].prerequisites.add(prerequisite)
+        self.steps[prerequisite].dependents.append(dependent)
+
+    @staticmethod
+    def removalPayload(zoneDB, objectType, name, members):
+        # Only the members being removed, under the keys the object holds them in
+        container, keys = MEMBER_KEYS[objectType]
+        current = zoneDB.payload(name)[container]
+        removed = set(members)
+        return {container: {key: [i for i in current.get(key, []) if i in removed]
+                            for key in keys if any(i in removed for i in current.get(key, []))}}
+
+    def ok(self):
+        return len(self.errors) == 0
+
+
+def planDeletes(zoneDB, targets, effective=None):
+    return DeletePlan(zoneDB, targets, effective)
+
+
+def stepDone(status):
+    return status in DONE_STATUSES
+
+
+def alreadyDone(client, step):
+    # Whether the object is gone or, for a removal, no longer lists any of the members
+    status, entry = getZoneObject(client, step.objectType, step.name)
+    if status in (400, 404):
+        return True
+    if status != 200 or step.action == 'delete':
+        return False
+
+    container = MEMBER_KEYS[step.objectType][0]
+    current = entry.get(container, {})
+    return not any(i in current.get(key, []) for key, members in step.payload[container].items() for i in members)
+
+
+def runSingle(client, step):
+    uri = f'{step.objectType}/{NAME_KEYS[step.objectType]}/{step.name}'
+    if step.action == 'remove':
+        status = removeZoneMembers(client, uri, step.payload)
+    else:
+        status = deleteZoneObject(client, uri)
+
+    if status in (400, 404) and alreadyDone(client, step):
+        return 404
+    return status
+
+
+def runBatch(client, steps):
+    # Every step in the batch is of the same kind
+    if len(steps) == 1:
+        return [(steps[0].key(), runSingle(client, steps[0]))]
+
+    action, objectType = steps[0].kind()
+    if action == 'remove':
+        entries = [dict({NAME_KEYS[objectType]: step.name}, **step.payload) for step in steps]
+        status = updateZoneObjects(client, "DELETE", objectType, entries)
+    else:
+        status = deleteZoneObjects(client, objectType, [step.name for step in steps])
+    if status == 204:
+        return [(step.key(), status) for step in steps]
+
+    # Fall back to one request per object so one bad name does not sink the batch
+    print(f'Retrying {len(steps)} {objectType} {action}s one at a time.')
+    return [(step.key(), runSingle(client, step)) for step in steps]
+
+
+class ReadyQueue:
+    # Ready steps by kind; batches are taken from the kind that ranks first
+
+    def __init__(self):
+        self.kinds = {kind: deque() for kind in sorted(STEP_RANK, key=STEP_RANK.get)}
+        self.count = 0
+
+    def __len__(self):
+        return self.count
+
+    def add(self, key):
+        self.kinds[key[:2]].append(key)
+        self.count += 1
+
+    def takeBatch(self, batchSize):
+        for keys in self.kinds.values():
+            if len(keys) > 0:
+                batch = [keys.popleft() for i in range(min(max(batchSize, 1), len(keys)))]
+                self.count -= len(batch)
+                return batch
+
+        return []
+
+
+def executeDeletes(client, plan, workers=1, batchSize=50):
+    # Returns (action, type, name, status) for every step in plan order; None when skipped
+    workers = max(workers, 1)
+    waiting = {key: len(step.prerequisites) for key, step in plan.steps.items()}
+    ready = ReadyQueue()
+    for key, count in waiting.items():
+        if count == 0:
+            ready.add(key)
+    statuses = {}
+    running = set()
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        while len(ready) > 0 or len(running) > 0:
+            while len(ready) > 0 and len(running) < workers:
+                batch = [plan.steps[key] for key in ready.takeBatch(batchSize)]
+                running.add(executor.submit(runBatch, client, batch))
+
+            done, running = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                for key, status in future.result():
+                    statuses[key] = status
+                    if not stepDone(status):
+                        continue
+                    # A dependent of a failed step never gets here and so is never run
+                    for dependent in plan.steps[key].dependents:
+                        waiting[dependent] -= 1
+                        if waiting[dependent] == 0:
+                            ready.add(dependent)
+
+    return [key + (statuses.get(key),) for key in plan.steps]
+
+
+def printDeleteResults(plan, results):
+    for action, objectType, name, status in results:
+        if action == 'remove':
+            container = MEMBER_KEYS[objectType][0]
+            members = [i for key in plan.steps[(action, objectType, name)].payload[container].values() for i in key]
+            done = f'{objectType} {name} no longer lists {", ".join(members)}.'
+            already = f'{objectType} {name} did not list {", ".join(members)} any more.'
+            failed = f'{", ".join(members)} could not be taken out of {objectType} {name}'
+        else:
+            done = f'{objectType} {name} has been deleted from the defined configuration.'
+            already = f'{objectType} {name} was no longer in the defined configuration.'
+            failed = f'{objectType} {name} could not be deleted'
+
+        if status == 204:
+            print(done)
+        elif status == 404:
+            print(already)
+        elif status is None:
+            print(f'{failed}: skipped after a step it depends on failed.')
+        else:
+            print(f'{failed}: {status}')
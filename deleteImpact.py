@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+# Version 23.2.1.1
+# Copyright 2023 Chip Copper
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this
+# software and associated documentation files (the "Software"), to deal in the Software
+# without restriction, including without limitation the rights to use, copy, modify, merge,
+# publish, distribute, sublicense, and/or sell copies of the Software, and to permit persons
+# to whom the Software is furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all copies or
+# substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING
+# BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM,
+# DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+# Works out what a delete list does to the rest of the defined configuration.  The
+# aliases, zones and cfgs form a graph (alias -> zones listing it -> cfgs listing
+# those), and the reverse indexes of the zone database let the walk start from the
+# deleted objects and only visit what they touch:
+#
+#   zones losing members, and how many members they keep
+#   zones left with a single member, which no longer zone anything
+#   cfgs that have to let go of a deleted zone
+#   zones left with no members and cfgs left with no zones
+#
+# The API cannot empty an object, so nothing goes away beyond what is on the delete
+# lists: an emptied zone or cfg is an error until it is added to them.  deleteExecutor
+# refuses the same plans.
+#
+# Every touched zone and cfg is read once, so the cost grows with the size of the
+# affected part of the configuration rather than the size of the delete list squared.
+
+
+def zoneMemberList(zoneDB, zone):
+    memberEntry = zoneDB.payload(zone)['member-entry']
+    return memberEntry.get('entry-name', []) + memberEntry.get('principal-entry-name', [])
+
+
+def cfgMemberList(zoneDB, cfg):
+    return zoneDB.payload(cfg)['member-zone'].get('zone-name', [])
+
+
+class DeleteImpact:
+
+    def __init__(self, zoneDB, aliases, zones, cfgs=()):
+        self.deletedAliases = set(aliases)
+        self.deletedZones = set(zones)
+        self.deletedCfgs = set(cfgs)
+        self.zoneMembersLeft = {}
+        self.emptiedZones = []
+        self.undersizedZones = []
+        self.danglingCfgMembers = {}
+        self.emptiedCfgs = []
+
+        # Zones that lose a member, each read once
+        for alias in self.deletedAliases:
+            for zone in zoneDB.zonesForMember(alias):
+                if zone in self.deletedZones or zone in self.zoneMembersLeft:
+                    continue
+                self.zoneMembersLeft[zone] = [i for i in zoneMemberList(zoneDB, zone)
+                                              if i not in self.deletedAliases]
+
+        for zone, members in self.zoneMembersLeft.items():
+            if len(members) == 0:
+                self.emptiedZones.append(zone)
+            elif len(members) < 2:
+                self.undersizedZones.append(zone)
+        self.emptiedZones.sort()
+        self.undersizedZones.sort()
+
+        # Kept cfgs that list a deleted zone
+        for zone in self.deletedZones:
+            for cfg in zoneDB.cfgsForZone(zone):
+                if cfg not in self.deletedCfgs:
+                    self.danglingCfgMembers.setdefault(cfg, []).append(zone)
+
+        for cfg, zones in self.danglingCfgMembers.items():
+            zones.sort()
+            if all(i in self.deletedZones for i in cfgMemberList(zoneDB, cfg)):
+                self.emptiedCfgs.append(cfg)
+        self.emptiedCfgs.sort()
+
+    def affectedZones(self):
+        return sorted(self.zoneMembersLeft)
+
+    def hasErrors(self):
+        return len(self.emptiedZones) > 0 or len(self.emptiedCfgs) > 0
+
+    def hasWarnings(self):
+        return len(self.undersizedZones) > 0 or len(self.danglingCfgMembers) > 0
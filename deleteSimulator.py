@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+# Version 23.2.1.1
+# Copyright 2023 Chip Copper
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this
+# software and associated documentation files (the "Software"), to deal in the Software
+# without restriction, including without limitation the rights to use, copy, modify, merge,
+# publish, distribute, sublicense, and/or sell copies of the Software, and to permit persons
+# to whom the Software is furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all copies or
+# substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING
+# BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM,
+# DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+# Applies a delete plan to a saved defined configuration instead of the switch.  A plan
+# is a list of (type, name) pairs, the same targets batchDelete takes.  Deleted objects
+# are dropped along with every reference to them, giving the defined configuration the
+# plan leaves behind, a structural diff against the original and the errors and warnings
+# the plan would run into, all without any REST traffic.
+#
+# The plan is applied to a ConfigOverlay on the loaded zone database, so a simulation
+# only holds the objects it changes and any number of them can share one configuration.
+# The overlay answers the usual zone database queries for the result, and the full
+# resulting configuration is only put together when it is asked for.
+
+from zoneDatabase import ZoneDatabase, NAME_KEYS, MEMBER_KEYS
+from configOverlay import ConfigOverlay
+from deleteImpact import DeleteImpact
+from snapshotDiff import diffConfigurations
+
+
+
+def planFromLists(zoneDB, wwns, zones):
+    # Every alias holding one of the WWNs, then the zones
+    targets = [('alias', i) for i in sorted(zoneDB.aliasesForWwns(wwns))]
+    targets.extend(('zone', i) for i in sorted(zones))
+
+    return targets
+
+
+def withoutMembers(zoneDB, objectType, name, removed):
+    # Payload of a kept object once the removed members are taken out of it
+    container, keys = MEMBER_KEYS[objectType]
+    payload = dict(zoneDB.payload(name))
+    members = {}
+    for key in keys:
+        kept = [i for i in payload[container].get(key, []) if i not in removed]
+        if len(kept) > 0:
+            members[key] = kept
+    payload[container] = members
+
+    return payload
+
+
+def subsetConfiguration(zoneDB, objects):
+    # Just the given objects as a defined configuration, for diffing the changed part only
+    defined = {}
+    for objectType, name in objects:
+        payload = zoneDB.payload(name)
+        if payload is not None:
+            defined.setdefault(objectType, []).append(dict({NAME_KEYS[objectType]: name}, **payload))
+
+    return {'defined-configuration': defined}
+
+
+class Simulation:
+
+    def __init__(self, defined, targets, effective=None, zoneDB=None):
+        self.before = defined
+        self.errors = []
+        self.warnings = []
+
+        if zoneDB is None:
+            zoneDB = ZoneDatabase(defined)
+        deleted = {'alias': set(), 'zone': set(), 'cfg': set()}
+        for objectType, name in targets:
+            if zoneDB.objectType(name) != objectType:
+                self.errors.append("{} {} is not in the defined configuration".format(objectType, name))
+                continue
+            deleted[objectType].add(name)
+
+        if effective is not None:
+            effectiveCfg = effective['effective-configuration'].get('cfg-name')
+            enabledZones = {i['zone-name'] for i in effective['effective-configuration'].get('enabled-zone', [])}
+            for zone in sorted(deleted['zone'].intersection(enabledZones)):
+                self.errors.append("zone {} is in the effective configuration".format(zone))
+            if effectiveCfg in deleted['cfg']:
+                self.errors.append("cfg {} is the effective configuration".format(effectiveCfg))
+
+        # What the deletions do to the objects that stay
+        self.impact = DeleteImpact(zoneDB, deleted['alias'], deleted['zone'], deleted['cfg'])
+        for zone in self.impact.emptiedZones:
+            self.errors.append("zone {} is left with no members".format(zone))
+        for zone in self.impact.undersizedZones:
+            self.warnings.append("zone {} is left with fewer than two members".format(zone))
+        for cfg in self.impact.emptiedCfgs:
+            self.errors.append("cfg {} is left with no zones".format(cfg))
+
+        # The targets go and the kept objects listing them are replaced by trimmed copies.
+        # Nothing goes beyond the targets; objects they empty stay, empty, and are errors above
+        self.overlay = ConfigOverlay(zoneDB)
+        for objectType, names in deleted.items():
+            for name in names:
+                self.overlay.remove(name)
+        for zone in self.impact.zoneMembersLeft:
+            self.overlay.add('zone', zone, withoutMembers(zoneDB, 'zone', zone, deleted['alias']))
+        for cfg in self.impact.danglingCfgMembers:
+            self.overlay.add('cfg', cfg, withoutMembers(zoneDB, 'cfg', cfg, deleted['zone']))
+
+        # Only the changed objects are compared
+        removed, added = self.overlay.changes()
+        changed = [(zoneDB.objectType(i), i) for i in removed + added]
+        self.diff = diffConfigurations(subsetConfiguration(zoneDB, changed),
+                                       subsetConfiguration(self.overlay, changed))
+
+    def resultConfiguration(self):
+        # The whole defined configuration the plan leaves behind, in the original order
+        result = {}
+        for objectType, nameKey in NAME_KEYS.items():
+            entries = self.before['defined-configuration'].get(objectType)
+            if entries is None:
+                continue
+            result[objectType] = []
+            for entry in entries:
+                name = entry[nameKey]
+                if not self.overlay.hidden(name):
+                    result[objectType].append(entry)
+                elif self.overlay.objectType(name) == objectType:
+                    container = MEMBER_KEYS[objectType][0]
+                    result[objectType].append(dict(entry, **{container: self.overlay.payload(name)[container]}))
+
+        return {'defined-configuration': result}
+
+    def ok(self):
+        return len(self.errors) == 0
+
+
+def simulateDeletes(defined, targets, effective=None, zoneDB=None):
+    return Simulation(defined, targets, effective, zoneDB)
@@ -18,151 +18,14 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
 
 import sys
-import json
-import base64
-import requests
 import argparse
 from decouple import config
+from restClient import restLogin, restLogout, getEffectiveConfiguration, getDefinedConfiguration, \
+    saveConfiguration
+from zoneDatabase import ZoneDatabase
+from deleteExecutor import planDeletes, executeDeletes, printDeleteResults
+from phaseProfiler import PhaseProfiler
 
-def restLogin(username, password, switchAddress, prefix):
-    credentials = base64.b64encode(bytearray(username + ":" + password, 'utf-8')).decode()
-
-    # Suppress warnings for self-signed certificates
-    requests.packages.urllib3.disable_warnings()
-
-    # Set the base for all REST calls
-    url_base = prefix + "://" + switchAddress + "/rest/"
-    session = requests.session()
-
-    # No payload
-    payload = {}
-    files = {}
-
-    # Send the login and print the return status code
-    headers = {
-        'Authorization': 'Basic ' + credentials
-    }
-    response = session.request("POST", url_base + "login", headers=headers, data=payload, files=files, verify=False)
-    if response.status_code != 200:
-        print("Error logging in: {}".format(response.status_code))
-        exit()
-
-    with open("sessKey.txt", "w") as fp:
-        fp.write(response.headers["Authorization"])
-
-    return session, response.headers["Authorization"]
-
-def restLogout(session, sessionKey, switchAddress, prefix):
-    url_base = prefix + "://" + switchAddress + "/rest/"
-    # No payload
-    payload = {}
-    files = {}
-
-    session_headers = {
-        'Authorization': sessionKey,
-        'Accept': 'application/yang-data+json',
-        'Content-Type': 'application/yang-data+json'
-    }
-
-    # Send the logout and print the return status code
-    response = session.request("POST", url_base + "logout", headers=session_headers, data=payload, verify=False)
-    if response.status_code != 204:
-        print("Error logging out: {}".format(response.status_code))
-
-def saveConfiguration(session, sessionKey, prefix, switchAddress, checksum):
-    payload = {
-        "checksum": checksum
-    }
-
-    print(f'payload: {payload}')
-
-    url_base = prefix + "://" + switchAddress + "/rest/"
-    files = {}
-    session_headers = {
-        'Authorization': sessionKey,
-        'Accept': 'application/yang-data+json',
-        'Content-Type': 'application/yang-data+json'
-    }
-
-    # Update the zone
-    response = session.request("PATCH",
-                               url_base + "running/brocade-zone/effective-configuration/cfg-action/1",
-                               headers=session_headers, json=payload, files=files, verify=False)
-    if response.status_code >= 300:
-        errorDict = json.loads(response.text)
-        print("Error saving configuration: {}".format(errorDict['errors']['error'][0]['error-message']))
-
-    return response.status_code
-
-def getEffectiveConfiguration(session, sessionKey, prefix, switchAddress):
-    url_base = prefix + "://" + switchAddress + "/rest/"
-    # No payload
-    payload = {}
-    files = {}
-
-    session_headers = {
-        'Authorization': sessionKey,
-        'Accept': 'application/yang-data+json',
-        'Content-Type': 'application/yang-data+json'
-    }
-
-    # Get the effective configuration
-    response = session.request("GET", url_base + "running/brocade-zone/effective-configuration",
-                               headers=session_headers, data=payload, files=files, verify=False)
-    if response.status_code != 200:
-        print("Error getting effective configuration in: {}".format(response.status_code))
-        print(response.text)
-        exit(3)
-    else:
-        json_response = json.loads(response.text)
-
-    return json_response["Response"]
-
-def getDefinedConfiguration(session, sessionKey, prefix, switchAddress):
-    url_base = prefix + "://" + switchAddress + "/rest/"
-    # No payload
-    payload = {}
-    files = {}
-
-    session_headers = {
-        'Authorization': sessionKey,
-        'Accept': 'application/yang-data+json',
-        'Content-Type': 'application/yang-data+json'
-    }
-
-    # Get the effective configuration
-    response = session.request("GET", url_base + "running/brocade-zone/defined-configuration",
-                               headers=session_headers, data=payload, files=files, verify=False)
-    if response.status_code != 200:
-        print("Error getting defined configuration in: {}".format(response.status_code))
-        print(response.text)
-        exit(3)
-    else:
-        json_response = json.loads(response.text)
-
-    return json_response["Response"]
-
-def deleteZoneObject(session, sessionKey, prefix, switchAddress, uri):
-    url_base = prefix + "://" + switchAddress + "/rest/"
-    # No payload
-    payload = {}
-    files = {}
-
-    session_headers = {
-        'Authorization': sessionKey,
-        'Accept': 'application/yang-data+json',
-        'Content-Type': 'application/yang-data+json'
-    }
-
-    # Get the effective configuration
-    response = session.request("DELETE",
-                               url_base + "running/brocade-zone/defined-configuration/" + uri,
-                               headers=session_headers, data=payload, files=files, verify=False)
-    if response.status_code != 204 and response.status_code != 400:
-        errorDict = json.loads(response.text)
-        print("Error deleting object: {}".format(errorDict['errors']['error'][0]['error-message']))
-
-    return response.status_code
 
 def main(sysArgv):
     fabricIP = config('FABRICIP')
@@ -174,7 +37,18 @@ def main(sysArgv):
     parser = argparse.ArgumentParser()
     parser.add_argument("-f", "--delfile", default=False, help="File containing objects to be deleted",
                         required=True)
-    args = parser.parse_args()
+    parser.add_argument("-r", "--rate", type=float, default=None,
+                        help="Starting request rate in requests per second (0 disables pacing)")
+    parser.add_argument("-b", "--batch", type=int, default=0,
+                        help="Delete up to this many objects of a type per request (0 deletes one at a time)")
+    parser.add_argument("-j", "--jobs", type=int, default=1,
+                        help="Requests to have in flight at once, one after another by default "
+                             "(the session pool holds 10 connections)")
+    parser.add_argument("--profile", action="store_true",
+                        help="Profile each phase and write the stats to a .prof file")
+    args = parser.parse_args(sysArgv[1:])
+
+    profiler = PhaseProfiler(args.profile, sysArgv[0])
 
     delFile = args.delfile
 
@@ -188,69 +62,57 @@ def main(sysArgv):
     print(f"{delObjects}")
 
     # Log into the fabric
-    session, sessionKey = restLogin(fabricUser, fabricPassword, fabricIP, fabricPrefix)
+    profiler.begin("fetch")
+    client = restLogin(fabricUser, fabricPassword, fabricIP, fabricPrefix, args.rate)
 
     # Get the effective configuration
-    effConf = getEffectiveConfiguration(session, sessionKey, fabricPrefix, fabricIP)
-    definedConfiguration = getDefinedConfiguration(session, sessionKey, fabricPrefix, fabricIP)
+    effConf = getEffectiveConfiguration(client)
+    definedConfiguration = getDefinedConfiguration(client)
 
-    aliasesArray = definedConfiguration['defined-configuration']['alias']
-    zoneArray = definedConfiguration['defined-configuration']['zone']
-    cfgArray = definedConfiguration['defined-configuration']['cfg']
-
-    aliasDict = {}
-    for i in aliasesArray:
-        aliasDict[i['alias-name']] = {}
-        aliasDict[i['alias-name']]['member-entry'] = i['member-entry']
-
-    zoneDict = {}
-    for i in zoneArray:
-        zoneDict[i['zone-name']] = {}
-        zoneDict[i['zone-name']]['member-entry'] = i['member-entry']
-        zoneDict[i['zone-name']]['zone-type'] = i['zone-type']
-
-    cfgDict = {}
-    for i in cfgArray:
-        cfgDict[i['cfg-name']] = {}
-        cfgDict[i['cfg-name']]['member-zone'] = i['member-zone']
+    profiler.begin("index build")
+    zoneDB = ZoneDatabase(definedConfiguration)
 
     # Find the target and set up the URI and payload
-
+    targets = list()
     for target in delObjects:
-        if target in aliasDict.keys():
-            zoneObject = 'alias'
-            uri = f'alias/alias-name/{target}'
-            payload = aliasDict[target]
-        elif target in zoneDict.keys():
-            zoneObject = 'zone'
-            uri = f'zone/zone-name/{target}'
-            payload = zoneDict[target]
-        elif target in cfgDict.keys():
-            zoneObject = 'cfg'
-            uri = f'cfg/cfg-name/{target}'
-            payload = cfgDict[target]
-        else:
+        zoneObject = zoneDB.objectType(target)
+        if zoneObject is None:
             print(f'Object {target} not found in defined configuration.')
             continue
+        targets.append((zoneObject, target))
+
+    # Kept cfgs and zones let go of the targets before the targets are deleted
+    plan = planDeletes(zoneDB, targets, effConf)
+    if not plan.ok():
+        for error in plan.errors:
+            print(f'Error: {error}.')
+        print(f'Nothing has been deleted.')
+        restLogout(client, endSession=True)
+        exit(3)
 
-        # if the object exists, delete it
-        result = deleteZoneObject(session, sessionKey, fabricPrefix, fabricIP, uri)
-        print(f'{zoneObject} {target} has been deleted from the defined configuration.')
-    if overrideConfirm:
-        checksum = effConf["effective-configuration"]["checksum"]
-        saveConfiguration(session, sessionKey, fabricPrefix, fabricIP, checksum)
-        print(f'Configuration saved.')
-    else:
+    profiler.begin("delete")
+    printDeleteResults(plan, executeDeletes(client, plan, args.jobs, args.batch))
+    profiler.begin("save")
+    save = overrideConfirm
+    if not overrideConfirm:
         commitConf = input(f'Save changes? Y or y to accept, anything else to reject: ')
-        if len(commitConf) == 1 and commitConf in "Yy":
-            checksum = effConf["effective-configuration"]["checksum"]
-            saveConfiguration(session, sessionKey, fabricPrefix, fabricIP, checksum)
-            print(f'Configuration saved.')
-        else:
+        save = len(commitConf) == 1 and commitConf in "Yy"
+        if not save:
             print(f'Changes discarded.')
+
+    saved = False
+    if save:
+        checksum = effConf["effective-configuration"]["checksum"]
+        if saveConfiguration(client, checksum) >= 300:
+            print(f'The configuration was not saved; changes discarded.')
+            restLogout(client, endSession=True)
+            exit(3)
+        print(f'Configuration saved.')
+        saved = True
+    if not overrideConfirm:
         print('Done!')
-    # logout of the fabric
-    restLogout(session, sessionKey, fabricIP, fabricPrefix)
+    # logout of the fabric; an unsaved transaction goes with the session
+    restLogout(client, endSession=not saved)
 
 # Press the green button in the gutter to run the script.
 if __name__ == '__main__':
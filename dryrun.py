@@ -17,134 +17,14 @@
 # DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, 
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
 
-import requests
-import base64
-import json
 import sys
+import json
 import getopt
-import readchar
-from sortedcontainers import SortedSet, SortedList
-import re
-import time
-
-
-
-def restLogin(username, password, switchAddress, prefix):
-    credentials = base64.b64encode(bytearray(username + ":" + password, 'utf-8')).decode()
-
-    # Suppress warnings for self-signed certificates
-    requests.packages.urllib3.disable_warnings()
-
-    # Set the base for all REST calls
-    url_base = prefix + "://" + switchAddress + "/rest/"
-    session = requests.session()
-
-    # No payload
-    payload = {}
-    files = {}
-
-    # Send the login and print the return status code
-    headers = {
-      'Authorization': 'Basic ' + credentials
-    }
-    response = session.request("POST", url_base + "login", headers=headers, data=payload, files=files,verify=False)
-    if response.status_code != 200:
-        print("Error logging in: {}".format(response.status_code))
-        exit()
-
-    with open("sessKey.txt", "w") as fp:
-        fp.write(response.headers["Authorization"])
-
-
-    return session, response.headers["Authorization"]
-
-def restLogout(session, sessionKey, switchAddress, prefix):
-    url_base = prefix + "://" + switchAddress + "/rest/"
-    # No payload
-    payload = {}
-    files = {}
-
-    
-    session_headers = {
-      'Authorization': sessionKey,
-      'Accept': 'application/yang-data+json',
-      'Content-Type': 'application/yang-data+json'
-    }
-
-    # Send the logout and print the return status code
-    response = session.request("POST", url_base + "logout", headers=session_headers, data=payload,verify=False)
-    if response.status_code != 204:
-        print("Error logging out: {}".format(response.status_code))
-
-def getDefinedConfiguration(session, sessionKey, prefix, switchAddress):
-
-    url_base = prefix + "://" + switchAddress + "/rest/"
-    # No payload
-    payload = {}
-    files = {}
-
-    
-    session_headers = {
-      'Authorization': sessionKey,
-      'Accept': 'application/yang-data+json',
-      'Content-Type': 'application/yang-data+json'
-    }
-
-    # Get the effective configuration
-    response = session.request("GET", url_base + "running/brocade-zone/defined-configuration",
-                                headers=session_headers, data=payload, files=files,verify=False)
-    if response.status_code != 200:
-        print("Error getting defined configuration in: {}".format(response.status_code))
-        print(response.text)
-    else:
-        json_response = json.loads(response.text)
-
-    return json_response["Response"]
-
-def getEffectiveConfiguration(session, sessionKey, prefix, switchAddress):
-
-    url_base = prefix + "://" + switchAddress + "/rest/"
-    # No payload
-    payload = {}
-    files = {}
-
-    
-    session_headers = {
-      'Authorization': sessionKey,
-      'Accept': 'application/yang-data+json',
-      'Content-Type': 'application/yang-data+json'
-    }
+from zoneDatabase import ZoneDatabase, getConfigurationFromFile
+from deleteSimulator import planFromLists, simulateDeletes
+from snapshotDiff import printDiff
+from phaseProfiler import PhaseProfiler
 
-    # Get the effective configuration
-    response = session.request("GET", url_base + "running/brocade-zone/effective-configuration",
-                                headers=session_headers, data=payload, files=files,verify=False)
-    if response.status_code != 200:
-        print("Error getting effective configuration in: {}".format(response.status_code))
-        print(response.text)
-    else:
-        json_response = json.loads(response.text)
-
-    return json_response["Response"]
-
-def buildAliasToWwn(config):
-
-    aliasTable = {}
-
-    aliases = config['defined-configuration']['alias']
-
-    for i in aliases:
-        aliasTable[i['alias-name']] = i['member-entry']['alias-entry-name']
-
-    return aliasTable
-
-def flipAliastoWWN(aliasTable):
-    wwnTable = {}
-    for i in aliasTable.keys():
-        for j in aliasTable[i]:
-            if j not in wwnTable.keys():
-                wwnTable[j] = list()
-            wwnTable[j].append(i)
-    return wwnTable
 
 def getSetFromFile(filename):
     with open(filename, "r") as fp:
@@ -158,51 +38,41 @@ def getSetFromFile(filename):
 
     return fileSet
 
-def deleteAlias(session, sessionKey, prefix, switchAddress, alias):
-
-    url_base = prefix + "://" + switchAddress + "/rest/"
-    # No payload
-    payload = {}
-    files = {}
-
-    
-    session_headers = {
-      'Authorization': sessionKey,
-      'Accept': 'application/yang-data+json',
-      'Content-Type': 'application/yang-data+json'
-    }
+def simulate(defCfgFile, effCfgFile, zonesToDelete, wwnsToDelete, resultFile, verbose, profiler):
+    profiler.begin("load")
+    defined = getConfigurationFromFile(defCfgFile)
+    effective = getConfigurationFromFile(effCfgFile) if effCfgFile is not None else None
 
-    # Get the effective configuration
-    response = session.request("DELETE", url_base + "running/brocade-zone/defined-configuration/alias/alias-name/" + alias,
-                                headers=session_headers, data=payload, files=files,verify=False)
-    if response.status_code != 204:
-        errorDict = json.loads(response.text)
-        print("Error deleting zone: {}".format(errorDict['errors']['error'][0]['error-message']))
+    profiler.begin("index build")
+    zoneDB = ZoneDatabase(defined)
+    targets = planFromLists(zoneDB, wwnsToDelete, zonesToDelete)
+    if verbose:
+        for objectType, name in targets:
+            print("Simulating delete of {} {}...".format(objectType, name))
 
-    return response.status_code
+    profiler.begin("simulation")
+    simulation = simulateDeletes(defined, targets, effective, zoneDB)
 
-def deleteZone(session, sessionKey, prefix, switchAddress, zone):
+    profiler.begin("report")
+    printDiff(simulation.diff)
 
-    url_base = prefix + "://" + switchAddress + "/rest/"
-    # No payload
-    payload = {}
-    files = {}
+    if len(simulation.warnings) > 0:
+        print("\nWARNING:")
+        for i in simulation.warnings:
+            print("\t{}".format(i))
 
-    
-    session_headers = {
-      'Authorization': sessionKey,
-      'Accept': 'application/yang-data+json',
-      'Content-Type': 'application/yang-data+json'
-    }
+    if len(simulation.errors) > 0:
+        print("\nERROR:")
+        for i in simulation.errors:
+            print("\t{}".format(i))
 
-    # Get the effective configuration
-    response = session.request("DELETE", url_base + "running/brocade-zone/defined-configuration/zone/zone-name/" + zone,
-                                headers=session_headers, data=payload, files=files,verify=False)
-    if response.status_code != 204:
-        errorDict = json.loads(response.text)
-        print("Error deleting zone: {}".format(errorDict['errors']['error'][0]['error-message']))
+    if resultFile is not None:
+        with open(resultFile, "w") as fp:
+            json.dump(simulation.resultConfiguration(), fp)
+        if verbose:
+            print("\nResulting defined configuration written to {}...".format(resultFile))
 
-    return response.status_code
+    return simulation.ok()
 
 def main(argv):
     switchAddress = None
@@ -210,19 +80,29 @@ def main(argv):
     password = None
     zoneDelFile = None
     wwnDelFile = None
+    defCfgFile = None
+    effCfgFile = None
+    resultFile = None
+    live = False
     prefix = "https"
     verbose = False
+    rate = None
+    profile = False
+    usage = ("usage: {0} -d <definedDB> [-e <effectiveDB>] -z <zonesFile> -w <wwnsFile> [-o <resultOutfile>] [--profile]\n"
+             "       {0} --live -u <username> -p <password> -i <ipaddress> -z <zonesFile> -w <wwnsFile> "
+             "[-r <requestsPerSecond>] [--insecure] [--profile]").format(argv[0])
 
     # Retrieve and parse command line arguments.
     try:
-        opts, args = getopt.getopt(argv[1:],"u:p:i:w:z:v",
-            ["username=", "password=", "address=", "zonesFile", "wwnsFile", "insecure"])
+        opts, args = getopt.getopt(argv[1:],"u:p:i:w:z:r:d:e:o:hv",
+            ["username=", "password=", "address=", "zonesFile", "wwnsFile", "insecure", "rate=",
+             "definedDB=", "effectiveDB=", "outfile=", "live", "profile"])
     except getopt.GetoptError:
-        print("Ausage: {} -u <username> -p <password> -i <ipaddress> -z <zonesFile> -w <wwnsFile> [--insecure]".format(sys.argv[0]))
+        print(usage)
         sys.exit(2)
     for opt, arg in opts:
         if opt == '-h':
-            print("Busage: {} -u <username> -p <password> -i <ipaddress> -z <zonesFile> -w <wwnsFile> [--insecure]".format(sys.argv[0]))
+            print(usage)
             sys.exit()
         elif opt in ("-u", "--username"):
             username = arg
@@ -234,52 +114,87 @@ def main(argv):
             zoneDelFile = arg
         elif opt in ("-w", "--wwnsFile"):
             wwnDelFile = arg
+        elif opt in ("-d", "--definedDB"):
+            defCfgFile = arg
+        elif opt in ("-e", "--effectiveDB"):
+            effCfgFile = arg
+        elif opt in ("-o", "--outfile"):
+            resultFile = arg
+        elif opt in ("--live"):
+            live = True
         elif opt in ("--insecure"):
             prefix = "http"
+        elif opt in ("-r", "--rate"):
+            rate = float(arg)
         elif opt in ("-v"):
             verbose = True
+        elif opt in ("--profile"):
+            profile = True
 
-    # Verify all required arguments are present
-    if (username is None or password is None or switchAddress is None or zoneDelFile is None or wwnDelFile is None):
-        print("Cusage: {} -u <username> -p <password> -i <ipaddress> -z <zonesFile> -w <wwnsFile> [--insecure]".format(sys.argv[0]))
+    if zoneDelFile is None or wwnDelFile is None:
+        print(usage)
         sys.exit(2)
 
+    profiler = PhaseProfiler(profile, argv[0])
+
     zonesToDelete = getSetFromFile(zoneDelFile)
     wwnsToDelete = getSetFromFile(wwnDelFile)
 
+    # Without --live the plan is only applied to a saved defined configuration
+    if not live:
+        if defCfgFile is None:
+            print(usage)
+            sys.exit(2)
+        if not simulate(defCfgFile, effCfgFile, zonesToDelete, wwnsToDelete, resultFile, verbose, profiler):
+            sys.exit(2)
+        if verbose:
+            print("Dry run complete")
+        return
+
+    # Verify all required arguments are present
+    if (username is None or password is None or switchAddress is None):
+        print(usage)
+        sys.exit(2)
+
+    # restClient, and with it requests, is only imported for --live so that simulations start quickly
+    from restClient import restLogin, restLogout, getDefinedConfiguration, getEffectiveConfiguration
+    from deleteExecutor import planDeletes, executeDeletes, printDeleteResults
+
     # Initiate the session
-    session, sessionKey = restLogin(username, password, switchAddress, prefix)
+    profiler.begin("fetch")
+    client = restLogin(username, password, switchAddress, prefix, rate)
     if verbose:
     	print("Logged in...")
 
-    defined = getDefinedConfiguration(session, sessionKey, prefix, switchAddress)
+    defined = getDefinedConfiguration(client)
     if verbose:
     	print("DefinedDB retrieved...")
-    effective = getEffectiveConfiguration(session, sessionKey, prefix, switchAddress)
+    effective = getEffectiveConfiguration(client)
     if verbose:
     	print("EffectiveDB retrieved...")
 
-    aliasTable = buildAliasToWwn(defined)
-    wwnLookupTable = flipAliastoWWN(aliasTable)
+    profiler.begin("index build")
+    zoneDB = ZoneDatabase(defined)
+    plan = planDeletes(zoneDB, planFromLists(zoneDB, wwnsToDelete, zonesToDelete), effective)
+    if not plan.ok():
+        for error in plan.errors:
+            print("Error: {}".format(error))
+        restLogout(client, endSession=True)
+        sys.exit(2)
 
-    for wwn in wwnsToDelete:
-        if verbose:
-            print("Deleting alias {}...".format(wwnLookupTable[wwn][0]))
-        deleteAlias(session, sessionKey, prefix, switchAddress, wwnLookupTable[wwn][0])
-        time.sleep(1.1)
-    for zone in zonesToDelete:
-        if verbose:
-            print("Deleting zone  {}...".format(zone))
-        deleteZone(session, sessionKey, prefix, switchAddress, zone)
-        time.sleep(1.1)
+    # Kept cfgs and zones let go of the targets before the targets are deleted
+    profiler.begin("delete")
+    results = executeDeletes(client, plan)
+    if verbose:
+        printDeleteResults(plan, results)
 
-    # Free up the API session
+    # Nothing is saved; ending the session abandons the deletes
     if verbose:
         print("Logging out...")
-    restLogout(session, sessionKey, switchAddress, prefix)
+    restLogout(client, endSession=True)
     if verbose:
         print("Dry run complete")
 
 
 if __name__ == "__main__":
-	main(sys.argv)
\ No newline at end of file
+	main(sys.argv)
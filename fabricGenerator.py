@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+# Version 23.2.1.1
+# Copyright 2023 Chip Copper
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this
+# software and associated documentation files (the "Software"), to deal in the Software
+# without restriction, including without limitation the rights to use, copy, modify, merge,
+# publish, distribute, sublicense, and/or sell copies of the Software, and to permit persons
+# to whom the Software is furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all copies or
+# substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING
+# BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM,
+# DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+# Builds synthetic defined and effective configurations of any size in the form
+# getConfigs.py saves them, together with delete lists that pass checks.py.  Most
+# aliases and zones are in use by the active cfg; a retired share of them is only
+# zoned by zones that are left out of it, and those make up the delete lists.  The
+# retired zones sit in cfg_retired along with one active zone, so deleting them never
+# leaves a cfg empty and the lists are also accepted by deleteZoneObject.py and
+# pipeline.py.  A share of the zones are peer zones with a principal member.
+#
+# usage: fabricGenerator.py -a <aliases> -z <zones> -o <outputDir> [-p <peerFraction>]
+#            [-r <retiredFraction>] [-s <seed>]
+#
+# writes defined.json, effective.json, wwns.txt, zones.txt and objects.txt to outputDir
+
+import os
+import sys
+import json
+import getopt
+import random
+import hashlib
+from wwn import formatWwn
+
+WWN_BASE = 0x1000000000000000
+ZONE_MEMBERS = 2
+PEER_MEMBERS = 8
+
+
+def generateFabric(aliasCount, zoneCount, peerFraction=0.1, retiredFraction=0.05, seed=0):
+    rng = random.Random(seed)
+    retiredAliases = int(aliasCount * retiredFraction)
+    retiredZones = int(zoneCount * retiredFraction) if retiredAliases >= ZONE_MEMBERS else 0
+    activeAliases = aliasCount - retiredAliases
+
+    aliases = list()
+    for i in range(aliasCount):
+        aliases.append({
+            "alias-name": "alias_{:06d}".format(i),
+            "member-entry": {"alias-entry-name": [formatWwn(WWN_BASE + i)]}
+        })
+
+    zones = list()
+    for i in range(zoneCount):
+        # Active zones only use active aliases and retired zones only retired ones
+        if i < zoneCount - retiredZones:
+            low, high = 0, activeAliases
+        else:
+            low, high = activeAliases, aliasCount
+        peer = rng.random() < peerFraction
+        count = min(PEER_MEMBERS if peer else ZONE_MEMBERS, high - low)
+        members = ["alias_{:06d}".format(j) for j in rng.sample(range(low, high), count)]
+
+        zone = {"zone-name": "zone_{:06d}".format(i), "zone-type": 1 if peer else 0, "member-entry": {}}
+        if peer:
+            zone["member-entry"]["principal-entry-name"] = members[:1]
+            members = members[1:]
+        if len(members) > 0:
+            zone["member-entry"]["entry-name"] = members
+        zones.append(zone)
+
+    activeZones = zones[:zoneCount - retiredZones]
+    cfgs = [
+        {"cfg-name": "cfg_active", "member-zone": {"zone-name": [i["zone-name"] for i in activeZones]}}
+    ]
+    if retiredZones > 0:
+        keptZones = [i["zone-name"] for i in activeZones[:1]]
+        cfgs.append({"cfg-name": "cfg_retired",
+                     "member-zone": {"zone-name": keptZones + [i["zone-name"] for i in zones[len(activeZones):]]}})
+
+    defined = {"defined-configuration": {"cfg": cfgs, "zone": zones, "alias": aliases}}
+
+    # The effective configuration lists the enabled zones with their aliases resolved
+    aliasWwns = {i["alias-name"]: i["member-entry"]["alias-entry-name"] for i in aliases}
+    enabledZones = list()
+    for zone in activeZones:
+        memberEntry = {key: [wwn for alias in members for wwn in aliasWwns[alias]]
+                       for key, members in zone["member-entry"].items()}
+        enabledZones.append({"zone-name": zone["zone-name"], "zone-type": zone["zone-type"],
+                             "member-entry": memberEntry})
+    checksum = hashlib.md5(json.dumps(defined, sort_keys=True).encode()).hexdigest()
+    effective = {"effective-configuration": {"cfg-name": "cfg_active", "checksum": checksum,
+                                             "enabled-zone": enabledZones}}
+
+    deleteWwns = [formatWwn(WWN_BASE + i) for i in range(activeAliases, aliasCount)]
+    deleteZones = [i["zone-name"] for i in zones[len(activeZones):]]
+
+    return defined, effective, deleteWwns, deleteZones
+
+
+def writeFabric(outputDir, defined, effective, deleteWwns, deleteZones):
+    os.makedirs(outputDir, exist_ok=True)
+    files = {
+        "defined": os.path.join(outputDir, "defined.json"),
+        "effective": os.path.join(outputDir, "effective.json"),
+        "wwns": os.path.join(outputDir, "wwns.txt"),
+        "zones": os.path.join(outputDir, "zones.txt"),
+        "objects": os.path.join(outputDir, "objects.txt")
+    }
+
+    with open(files["defined"], "w") as fp:
+        json.dump(defined, fp)
+    with open(files["effective"], "w") as fp:
+        json.dump(effective, fp)
+    with open(files["wwns"], "w") as fp:
+        fp.writelines(i + "\n" for i in deleteWwns)
+    with open(files["zones"], "w") as fp:
+        fp.writelines(i + "\n" for i in deleteZones)
+
+    # deleteZoneObject.py list: the retired aliases and zones by name
+    retiredAliases = [i["alias-name"] for i in defined["defined-configuration"]["alias"][-len(deleteWwns):]] \
+        if len(deleteWwns) > 0 else []
+    with open(files["objects"], "w") as fp:
+        fp.writelines(i + "\n" for i in deleteZones + retiredAliases)
+
+    return files
+
+
+def main(argv):
+    aliasCount = None
+    zoneCount = None
+    outputDir = None
+    peerFraction = 0.1
+    retiredFraction = 0.05
+    seed = 0
+    usage = ("usage: {} -a <aliases> -z <zones> -o <outputDir> [-p <peerFraction>] [-r <retiredFraction>] "
+             "[-s <seed>]").format(argv[0])
+
+    # Retrieve and parse command line arguments.
+    try:
+        opts, args = getopt.getopt(argv[1:], "a:z:o:p:r:s:h",
+            ["aliases=", "zones=", "outdir=", "peer=", "retired=", "seed="])
+    except getopt.GetoptError:
+        print(usage)
+        sys.exit(2)
+    for opt, arg in opts:
+        if opt == '-h':
+            print(usage)
+            sys.exit()
+        elif opt in ("-a", "--aliases"):
+            aliasCount = int(arg)
+        elif opt in ("-z", "--zones"):
+            zoneCount = int(arg)
+        elif opt in ("-o", "--outdir"):
+            outputDir = arg
+        elif opt in ("-p", "--peer"):
+            peerFraction = float(arg)
+        elif opt in ("-r", "--retired"):
+            retiredFraction = float(arg)
+        elif opt in ("-s", "--seed"):
+            seed = int(arg)
+
+    if (aliasCount is None or zoneCount is None or outputDir is None):
+        print(usage)
+        sys.exit(2)
+
+    writeFabric(outputDir, *generateFabric(aliasCount, zoneCount, peerFraction, retiredFraction, seed))
+
+
+if __name__ == "__main__":
+    main(sys.argv)
@@ -17,32 +17,173 @@
 # DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, 
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
 
-import requests
-import base64
+import os
+import csv
 import json
 import sys
 import getopt
+import time
+import shutil
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from decouple import config
+from restClient import DEFINED_URI, EFFECTIVE_URI, restLogin, restLogout, streamConfiguration
+from snapshotCache import snapshotKey, cachedChecksum, cachedDefinedFile, storeSnapshot
+from zoneDatabase import ZoneDatabase
+from binarySnapshot import writeBinarySnapshot
+from phaseProfiler import PhaseProfiler
 
+# Seconds a fleet fabric that has run out of time still gets to log out
+LOGOUT_GRACE = 5.0
 
 
-def main():
-    switchAddress = None
-    username = None
-    password = None
-    outfileName = None
-    prefix = "https"
+def fetchAndSave(uri, client, outfileFD):
+    # Stream one configuration to its outfile as it arrives
+    start = time.perf_counter()
+    size = streamConfiguration(client, uri, outfileFD)
+    outfileFD.close()
+
+    return time.perf_counter() - start, size
+
+
+def fetchIncremental(client, cacheDir, fabricKey, defOutfileFD, effOutfileFD):
+    # The small effective configuration carries the zone DB checksum; the large defined
+    # configuration is only downloaded when that differs from the cached snapshot
+    size = streamConfiguration(client, EFFECTIVE_URI, effOutfileFD)
+    effOutfileFD.close()
+    with open(effOutfileFD.name, "r") as fp:
+        checksum = json.load(fp)["effective-configuration"]["checksum"]
+
+    changed = cachedChecksum(cacheDir, fabricKey) != checksum
+    if changed:
+        size += streamConfiguration(client, DEFINED_URI, defOutfileFD)
+        defOutfileFD.close()
+        storeSnapshot(cacheDir, fabricKey, defOutfileFD.name, checksum)
+    else:
+        with open(cachedDefinedFile(cacheDir, fabricKey), "rb") as fp:
+            shutil.copyfileobj(fp, defOutfileFD)
+        size += defOutfileFD.tell()
+        defOutfileFD.close()
+
+    return changed, size
+
+
+def readInventory(filename):
+    # CSV with a header row of name,address,username,password and an optional prefix column
+    with open(filename, "r", newline="") as fp:
+        fabrics = [row for row in csv.DictReader(fp) if row.get("address")]
+
+    return fabrics
+
+
+def collectFabric(fabric, outputDir, timeout, cacheDir=None):
+    name = fabric.get("name") or fabric["address"]
+    prefix = fabric.get("prefix") or "https"
+    result = {"name": name, "status": "ok", "seconds": 0.0, "bytes": 0, "changed": True}
+    start = time.perf_counter()
+
+    # The whole fabric, login to logout, has to be done by the deadline; every request
+    # and every chunk of a download is checked against it
+    deadline = start + timeout
+
+    # Any failure, including the exit() calls in the REST helpers, only fails this fabric
+    try:
+        client = restLogin(fabric["username"], fabric["password"], fabric["address"], prefix,
+                           timeout=timeout, deadline=deadline)
+        try:
+            if cacheDir is not None:
+                with open(os.path.join(outputDir, "{}_defined.json".format(name)), "wb") as defOutfileFD, \
+                        open(os.path.join(outputDir, "{}_effective.json".format(name)), "wb") as effOutfileFD:
+                    result["changed"], result["bytes"] = fetchIncremental(
+                        client, cacheDir, snapshotKey(fabric["address"], name), defOutfileFD, effOutfileFD)
+                return result
+
+            for uri, suffix in ((DEFINED_URI, "defined"), (EFFECTIVE_URI, "effective")):
+                with open(os.path.join(outputDir, "{}_{}.json".format(name, suffix)), "wb") as outfileFD:
+                    fetchTime, size = fetchAndSave(uri, client, outfileFD)
+                result["bytes"] += size
+        finally:
+            # The logout is still sent after the deadline, but only waits a moment for it
+            client.deadline = None
+            client.timeout = min(timeout, max(deadline - time.perf_counter(), LOGOUT_GRACE))
+            restLogout(client)
+    except (Exception, SystemExit) as e:
+        # A read cut short by the deadline surfaces as a socket timeout
+        if isinstance(e, TimeoutError) or time.perf_counter() >= deadline:
+            result["status"] = "failed: timed out after {}s".format(timeout)
+        else:
+            result["status"] = "failed: {}".format(e)
+    finally:
+        result["seconds"] = time.perf_counter() - start
+
+    return result
+
+
+def collectFleet(inventoryFile, outputDir, workers, timeout, verbose, cacheDir=None):
+    fabrics = readInventory(inventoryFile)
+    os.makedirs(outputDir, exist_ok=True)
+
+    start = time.perf_counter()
+    results = list()
+
+    # Entries sharing a name would write over each other's output files
+    names = set()
+    for fabric in list(fabrics):
+        name = fabric.get("name") or fabric["address"]
+        if name in names:
+            fabrics.remove(fabric)
+            results.append({"name": name, "status": "failed: duplicate fabric name", "seconds": 0.0,
+                            "bytes": 0, "changed": True})
+        names.add(name)
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(collectFabric, fabric, outputDir, timeout, cacheDir) for fabric in fabrics]
+        for future in as_completed(futures):
+            result = future.result()
+            results.append(result)
+            if verbose:
+                print("{} {} in {:.2f}s...".format(result["name"], result["status"], result["seconds"]))
+
+    # Summary of the whole run
+    print("\n{:<24} {:>10} {:>14}  {}".format("Fabric", "Seconds", "Bytes", "Status"))
+    for result in sorted(results, key=lambda r: r["name"]):
+        status = result["status"] if result["changed"] else result["status"] + ", unchanged"
+        print("{:<24} {:>10.2f} {:>14}  {}".format(result["name"], result["seconds"], result["bytes"], status))
+    failed = [r for r in results if r["status"] != "ok"]
+    print("\n{} of {} fabrics collected, {} bytes in {:.2f}s.".format(
+        len(results) - len(failed), len(results), sum(r["bytes"] for r in results),
+        time.perf_counter() - start))
+
+    return len(failed) == 0
+
+
+def main(argv):
+    # Credentials default to the same FABRIC settings deleteZoneObject.py and putBack.py read
+    switchAddress = config('FABRICIP', default=None)
+    username = config('FABRICUSER', default=None)
+    password = config('FABRICPASSWORD', default=None)
+    definedOutfileName = None
+    effectiveOutfileName = None
+    binaryOutfileName = None
+    prefix = config('FABRICPREFIX', default="https")
     verbose = False
+    inventoryFile = None
+    outputDir = "."
+    workers = 8
+    timeout = 300.0
+    cacheDir = None
+    profile = False
 
     # Retrieve and parse command line arguments.
     try:
-        opts, args = getopt.getopt(sys.argv[1:],"u:p:i:e:d:hv",
-            ["username=", "password=", "address=", "insecure", "outfile"])
+        opts, args = getopt.getopt(argv[1:],"u:p:i:e:d:b:f:o:w:t:c:hv",
+            ["username=", "password=", "address=", "insecure", "outfile", "inventory=", "outdir=",
+             "workers=", "timeout=", "cache=", "binary=", "profile"])
     except getopt.GetoptError:
-        print("usage: {} -u <username> -p <password> -i <ipaddress> -d <definedOutfile> -e <effectiveOutfile> [--insecure]".format(sys.argv[0]))
+        print("usage: {} -u <username> -p <password> -i <ipaddress> -d <definedOutfile> -e <effectiveOutfile> [-b <binaryOutfile>] [-c <cacheDir>] [--insecure] [--profile]\n       {} -f <inventoryFile> [-o <outputDir>] [-w <workers>] [-t <timeoutSeconds>] [-c <cacheDir>] [--profile]".format(argv[0], argv[0]))
         sys.exit(2)
     for opt, arg in opts:
         if opt == '-h':
-            print("usage: {} -u <username> -p <password> -i <ipaddress> -d <definedOutfile> -e <effectiveOutfile> [--insecure]".format(sys.argv[0]))
+            print("usage: {} -u <username> -p <password> -i <ipaddress> -d <definedOutfile> -e <effectiveOutfile> [-b <binaryOutfile>] [-c <cacheDir>] [--insecure] [--profile]\n       {} -f <inventoryFile> [-o <outputDir>] [-w <workers>] [-t <timeoutSeconds>] [-c <cacheDir>] [--profile]".format(argv[0], argv[0]))
             sys.exit()
         elif opt in ("-u", "--username"):
             username = arg
@@ -54,107 +195,106 @@ def main():
             effectiveOutfileName = arg
         elif opt in ("-d"):
             definedOutfileName = arg
+        elif opt in ("-b", "--binary"):
+            binaryOutfileName = arg
         elif opt in ("--insecure"):
             prefix = "http"
+        elif opt in ("-f", "--inventory"):
+            inventoryFile = arg
+        elif opt in ("-o", "--outdir"):
+            outputDir = arg
+        elif opt in ("-w", "--workers"):
+            workers = int(arg)
+        elif opt in ("-t", "--timeout"):
+            timeout = float(arg)
+        elif opt in ("-c", "--cache"):
+            cacheDir = arg
         elif opt in ("-v"):
             verbose = True
+        elif opt in ("--profile"):
+            profile = True
+
+    profiler = PhaseProfiler(profile, argv[0])
+
+    # Fleet mode collects every fabric in the inventory in parallel
+    if inventoryFile is not None:
+        profiler.begin("fleet fetch")
+        if not collectFleet(inventoryFile, outputDir, workers, timeout, verbose, cacheDir):
+            sys.exit(3)
+        return
 
     # Verify all required arguments are present
     if (username is None or password is None or switchAddress is None or effectiveOutfileName is None or definedOutfileName is None):
-        print("usage: {} -u <username> -p <password> -i <ipaddress> -d <definedOutfile> -e <effectiveOutfile> [--insecure]".format(sys.argv[0]))
+        print("usage: {} -u <username> -p <password> -i <ipaddress> -d <definedOutfile> -e <effectiveOutfile> [-b <binaryOutfile>] [-c <cacheDir>] [--insecure] [--profile]\n       {} -f <inventoryFile> [-o <outputDir>] [-w <workers>] [-t <timeoutSeconds>] [-c <cacheDir>] [--profile]".format(argv[0], argv[0]))
         sys.exit(2)
 
 
     # Open capture files
     try:
-        defOutfileFD = open(definedOutfileName, "w")
+        defOutfileFD = open(definedOutfileName, "wb")
     except:
         print("Could not open outfile {}".format(definedOutfileName))
         sys.exit(3)
 
 
     try:
-        effOutfileFD = open(effectiveOutfileName, "w")
+        effOutfileFD = open(effectiveOutfileName, "wb")
     except:
         print("Could not open outfile {}".format(effectiveOutfileName))
         sys.exit(3)
 
 
-    # Base64 encode the username and password
-    credentials = base64.b64encode(bytearray(username + ":" + password, 'utf-8')).decode()
-
-    # Suppress warnings for self-signed certificates
-    requests.packages.urllib3.disable_warnings()
-
-    # Set the base for all REST calls
-    url_base = prefix + "://" + switchAddress + "/rest/"
-    session = requests.session()
-
-    # No payload
-    payload = {}
-    files = {}
-
-    # Send the login and print the return status code
-    headers = {
-      'Authorization': 'Basic ' + credentials
-    }
-    response = session.request("POST", url_base + "login", headers=headers, data=payload, files=files,verify=False)
-    if response.status_code != 200:
-        print("Error logging in: {}".format(response.status_code))
-        exit()
-
+    # Log in to the fabric
+    profiler.begin("login")
+    start = time.perf_counter()
+    client = restLogin(username, password, switchAddress, prefix)
     if verbose:
-        print("Logged in to fabric...")
-
-    session_headers = {
-      'Authorization': response.headers["Authorization"],
-      'Accept': 'application/yang-data+json',
-      'Content-Type': 'application/yang-data+json'
-    }
-
-    # Get the defined configuration
-    response = session.request("GET", url_base + "running/brocade-zone/defined-configuration",
-                                headers=session_headers, data=payload, files=files,verify=False)
-    if response.status_code != 200:
-        print("Error getting defined configuration: {}".format(response.status_code))
-        print(response.text)
+        print("Logged in to fabric in {:.2f}s...".format(time.perf_counter() - start))
+
+    # With a snapshot cache only pull the defined configuration when the checksum has moved
+    profiler.begin("fetch")
+    if cacheDir is not None:
+        fetchStart = time.perf_counter()
+        changed, size = fetchIncremental(client, cacheDir, snapshotKey(switchAddress), defOutfileFD, effOutfileFD)
+        if verbose:
+            print("Configurations retrieved in {:.2f}s, defined configuration {}...".format(
+                time.perf_counter() - fetchStart, "changed" if changed else "unchanged, taken from cache"))
+
+    # Get the defined and effective configurations at the same time over the one session
     else:
-        json_response = json.loads(response.text)
-        # print(json.dumps(json_response["Response"]))
-
-    json.dump(json_response["Response"], defOutfileFD)
+        retrievals = {
+            "Defined": (DEFINED_URI, defOutfileFD),
+            "Effective": (EFFECTIVE_URI, effOutfileFD)
+        }
+        with ThreadPoolExecutor(max_workers=len(retrievals)) as executor:
+            futures = {executor.submit(fetchAndSave, uri, client, outfileFD): name
+                       for name, (uri, outfileFD) in retrievals.items()}
+            for future in as_completed(futures):
+                fetchTime, size = future.result()
+                if verbose:
+                    print("{} configuration retrieved and saved in {:.2f}s, {} bytes...".format(
+                        futures[future], fetchTime, size))
+
+    # Log out of the fabric
+    profiler.begin("logout")
+    logoutStart = time.perf_counter()
+    restLogout(client)
     if verbose:
-        print("Defined configuration retrieved and saved...")
-
-    # Get the effective configuration
-    response = session.request("GET", url_base + "running/brocade-zone/effective-configuration",
-                                headers=session_headers, data=payload, files=files,verify=False)
-    if response.status_code != 200:
-        print("Error getting effective configuration: {}".format(response.status_code))
-        print(response.text)
-    else:
-        json_response = json.loads(response.text)
-        # print(json.dumps(json_response["Response"]))
+        print("Logged out of fabric in {:.2f}s...".format(time.perf_counter() - logoutStart))
 
-    json.dump(json_response["Response"], effOutfileFD)
-    if verbose:
-        print("Effective configuration retrieved and saved...")
 
-    effOutfileFD.close()
-    defOutfileFD.close()
-
-
-    # Send the logout and print the return status code
-    response = session.request("POST", url_base + "logout", headers=session_headers, data=payload,verify=False)
-    if response.status_code != 204:
-        print("Error logging out: {}".format(response.status_code))
-    if verbose:
-        print("Logged out of fabric...")
+    # Binary snapshot of the defined configuration for the lookup tools
+    if binaryOutfileName is not None:
+        profiler.begin("binary snapshot")
+        binaryStart = time.perf_counter()
+        writeBinarySnapshot(ZoneDatabase.fromFile(definedOutfileName), binaryOutfileName)
+        if verbose:
+            print("Binary snapshot written in {:.2f}s...".format(time.perf_counter() - binaryStart))
 
 
     if verbose:
-        print("Retrievals complete.")
+        print("Retrievals complete in {:.2f}s.".format(time.perf_counter() - start))
 
 if __name__ == "__main__":
-    main()
+    main(sys.argv)
 
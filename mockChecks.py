@@ -0,0 +1,270 @@
+#!/usr/bin/env python3
+# Version 23.2.1.1
+# Copyright 2023 Chip Copper
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this
+# software and associated documentation files (the "Software"), to deal in the Software
+# without restriction, including without limitation the rights to use, copy, modify, merge,
+# publish, distribute, sublicense, and/or sell copies of the Software, and to permit persons
+# to whom the Software is furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all copies or
+# substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING
+# BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM,
+# DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+# Scripted runs of the reconcile.py and deleteZoneObject.py plans against mockFos.py in
+# strict mode.  Each check starts a mock server in this process on a small fabric, runs
+# a plan over the REST API the way the tool does, then reads the fabric back through a
+# new session and compares it with what the plan should have left.  Strict mode refuses
+# a delete while a kept object still lists the target, so a check that passes also
+# shows the plan ran its steps in dependency order.
+#
+#   retyped zone      a zone in two kept cfgs changes zone type
+#   new cfg           a new cfg lists a new zone and a retyped one
+#   injected failure  every request fails once the plan is made; nothing is saved
+#   delete order      a zone in a kept cfg and an alias in kept zones are deleted, and
+#                     deleting an enabled zone is refused
+#
+# usage: mockChecks.py [-v]
+
+import sys
+import copy
+import getopt
+import threading
+from restClient import restLogin, restLogout, getDefinedConfiguration, getEffectiveConfiguration, \
+    saveConfiguration
+from zoneDatabase import ZoneDatabase
+from snapshotDiff import diffConfigurations
+from reconcile import planReconcile, applyPlan
+from deleteExecutor import planDeletes, executeDeletes
+from mockFos import ZoneStore, ServerSettings, MockFosServer
+
+
+def alias(name, wwn):
+    return {'alias-name': name, 'member-entry': {'alias-entry-name': [wwn]}}
+
+
+def zone(name, members, zoneType=0):
+    return {'zone-name': name, 'zone-type': zoneType, 'member-entry': {'entry-name': members}}
+
+
+def cfg(name, zones):
+    return {'cfg-name': name, 'member-zone': {'zone-name': zones}}
+
+
+def baseFabric():
+    defined = {'defined-configuration': {
+        'alias': [alias('a{}'.format(i), '10:00:00:00:00:00:00:0{}'.format(i)) for i in range(1, 6)],
+        'zone': [zone('z1', ['a1', 'a2']), zone('z2', ['a2', 'a3']), zone('z3', ['a3', 'a4']),
+                 zone('z4', ['a4', 'a1'])],
+        'cfg': [cfg('cfg_prod', ['z1', 'z2']), cfg('cfg_test', ['z2', 'z3', 'z4'])]
+    }}
+    effective = {'effective-configuration': {
+        'cfg-name': 'cfg_prod',
+        'checksum': '0' * 32,
+        'enabled-zone': [{'zone-name': 'z1', 'member-entry': {'entry-name': ['10:00:00:00:00:00:00:01',
+                                                                              '10:00:00:00:00:00:00:02']}},
+                         {'zone-name': 'z2', 'member-entry': {'entry-name': ['10:00:00:00:00:00:00:02',
+                                                                              '10:00:00:00:00:00:00:03']}}]
+    }}
+    return defined, effective
+
+
+def entries(config, objectType):
+    return config['defined-configuration'][objectType]
+
+
+def findEntry(config, objectType, name):
+    nameKey = objectType + '-name'
+    return next(i for i in entries(config, objectType) if i[nameKey] == name)
+
+
+class MockFabric:
+    # A strict mock server on a free port, served from a thread of this process
+
+    def __init__(self, defined, effective, verbose=False):
+        store = ZoneStore(copy.deepcopy(defined), copy.deepcopy(effective), strict=True)
+        self.server = MockFosServer(("127.0.0.1", 0), store, ServerSettings(verbose=verbose))
+        self.address = "127.0.0.1:{}".format(self.server.server_port)
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+
+    def login(self):
+        # No pacing, so an injected error comes straight back rather than being retried
+        return restLogin("user", "password", self.address, "http", rate=0)
+
+    def defined(self):
+        client = self.login()
+        defined = getDefinedConfiguration(client)
+        restLogout(client, endSession=True)
+        return defined
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def compareFabric(fabric, expected):
+    diff = diffConfigurations(fabric.defined(), expected)
+    return ["{} {} {}".format(change, objectType, name)
+            for change, keys in (("unexpected", diff.removed), ("missing", diff.added), ("differs", diff.modified))
+            for objectType, name in keys]
+
+
+def reconcileFabric(fabric, snapshot, failRequests=False):
+    # What reconcile.py does after the prompt; returns the failures and whether it saved
+    client = fabric.login()
+    effConf = getEffectiveConfiguration(client)
+    plan = planReconcile(getDefinedConfiguration(client), snapshot)
+    if not plan.ok():
+        restLogout(client, endSession=True)
+        return plan.errors, False
+
+    if failRequests:
+        fabric.server.settings.errorFraction = 1.0
+    results = applyPlan(client, plan, 50)
+    fabric.server.settings.errorFraction = 0.0
+    failed = ["{} {}: {}".format(zoneObject, name, status) for zoneObject, name, status in results if status >= 300]
+    if len(failed) > 0:
+        restLogout(client, endSession=True)
+        return failed, False
+
+    saved = saveConfiguration(client, effConf["effective-configuration"]["checksum"]) < 300
+    restLogout(client, endSession=not saved)
+    return [], saved
+
+
+def checkRetypedZone(verbose):
+    defined, effective = baseFabric()
+    snapshot = copy.deepcopy(defined)
+    findEntry(snapshot, 'zone', 'z2')['zone-type'] = 1
+
+    fabric = MockFabric(defined, effective, verbose)
+    try:
+        failed, saved = reconcileFabric(fabric, snapshot)
+        if len(failed) > 0 or not saved:
+            return failed + ["not saved"]
+        return compareFabric(fabric, snapshot)
+    finally:
+        fabric.close()
+
+
+def checkNewCfg(verbose):
+    defined, effective = baseFabric()
+    snapshot = copy.deepcopy(defined)
+    findEntry(snapshot, 'zone', 'z3')['zone-type'] = 1
+    entries(snapshot, 'alias').append(alias('a6', '10:00:00:00:00:00:00:06'))
+    entries(snapshot, 'zone').append(zone('z5', ['a5', 'a6']))
+    entries(snapshot, 'cfg').append(cfg('cfg_new', ['z5', 'z3']))
+
+    fabric = MockFabric(defined, effective, verbose)
+    try:
+        failed, saved = reconcileFabric(fabric, snapshot)
+        if len(failed) > 0 or not saved:
+            return failed + ["not saved"]
+        return compareFabric(fabric, snapshot)
+    finally:
+        fabric.close()
+
+
+def checkInjectedFailure(verbose):
+    defined, effective = baseFabric()
+    snapshot = copy.deepcopy(defined)
+    findEntry(snapshot, 'zone', 'z2')['zone-type'] = 1
+
+    fabric = MockFabric(defined, effective, verbose)
+    try:
+        failed, saved = reconcileFabric(fabric, snapshot, failRequests=True)
+        problems = []
+        if len(failed) == 0:
+            problems.append("no change failed")
+        if saved:
+            problems.append("saved after a failure")
+        # The failed run's changes went with its session
+        return problems + compareFabric(fabric, defined)
+    finally:
+        fabric.close()
+
+
+def checkDeleteOrder(verbose):
+    defined, effective = baseFabric()
+    expected = copy.deepcopy(defined)
+    entries(expected, 'zone').remove(findEntry(expected, 'zone', 'z3'))
+    entries(expected, 'alias').remove(findEntry(expected, 'alias', 'a4'))
+    findEntry(expected, 'zone', 'z4')['member-entry']['entry-name'] = ['a1']
+    findEntry(expected, 'cfg', 'cfg_test')['member-zone']['zone-name'] = ['z2', 'z4']
+
+    problems = []
+    zoneDB = ZoneDatabase(defined)
+    if planDeletes(zoneDB, [('zone', 'z1')], effective).ok():
+        problems.append("deleting enabled zone z1 was planned")
+
+    fabric = MockFabric(defined, effective, verbose)
+    try:
+        client = fabric.login()
+        effConf = getEffectiveConfiguration(client)
+        plan = planDeletes(zoneDB, [('zone', 'z3'), ('alias', 'a4')], effConf)
+        if not plan.ok():
+            restLogout(client, endSession=True)
+            return problems + plan.errors
+
+        results = executeDeletes(client, plan, workers=2)
+        failed = ["{} {} {}: {}".format(*result) for result in results if result[3] not in (204, 404)]
+        if len(failed) > 0:
+            restLogout(client, endSession=True)
+            return problems + failed
+
+        saved = saveConfiguration(client, effConf["effective-configuration"]["checksum"]) < 300
+        restLogout(client, endSession=not saved)
+        if not saved:
+            return problems + ["not saved"]
+        return problems + compareFabric(fabric, expected)
+    finally:
+        fabric.close()
+
+
+CHECKS = (
+    ("retyped zone", checkRetypedZone),
+    ("new cfg", checkNewCfg),
+    ("injected failure", checkInjectedFailure),
+    ("delete order", checkDeleteOrder)
+)
+
+
+def main(argv):
+    verbose = False
+    usage = "usage: {} [-v]".format(argv[0])
+
+    # Retrieve and parse command line arguments.
+    try:
+        opts, args = getopt.getopt(argv[1:], "hv")
+    except getopt.GetoptError:
+        print(usage)
+        sys.exit(2)
+    for opt, arg in opts:
+        if opt == '-h':
+            print(usage)
+            sys.exit()
+        elif opt == '-v':
+            verbose = True
+
+    failures = 0
+    for name, check in CHECKS:
+        problems = check(verbose)
+        print("{:<20} {}".format(name, "FAIL" if len(problems) > 0 else "PASS"))
+        for problem in problems:
+            print("\t{}".format(problem))
+        failures += len(problems) > 0
+
+    if failures > 0:
+        print("\n{} of {} checks failed.".format(failures, len(CHECKS)))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main(sys.argv)
@@ -0,0 +1,486 @@
+#!/usr/bin/env python3
+# Version 23.2.1.1
+# Copyright 2023 Chip Copper
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this
+# software and associated documentation files (the "Software"), to deal in the Software
+# without restriction, including without limitation the rights to use, copy, modify, merge,
+# publish, distribute, sublicense, and/or sell copies of the Software, and to permit persons
+# to whom the Software is furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all copies or
+# substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING
+# BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM,
+# DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+# Local stand-in for the FOS REST API the tools use, so they can be run and load tested
+# without a switch.  It serves /rest/login and /rest/logout and the brocade-zone
+# defined and effective configurations, including cfg-action saves, over an in-memory
+# zone DB loaded from saved configurations or built by fabricGenerator.py.
+#
+#   POST   defined-configuration/<type>[/<type>-name/<name>]   create objects
+#   PATCH  defined-configuration/<type>[/<type>-name/<name>]   add members
+#   DELETE defined-configuration/<type>[/<type>-name/<name>]   delete objects, or only the
+#                                                              members given in the body
+#   GET    defined-configuration/<type>/<type>-name/<name>     one object, 404 if not defined
+#   GET    effective-configuration/checksum                   the checksum leaf alone
+#   PATCH  effective-configuration/cfg-action/1               save, checked against the checksum
+#
+# As on a switch, changes are a transaction held by the session that made them: that
+# session sees them, a cfg-action save applies them to the zone DB every session sees,
+# and logging out without a save drops them.
+#
+# Latency, a request rate limit (429 with Retry-After), a cap on open sessions and
+# randomly injected 503 errors can be set to see how the tools behave under load.  With
+# -c, deleting an object that a kept object still lists, or taking the last members out
+# of an object, is refused, to check that the tools delete in dependency order.
+# Plain HTTP only, so point the tools at it with the http prefix.
+#
+# usage: mockFos.py (-d <definedFile> -e <effectiveFile> | -a <aliases> -z <zones>)
+#            [-p <port>] [-l <latencySeconds>] [-j <jitterSeconds>] [-r <requestsPerSecond>]
+#            [-s <maxSessions>] [-f <errorFraction>] [-u <username>] [-w <password>] [-c] [-v]
+
+import sys
+import copy
+import json
+import time
+import base64
+import getopt
+import random
+import hashlib
+import secrets
+import threading
+from urllib.parse import unquote
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from restClient import NAME_KEYS, DEFINED_URI, EFFECTIVE_URI, CFG_ACTION_URI, CHECKSUM_URI, SESSION_CHECK_URI
+from zoneDatabase import MEMBER_KEYS, getConfigurationFromFile
+
+
+class RequestError(Exception):
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+class ZoneStore:
+
+    def __init__(self, defined, effective, strict=False):
+        self.lock = threading.Lock()
+        self.strict = strict
+        self.objects = {objectType: {entry[nameKey]: entry
+                                     for entry in defined['defined-configuration'].get(objectType, [])}
+                        for objectType, nameKey in NAME_KEYS.items()}
+        self.effective = effective
+        self.definedBody = None
+        # Unsaved changes by session token, {type: {name: entry or None when deleted}}
+        self.pending = {}
+
+    def checksum(self):
+        return self.effective['effective-configuration']['checksum']
+
+    def view(self, token, objectType):
+        # The saved objects with the session's own changes on top
+        changes = self.pending.get(token, {}).get(objectType)
+        if not changes:
+            return self.objects[objectType]
+        merged = dict(self.objects[objectType])
+        for name, entry in changes.items():
+            if entry is None:
+                merged.pop(name, None)
+            else:
+                merged[name] = entry
+        return merged
+
+    def lookup(self, token, objectType, name):
+        changes = self.pending.get(token, {}).get(objectType, {})
+        if name in changes:
+            return changes[name]
+        return self.objects[objectType].get(name)
+
+    def definedConfiguration(self, token):
+        # The serialised saved body is kept until the next save
+        with self.lock:
+            if token in self.pending:
+                defined = {objectType: list(self.view(token, objectType).values()) for objectType in self.objects}
+                return json.dumps({"Response": {"defined-configuration": defined}}).encode()
+            if self.definedBody is None:
+                defined = {objectType: list(entries.values()) for objectType, entries in self.objects.items()}
+                self.definedBody = json.dumps({"Response": {"defined-configuration": defined}}).encode()
+            return self.definedBody
+
+    def effectiveConfiguration(self):
+        with self.lock:
+            return json.dumps({"Response": self.effective}).encode()
+
+    def entry(self, token, objectType, name):
+        entry = self.lookup(token, objectType, name)
+        if entry is None:
+            raise RequestError(400, "{} {} does not exist".format(objectType, name))
+        return entry
+
+    def editable(self, token, objectType, name):
+        # The session's own copy of an object, so saved objects are never changed in place
+        changes = self.pending.setdefault(token, {}).setdefault(objectType, {})
+        if name not in changes:
+            changes[name] = copy.deepcopy(self.objects[objectType][name])
+        return changes[name]
+
+    def create(self, token, objectType, entries):
+        with self.lock:
+            for entry in entries:
+                if self.lookup(token, objectType, entry[NAME_KEYS[objectType]]) is not None:
+                    raise RequestError(400, "{} {} already exists".format(objectType, entry[NAME_KEYS[objectType]]))
+            changes = self.pending.setdefault(token, {}).setdefault(objectType, {})
+            for entry in entries:
+                changes[entry[NAME_KEYS[objectType]]] = entry
+
+    def addMembers(self, token, objectType, entries):
+        container, keys = MEMBER_KEYS[objectType]
+        with self.lock:
+            for change in entries:
+                self.entry(token, objectType, change[NAME_KEYS[objectType]])
+            for change in entries:
+                members = self.editable(token, objectType, change[NAME_KEYS[objectType]]).setdefault(container, {})
+                for key in keys:
+                    for member in change.get(container, {}).get(key, []):
+                        if member not in members.setdefault(key, []):
+                            members[key].append(member)
+
+    def holders(self, token, objectType, name, ignore):
+        # Objects other than those in ignore that list name as a member
+        holderType = {'alias': 'zone', 'zone': 'cfg'}.get(objectType)
+        if holderType is None:
+            return []
+        container, keys = MEMBER_KEYS[holderType]
+        return [holderName for holderName, entry in self.view(token, holderType).items()
+                if holderName not in ignore and any(name in entry.get(container, {}).get(key, []) for key in keys)]
+
+    def checkDelete(self, token, objectType, targets):
+        container, keys = MEMBER_KEYS[objectType]
+        deleted = {entry[NAME_KEYS[objectType]] for entry, change in targets if container not in change}
+        for entry, change in targets:
+            name = entry[NAME_KEYS[objectType]]
+            if container not in change:
+                holders = self.holders(token, objectType, name, deleted)
+                if len(holders) > 0:
+                    raise RequestError(400, "{} {} is still a member of {}".format(objectType, name, holders[0]))
+            elif all(len([i for i in entry.get(container, {}).get(key, [])
+                          if i not in change[container].get(key, [])]) == 0 for key in keys):
+                raise RequestError(400, "{} {} would be left with no members".format(objectType, name))
+
+    def delete(self, token, objectType, entries):
+        # Entries with members only lose those members; bare names delete the object
+        container, keys = MEMBER_KEYS[objectType]
+        with self.lock:
+            targets = [(self.entry(token, objectType, i[NAME_KEYS[objectType]]), i) for i in entries]
+            if self.strict:
+                self.checkDelete(token, objectType, targets)
+            changes = self.pending.setdefault(token, {}).setdefault(objectType, {})
+            for entry, change in targets:
+                name = entry[NAME_KEYS[objectType]]
+                if container not in change:
+                    changes[name] = None
+                    continue
+                members = self.editable(token, objectType, name).get(container, {})
+                for key in keys:
+                    removed = set(change[container].get(key, []))
+                    if key in members:
+                        members[key] = [i for i in members[key] if i not in removed]
+
+    def save(self, token, checksum):
+        # Apply the session's changes to the zone DB every session sees
+        with self.lock:
+            if checksum != self.checksum():
+                raise RequestError(400, "Zone DB checksum mismatch, the configuration has been changed")
+            for objectType, changes in self.pending.pop(token, {}).items():
+                for name, entry in changes.items():
+                    if entry is None:
+                        self.objects[objectType].pop(name, None)
+                    else:
+                        self.objects[objectType][name] = entry
+            self.definedBody = None
+            self.effective['effective-configuration']['checksum'] = hashlib.md5(
+                json.dumps(self.objects, sort_keys=True).encode()).hexdigest()
+
+    def discard(self, token):
+        with self.lock:
+            self.pending.pop(token, None)
+
+
+class ServerSettings:
+
+    def __init__(self, username=None, password=None, latency=0.0, jitter=0.0, rate=0.0, maxSessions=0,
+                 errorFraction=0.0, verbose=False):
+        self.username = username
+        self.password = password
+        self.latency = latency
+        self.jitter = jitter
+        self.rate = rate
+        self.maxSessions = maxSessions
+        self.errorFraction = errorFraction
+        self.verbose = verbose
+
+
+class MockFosServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, store, settings):
+        super().__init__(address, MockFosHandler)
+        self.store = store
+        self.settings = settings
+        self.lock = threading.Lock()
+        self.sessions = set()
+        self.tokens = settings.rate
+        self.lastRefill = time.monotonic()
+        self.counts = {}
+
+    def count(self, method, uri, status):
+        with self.lock:
+            key = (method, uri.split("/")[-1] if uri else "", status)
+            self.counts[key] = self.counts.get(key, 0) + 1
+
+    def takeToken(self):
+        # Token bucket holding up to one second of requests
+        if self.settings.rate <= 0:
+            return True
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.settings.rate, self.tokens + (now - self.lastRefill) * self.settings.rate)
+            self.lastRefill = now
+            if self.tokens < 1.0:
+                return False
+            self.tokens -= 1.0
+            return True
+
+
+class MockFosHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        if self.server.settings.verbose:
+            super().log_message(format, *args)
+
+    def send(self, status, body=b"", headers=None):
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        if len(body) > 0:
+            self.send_header("Content-Type", "application/yang-data+json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+        self.server.count(self.command, self.uri, status)
+
+    def sendError(self, status, message, headers=None):
+        body = {"errors": {"error": [{"error-type": "application", "error-message": message}]}}
+        self.send(status, json.dumps(body).encode(), headers)
+
+    def readBody(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        if length == 0:
+            return None
+        return json.loads(self.rfile.read(length))
+
+    def handle_request(self):
+        settings = self.server.settings
+        self.uri = unquote(self.path.split("?")[0])[len("/rest/"):]
+        try:
+            body = self.readBody()
+        except ValueError:
+            return self.sendError(400, "Malformed JSON body")
+
+        if settings.latency > 0 or settings.jitter > 0:
+            time.sleep(settings.latency + random.uniform(0, settings.jitter))
+
+        if not self.server.takeToken():
+            return self.sendError(429, "Too many requests", {"Retry-After": "1"})
+
+        if self.uri == "login" and self.command == "POST":
+            return self.login()
+
+        self.token = self.headers.get("Authorization")
+        if self.token not in self.server.sessions:
+            return self.sendError(401, "Not logged in or session expired")
+
+        if self.uri == "logout" and self.command == "POST":
+            # Unsaved changes end with the session
+            with self.server.lock:
+                self.server.sessions.discard(self.token)
+            self.server.store.discard(self.token)
+            return self.send(204)
+
+        if settings.errorFraction > 0 and random.random() < settings.errorFraction:
+            return self.sendError(503, "Injected error")
+
+        try:
+            self.dispatch(body)
+        except RequestError as e:
+            self.sendError(e.status, str(e))
+        except (KeyError, TypeError, AttributeError) as e:
+            self.sendError(400, "Malformed request: {}".format(e))
+
+    def login(self):
+        settings = self.server.settings
+        credentials = self.headers.get("Authorization", "")
+        if settings.username is not None:
+            expected = base64.b64encode("{}:{}".format(settings.username, settings.password).encode()).decode()
+            if credentials != "Basic " + expected:
+                return self.sendError(401, "Invalid credentials")
+
+        with self.server.lock:
+            if settings.maxSessions > 0 and len(self.server.sessions) >= settings.maxSessions:
+                full = True
+            else:
+                full = False
+                token = "Custom_Basic " + secrets.token_hex(16)
+                self.server.sessions.add(token)
+        if full:
+            return self.sendError(403, "Maximum number of REST sessions reached")
+
+        self.send(200, b"", {"Authorization": token})
+
+    def dispatch(self, body):
+        store = self.server.store
+        if self.uri == SESSION_CHECK_URI and self.command == "GET":
+            return self.send(200, json.dumps({"Response": {"fibrechannel-switch": {"name": "mock"}}}).encode())
+        if self.uri == DEFINED_URI and self.command == "GET":
+            return self.send(200, store.definedConfiguration(self.token))
+        if self.uri == EFFECTIVE_URI and self.command == "GET":
+            return self.send(200, store.effectiveConfiguration())
+        if self.uri == CHECKSUM_URI and self.command == "GET":
+            return self.send(200, json.dumps(
+                {"Response": {"effective-configuration": {"checksum": store.checksum()}}}).encode())
+        if self.uri == CFG_ACTION_URI and self.command == "PATCH":
+            store.save(self.token, body["checksum"])
+            return self.send(204)
+
+        if not self.uri.startswith(DEFINED_URI + "/"):
+            raise RequestError(404, "Unknown resource {}".format(self.uri))
+
+        # <type> with a list body or <type>/<type>-name/<name> with the object's payload
+        parts = self.uri[len(DEFINED_URI) + 1:].split("/", 2)
+        objectType = parts[0]
+        if objectType not in NAME_KEYS:
+            raise RequestError(404, "Unknown resource {}".format(self.uri))
+        if len(parts) == 3 and parts[1] == NAME_KEYS[objectType] and self.command == "GET":
+            with store.lock:
+                entry = store.lookup(self.token, objectType, parts[2])
+            if entry is None:
+                raise RequestError(404, "{} {} does not exist".format(objectType, parts[2]))
+            return self.send(200, json.dumps({"Response": {objectType: entry}}).encode())
+        if len(parts) == 3 and parts[1] == NAME_KEYS[objectType]:
+            entries = [dict(body or {}, **{NAME_KEYS[objectType]: parts[2]})]
+        elif len(parts) == 1 and body is not None:
+            entries = body[objectType]
+        else:
+            raise RequestError(400, "Unsupported request {} {}".format(self.command, self.uri))
+
+        if self.command == "POST":
+            store.create(self.token, objectType, entries)
+            return self.send(201)
+        if self.command == "PATCH":
+            store.addMembers(self.token, objectType, entries)
+            return self.send(204)
+        if self.command == "DELETE":
+            store.delete(self.token, objectType, entries)
+            return self.send(204)
+        raise RequestError(405, "Method {} not supported".format(self.command))
+
+    def do_GET(self):
+        self.handle_request()
+
+    def do_POST(self):
+        self.handle_request()
+
+    def do_PATCH(self):
+        self.handle_request()
+
+    def do_DELETE(self):
+        self.handle_request()
+
+
+def main(argv):
+    definedFile = None
+    effectiveFile = None
+    aliasCount = None
+    zoneCount = None
+    port = 8765
+    settings = ServerSettings()
+    strict = False
+    usage = ("usage: {} (-d <definedFile> -e <effectiveFile> | -a <aliases> -z <zones>) [-p <port>] "
+             "[-l <latencySeconds>] [-j <jitterSeconds>] [-r <requestsPerSecond>] [-s <maxSessions>] "
+             "[-f <errorFraction>] [-u <username>] [-w <password>] [-c] [-v]").format(argv[0])
+
+    # Retrieve and parse command line arguments.
+    try:
+        opts, args = getopt.getopt(argv[1:], "d:e:a:z:p:l:j:r:s:f:u:w:chv",
+            ["definedDB=", "effectiveDB=", "aliases=", "zones=", "port=", "latency=", "jitter=", "rate=",
+             "sessions=", "errors=", "username=", "password=", "strict"])
+    except getopt.GetoptError:
+        print(usage)
+        sys.exit(2)
+    for opt, arg in opts:
+        if opt == '-h':
+            print(usage)
+            sys.exit()
+        elif opt in ("-d", "--definedDB"):
+            definedFile = arg
+        elif opt in ("-e", "--effectiveDB"):
+            effectiveFile = arg
+        elif opt in ("-a", "--aliases"):
+            aliasCount = int(arg)
+        elif opt in ("-z", "--zones"):
+            zoneCount = int(arg)
+        elif opt in ("-p", "--port"):
+            port = int(arg)
+        elif opt in ("-l", "--latency"):
+            settings.latency = float(arg)
+        elif opt in ("-j", "--jitter"):
+            settings.jitter = float(arg)
+        elif opt in ("-r", "--rate"):
+            settings.rate = float(arg)
+        elif opt in ("-s", "--sessions"):
+            settings.maxSessions = int(arg)
+        elif opt in ("-f", "--errors"):
+            settings.errorFraction = float(arg)
+        elif opt in ("-u", "--username"):
+            settings.username = arg
+        elif opt in ("-w", "--password"):
+            settings.password = arg
+        elif opt in ("-c", "--strict"):
+            strict = True
+        elif opt in ("-v"):
+            settings.verbose = True
+
+    if definedFile is not None and effectiveFile is not None:
+        defined = getConfigurationFromFile(definedFile)
+        effective = getConfigurationFromFile(effectiveFile)
+    elif aliasCount is not None and zoneCount is not None:
+        from fabricGenerator import generateFabric
+        defined, effective, deleteWwns, deleteZones = generateFabric(aliasCount, zoneCount)
+    else:
+        print(usage)
+        sys.exit(2)
+
+    server = MockFosServer(("127.0.0.1", port), ZoneStore(defined, effective, strict), settings)
+    print("Mock FOS REST server listening on http://127.0.0.1:{}/rest/".format(port), flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+    # Requests served by method, last path element and status
+    print("\n{:<8} {:<28} {:>6} {:>10}".format("Method", "Resource", "Status", "Requests"))
+    for (method, resource, status), count in sorted(server.counts.items()):
+        print("{:<8} {:<28} {:>6} {:>10}".format(method, resource, status, count))
+
+
+if __name__ == "__main__":
+    main(sys.argv)
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+# Version 23.2.1.1
+# Copyright 2023 Chip Copper
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this
+# software and associated documentation files (the "Software"), to deal in the Software
+# without restriction, including without limitation the rights to use, copy, modify, merge,
+# publish, distribute, sublicense, and/or sell copies of the Software, and to permit persons
+# to whom the Software is furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all copies or
+# substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING
+# BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM,
+# DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+# --profile support for the tools.  A tool marks where each of its phases (load, index
+# build, validation, report and so on) starts with profiler.begin(name); each phase
+# runs until the next one begins or the tool exits.  When profiling is on, every phase
+# runs under cProfile and tracemalloc, and when the tool exits, however it exits, a
+# table of time and peak memory per phase goes to stderr and the cProfile stats of all
+# phases go to <tool>.prof, which "python -m pstats <tool>.prof" reads.  Only the main
+# thread is profiled.  When profiling is off, begin() does nothing and the profiling
+# modules are never imported.
+
+import os
+import sys
+import time
+import atexit
+
+
+class PhaseProfiler:
+
+    def __init__(self, enabled, tool=None):
+        self.enabled = enabled
+        self.phases = list()
+        self.profiles = list()
+        self.current = None
+        # "batchTools.py check" dumps to batchTools-check.prof
+        self.dumpFile = "-".join(os.path.splitext(os.path.basename(i))[0]
+                                 for i in (tool or sys.argv[0]).split()) + ".prof"
+        if enabled:
+            import tracemalloc
+            tracemalloc.start()
+            atexit.register(self.finish)
+
+    def begin(self, name):
+        if not self.enabled:
+            return
+
+        import cProfile
+        import tracemalloc
+
+        self.end()
+        tracemalloc.reset_peak()
+        self.current = (name, time.perf_counter(), cProfile.Profile())
+        self.current[2].enable()
+
+    def end(self):
+        if self.current is None:
+            return
+
+        import tracemalloc
+
+        name, start, profile = self.current
+        profile.disable()
+        seconds = time.perf_counter() - start
+        held, peak = tracemalloc.get_traced_memory()
+        self.phases.append((name, seconds, peak, held))
+        self.profiles.append(profile)
+        self.current = None
+
+    def finish(self):
+        if not self.enabled:
+            return
+        import pstats
+        import tracemalloc
+
+        self.end()
+        self.enabled = False
+        tracemalloc.stop()
+        if len(self.phases) == 0:
+            return
+
+        print("\n{:<24} {:>10} {:>14} {:>14}".format("Phase", "Seconds", "Peak bytes", "Held bytes"),
+              file=sys.stderr)
+        for name, seconds, peak, held in self.phases:
+            print("{:<24} {:>10.3f} {:>14} {:>14}".format(name, seconds, peak, held), file=sys.stderr)
+
+        stats = pstats.Stats(self.profiles[0])
+        for profile in self.profiles[1:]:
+            stats.add(profile)
+        stats.dump_stats(self.dumpFile)
+        print("Profile written to {}.".format(self.dumpFile), file=sys.stderr)
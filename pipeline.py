@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+# Version 23.2.1.1
+# Copyright 2023 Chip Copper
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this
+# software and associated documentation files (the "Software"), to deal in the Software
+# without restriction, including without limitation the rights to use, copy, modify, merge,
+# publish, distribute, sublicense, and/or sell copies of the Software, and to permit persons
+# to whom the Software is furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all copies or
+# substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING
+# BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM,
+# DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+# getConfigs.py, checks.py and deleteZoneObject.py in one session.  The defined and
+# effective configurations are fetched once, the checks.py validations are run on them
+# in memory, and the zones in the zone list and the aliases holding the WWNs in the WWN
+# list are deleted and saved with the checksum the validations were made against.
+#
+# The checksum is read again, on its own, before the deletes and before the save.  If
+# another session has saved in between, the validations no longer describe the fabric
+# and the run stops without saving.
+#
+# usage: pipeline.py -z <zonesFile> -w <wwnsFile> [-d <definedOutfile>] [-e <effectiveOutfile>]
+#            [-r <rate>] [-b <batch>] [-j <jobs>] [-n] [--profile]
+#
+# The fabric and credentials come from FABRICIP, FABRICUSER, FABRICPASSWORD and
+# FABRICPREFIX, and OVERRIDECONFIRM skips the confirmation, as for deleteZoneObject.py.
+
+import sys
+import json
+import argparse
+from decouple import config
+from restClient import restLogin, restLogout, getEffectiveConfiguration, getDefinedConfiguration, \
+    getConfigurationChecksum, saveConfiguration
+from zoneDatabase import ZoneDatabase
+from wwn import WwnSet
+from checks import getSetFromFile, DeleteChecks, printProblems, printOverlaps, printImpact
+from deleteExecutor import planDeletes, executeDeletes, printDeleteResults, stepDone
+from phaseProfiler import PhaseProfiler
+
+
+def checksumUnchanged(client, checksum):
+    current = getConfigurationChecksum(client)
+    if current != checksum:
+        print(f'The zone DB checksum has changed from {checksum} to {current} since it was validated.')
+        return False
+
+    return True
+
+
+def saveFetched(configuration, filename):
+    # Same content as the files getConfigs.py writes, for the record and for putBack.py
+    with open(filename, "w") as fp:
+        json.dump(configuration, fp)
+
+
+def main(sysArgv):
+    fabricIP = config('FABRICIP')
+    fabricUser = config('FABRICUSER')
+    fabricPassword = config('FABRICPASSWORD')
+    fabricPrefix = config('FABRICPREFIX')
+    overrideConfirm = config("OVERRIDECONFIRM", cast=bool, default=False)
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-z", "--zonesfile", required=True, help="File of zones to delete")
+    parser.add_argument("-w", "--wwnsfile", required=True, help="File of WWNs whose aliases are deleted")
+    parser.add_argument("-d", "--defined-outfile", default=None,
+                        help="Also save the fetched defined configuration here")
+    parser.add_argument("-e", "--effective-outfile", default=None,
+                        help="Also save the fetched effective configuration here")
+    parser.add_argument("-r", "--rate", type=float, default=None,
+                        help="Starting request rate in requests per second (0 disables pacing)")
+    parser.add_argument("-b", "--batch", type=int, default=50,
+                        help="Delete up to this many objects of a type per request (0 deletes one at a time)")
+    parser.add_argument("-j", "--jobs", type=int, default=4,
+                        help="Requests to have in flight at once (the session pool holds 10 connections)")
+    parser.add_argument("-n", "--dry-run", action="store_true",
+                        help="Only fetch and validate")
+    parser.add_argument("--profile", action="store_true",
+                        help="Profile each phase and write the stats to a .prof file")
+    args = parser.parse_args(sysArgv[1:])
+
+    profiler = PhaseProfiler(args.profile, sysArgv[0])
+
+    profiler.begin("load")
+    zonesToDelete = getSetFromFile(args.zonesfile)
+    wwnsToDelete, invalidWwns = WwnSet.fromFile(args.wwnsfile)
+
+    # Log into the fabric
+    profiler.begin("fetch")
+    client = restLogin(fabricUser, fabricPassword, fabricIP, fabricPrefix, args.rate)
+
+    # The checksum is taken before the defined configuration is read so that any save
+    # after it shows up as drift
+    effective = getEffectiveConfiguration(client)
+    defined = getDefinedConfiguration(client)
+    checksum = effective["effective-configuration"]["checksum"]
+    if args.defined_outfile:
+        saveFetched(defined, args.defined_outfile)
+    if args.effective_outfile:
+        saveFetched(effective, args.effective_outfile)
+
+    profiler.begin("index build")
+    zoneDB = ZoneDatabase(defined)
+
+    profiler.begin("validation")
+    checks = DeleteChecks(zoneDB, effective, zonesToDelete, wwnsToDelete, invalidWwns)
+
+    profiler.begin("report")
+    if not (printProblems(checks) and printOverlaps(checks)):
+        print("\nSTOP!  Nothing has been deleted.")
+        restLogout(client, endSession=True)
+        exit(2)
+
+    print("\nWWN to Alias Translation Table:")
+    for i in checks.wwnStrings:
+        print("\t{} -> {}".format(i, zoneDB.aliasesForWwn(i)))
+
+    print("\nZones to be deleted:")
+    for i in sorted(checks.zonesToDelete):
+        print("\t{}".format(i))
+
+    print("\nAliases to be deleted to remove WWNs in list:")
+    for i in checks.aliasesToDelete:
+        print("\t{}".format(i))
+
+    if not printImpact(checks.impact):
+        print("\nSTOP!  Nothing has been deleted.")
+        restLogout(client, endSession=True)
+        exit(2)
+
+    targets = [('zone', i) for i in sorted(checks.zonesToDelete)] + [('alias', i) for i in checks.aliasesToDelete]
+    plan = planDeletes(zoneDB, targets, effective)
+    if not plan.ok():
+        print("\nERROR: The delete plan cannot run:")
+        for error in plan.errors:
+            print("\t{}".format(error))
+        print("\nSTOP!  Nothing has been deleted.")
+        restLogout(client, endSession=True)
+        exit(2)
+
+    if len(targets) == 0 or args.dry_run:
+        print("\nNothing has been deleted.")
+        restLogout(client, endSession=True)
+        return
+
+    if not overrideConfirm:
+        commitConf = input(f'\nDelete and save? Y or y to accept, anything else to reject: ')
+        if not (len(commitConf) == 1 and commitConf in "Yy"):
+            print(f'Changes discarded.')
+            restLogout(client, endSession=True)
+            return
+
+    profiler.begin("delete")
+    if not checksumUnchanged(client, checksum):
+        print(f'Nothing has been deleted; fetch and validate again.')
+        restLogout(client, endSession=True)
+        exit(3)
+
+    results = executeDeletes(client, plan, args.jobs, args.batch)
+    printDeleteResults(plan, results)
+
+    # A partial delete is not saved; the checks only covered the whole set
+    profiler.begin("save")
+    failed = [i for i in results if not stepDone(i[3])]
+    if len(failed) > 0:
+        print(f'{len(failed)} of {len(results)} steps failed or were skipped, changes discarded.')
+        restLogout(client, endSession=True)
+        exit(3)
+
+    if not checksumUnchanged(client, checksum):
+        print(f'Changes discarded.')
+        restLogout(client, endSession=True)
+        exit(3)
+
+    if saveConfiguration(client, checksum) >= 300:
+        restLogout(client, endSession=True)
+        exit(3)
+    print(f'Configuration saved.')
+
+    # logout of the fabric
+    restLogout(client)
+
+
+if __name__ == '__main__':
+    main(sys.argv)
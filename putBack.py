@@ -18,187 +18,55 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
 
 import sys
-import json
-import base64
-import requests
 import argparse
 from decouple import config
+from restClient import NAME_KEYS, DELETE_ORDER, CREATE_ORDER, restLogin, restLogout, \
+    getEffectiveConfiguration, getDefinedConfiguration, deleteZoneObject, createZoneObject, batchDelete, \
+    batchCreate, saveConfiguration
+from zoneDatabase import ZoneDatabase, readDefinedFile, indexDefinedConfiguration
+from phaseProfiler import PhaseProfiler
 
 
-
-def restLogin(username, password, switchAddress, prefix):
-    credentials = base64.b64encode(bytearray(username + ":" + password, 'utf-8')).decode()
-
-    # Suppress warnings for self-signed certificates
-    requests.packages.urllib3.disable_warnings()
-
-    # Set the base for all REST calls
-    url_base = prefix + "://" + switchAddress + "/rest/"
-    session = requests.session()
-
-    # No payload
-    payload = {}
-    files = {}
-
-    # Send the login and print the return status code
-    headers = {
-        'Authorization': 'Basic ' + credentials
-    }
-    response = session.request("POST", url_base + "login", headers=headers, data=payload, files=files, verify=False)
-    if response.status_code != 200:
-        print("Error logging in: {}".format(response.status_code))
-        exit()
-
-    with open("sessKey.txt", "w") as fp:
-        fp.write(response.headers["Authorization"])
-
-    return session, response.headers["Authorization"]
-
-
-def restLogout(session, sessionKey, switchAddress, prefix):
-    url_base = prefix + "://" + switchAddress + "/rest/"
-    # No payload
-    payload = {}
-    files = {}
-
-    session_headers = {
-        'Authorization': sessionKey,
-        'Accept': 'application/yang-data+json',
-        'Content-Type': 'application/yang-data+json'
-    }
-
-    # Send the logout and print the return status code
-    response = session.request("POST", url_base + "logout", headers=session_headers, data=payload, verify=False)
-    if response.status_code != 204:
-        print("Error logging out: {}".format(response.status_code))
-
-
-def getConfigurationFromFile(filename):
+def getPatternsFromFile(filename):
     with open(filename, "r") as fp:
-        cfg = json.load(fp)
-
-    if "Response" in cfg.keys():
-        cfg = cfg["Response"]
-
-    return cfg
-
-
-def saveConfiguration(session, sessionKey, prefix, switchAddress, checksum):
-    payload = {
-        "checksum": checksum
-    }
-
-    print(f'payload: {payload}')
+        fileLines = fp.readlines()
 
-    url_base = prefix + "://" + switchAddress + "/rest/"
-    files = {}
-    session_headers = {
-        'Authorization': sessionKey,
-        'Accept': 'application/yang-data+json',
-        'Content-Type': 'application/yang-data+json'
-    }
+    patterns = list()
+    for i in fileLines:
+        entry = i.strip()
+        if len(entry) > 0:
+            patterns.append(entry)
 
-    # Update the zone
-    response = session.request("PATCH",
-                               url_base + "running/brocade-zone/effective-configuration/cfg-action/1",
-                               headers=session_headers, json=payload, files=files, verify=False)
-    if response.status_code >= 300:
-        errorDict = json.loads(response.text)
-        print("Error saving configuration: {}".format(errorDict['errors']['error'][0]['error-message']))
-
-    return response.status_code
-
-
-def getEffectiveConfiguration(session, sessionKey, prefix, switchAddress):
-    url_base = prefix + "://" + switchAddress + "/rest/"
-    # No payload
-    payload = {}
-    files = {}
-
-    session_headers = {
-        'Authorization': sessionKey,
-        'Accept': 'application/yang-data+json',
-        'Content-Type': 'application/yang-data+json'
-    }
-
-    # Get the effective configuration
-    response = session.request("GET", url_base + "running/brocade-zone/effective-configuration",
-                               headers=session_headers, data=payload, files=files, verify=False)
-    if response.status_code != 200:
-        print("Error getting effective configuration in: {}".format(response.status_code))
-        print(response.text)
-    else:
-        json_response = json.loads(response.text)
+    return patterns
 
-    return json_response["Response"]
 
+def findTargets(patterns, zoneDB):
+    targets = list()
+    notFound = list()
+    seen = set()
+    for pattern in patterns:
+        if any(c in pattern for c in "*?["):
+            names = zoneDB.matchNames(pattern)
+        elif zoneDB.objectType(pattern) is not None:
+            names = [pattern]
+        else:
+            names = []
 
-def deleteZoneObject(session, sessionKey, prefix, switchAddress, uri):
-    url_base = prefix + "://" + switchAddress + "/rest/"
-    # No payload
-    payload = {}
-    files = {}
+        found = False
+        for name in names:
+            found = True
+            if name not in seen:
+                seen.add(name)
+                targets.append((zoneDB.objectType(name), name, zoneDB.payload(name)))
+        if not found:
+            notFound.append(pattern)
 
-    session_headers = {
-        'Authorization': sessionKey,
-        'Accept': 'application/yang-data+json',
-        'Content-Type': 'application/yang-data+json'
-    }
+    return targets, notFound
 
-    # Get the effective configuration
-    response = session.request("DELETE",
-                               url_base + "running/brocade-zone/defined-configuration/" + uri,
-                               headers=session_headers, data=payload, files=files, verify=False)
-    if response.status_code != 204 and response.status_code != 400:
-        errorDict = json.loads(response.text)
-        print("Error deleting object: {}".format(errorDict['errors']['error'][0]['error-message']))
 
-    return response.status_code
-
-
-def createZoneObject(session, sessionKey, prefix, switchAddress, uri, payload):
-    url_base = prefix + "://" + switchAddress + "/rest/"
-    files = {}
-
-    session_headers = {
-        'Authorization': sessionKey,
-        'Accept': 'application/yang-data+json',
-        'Content-Type': 'application/yang-data+json'
-    }
-
-    # Get the effective configuration
-    response = session.request("POST",
-                               url_base + "running/brocade-zone/defined-configuration/" + uri,
-                               headers=session_headers, json=payload, files=files, verify=False)
-    if response.status_code != 201:
-        errorDict = json.loads(response.text)
-        print("Error creating object: {}".format(errorDict['errors']['error'][0]['error-message']))
-
-    return response.status_code
-
-
-def saveConfiguration(session, sessionKey, prefix, switchAddress, checksum):
-    payload = {
-        "checksum": checksum
-    }
-
-    url_base = prefix + "://" + switchAddress + "/rest/"
-    files = {}
-    session_headers = {
-        'Authorization': sessionKey,
-        'Accept': 'application/yang-data+json',
-        'Content-Type': 'application/yang-data+json'
-    }
-
-    # Update the zone
-    response = session.request("PATCH",
-                               url_base + "running/brocade-zone/effective-configuration/cfg-action/1",
-                               headers=session_headers, json=payload, files=files, verify=False)
-    if response.status_code >= 300:
-        errorDict = json.loads(response.text)
-        print("Error saving configuration: {}".format(errorDict['errors']['error'][0]['error-message']))
-
-    return response.status_code
+def findExisting(targets, liveDB):
+    # Only the targets still defined on the fabric need deleting before they are recreated
+    return [(zoneObject, name) for zoneObject, name, payload in targets if liveDB.objectType(name) == zoneObject]
 
 
 def main(sysArgv):
@@ -209,74 +77,79 @@ def main(sysArgv):
 
     parser = argparse.ArgumentParser()
 
-    parser.add_argument("-z", "--zoneobj", default=False, help="Zoning object to put back", \
-                        required=True)
+    parser.add_argument("-z", "--zoneobj", action="append", default=[],
+                        help="Zoning object to put back; may be a glob pattern and may be repeated")
+    parser.add_argument("-f", "--listfile", default=None,
+                        help="File of zoning objects or glob patterns to put back, one per line")
     parser.add_argument("-d", "--defconfig", default=False, help="Previously saved defined configuration", \
                         required=True)
-    args = parser.parse_args()
+    parser.add_argument("-b", "--batch", type=int, default=50,
+                        help="Restore up to this many objects of a type per request (0 restores one at a time)")
+    parser.add_argument("--profile", action="store_true",
+                        help="Profile each phase and write the stats to a .prof file")
+    args = parser.parse_args(sysArgv[1:])
+
+    patterns = list(args.zoneobj)
+    if args.listfile:
+        patterns.extend(getPatternsFromFile(args.listfile))
+    if len(patterns) == 0:
+        parser.error("at least one -z or -f is required")
 
-    target = args.zoneobj
     defConf = args.defconfig
 
-    definedConfiguration = getConfigurationFromFile(defConf)
-
-    aliasesArray = definedConfiguration['defined-configuration']['alias']
-    zoneArray = definedConfiguration['defined-configuration']['zone']
-    cfgArray = definedConfiguration['defined-configuration']['cfg']
-
-    aliasDict = {}
-    for i in aliasesArray:
-        aliasDict[i['alias-name']] = {}
-        aliasDict[i['alias-name']]['member-entry'] = i['member-entry']
-
-    zoneDict = {}
-    for i in zoneArray:
-        zoneDict[i['zone-name']] = {}
-        zoneDict[i['zone-name']]['member-entry'] = i['member-entry']
-        zoneDict[i['zone-name']]['zone-type'] = i['zone-type']
-
-    cfgDict = {}
-    for i in cfgArray:
-        cfgDict[i['cfg-name']] = {}
-        cfgDict[i['cfg-name']]['member-zone'] = i['member-zone']
-
-    # Find the target and set up the URI and payload
-    if target in aliasDict.keys():
-        # Restore alias
-        uri = f'alias/alias-name/{target}'
-        payload = aliasDict[target]
-    elif target in zoneDict.keys():
-        # Restore zone
-        uri = f'zone/zone-name/{target}'
-        payload = zoneDict[target]
-    elif target in cfgDict.keys():
-        # Restore cfg
-        uri = f'cfg/cfg-name/{target}'
-        payload = cfgDict[target]
-    else:
-        print(f'Object {target} not found in stored defined configuation.')
+    profiler = PhaseProfiler(args.profile, sysArgv[0])
+
+    # Find the targets and their payloads
+    profiler.begin("load")
+    defined = readDefinedFile(defConf)
+    profiler.begin("index build")
+    zoneDB = indexDefinedConfiguration(defined)
+    targets, notFound = findTargets(patterns, zoneDB)
+    if len(notFound) > 0:
+        for target in notFound:
+            print(f'Object {target} not found in stored defined configuation.')
         exit(3)
 
     # Log into the fabric
-    session, sessionKey = restLogin(fabricUser, fabricPassword, fabricIP, fabricPrefix)
-
-    # Get the effective configuration
-    effConf = getEffectiveConfiguration(session, sessionKey, fabricPrefix, fabricIP)
-
-    # if the object exists, delete it
-    result = deleteZoneObject(session, sessionKey, fabricPrefix, fabricIP, uri)
-
-    # Add the object
-    result = createZoneObject(session, sessionKey, fabricPrefix, fabricIP, uri, payload)
+    profiler.begin("fetch")
+    client = restLogin(fabricUser, fabricPassword, fabricIP, fabricPrefix)
+
+    # Get the effective configuration and see which targets are still defined
+    effConf = getEffectiveConfiguration(client)
+    existing = findExisting(targets, ZoneDatabase(getDefinedConfiguration(client)))
+
+    # if the objects exist, delete them, then add them back
+    profiler.begin("delete and create")
+    if args.batch > 0:
+        batchDelete(client, existing, args.batch)
+        results = batchCreate(client, targets, args.batch)
+    else:
+        for zoneObject in DELETE_ORDER:
+            for objType, name in existing:
+                if objType == zoneObject:
+                    deleteZoneObject(client, f'{zoneObject}/{NAME_KEYS[zoneObject]}/{name}')
+        results = list()
+        for zoneObject in CREATE_ORDER:
+            for objType, name, payload in targets:
+                if objType == zoneObject:
+                    status = createZoneObject(client, f'{zoneObject}/{NAME_KEYS[zoneObject]}/{name}', payload)
+                    results.append((zoneObject, name, status))
+
+    # Save the changes once for the whole set
+    profiler.begin("save")
+    if saveConfiguration(client, effConf["effective-configuration"]["checksum"]) >= 300:
+        print(f'The configuration was not saved; nothing has been added back.')
+        restLogout(client, endSession=True)
+        exit(3)
 
-    # Save the changes
+    for zoneObject, name, status in results:
+        if status == 201:
+            print(f'{zoneObject} {name} has been added back to the defined configuration.')
+        else:
+            print(f'{zoneObject} {name} could not be added back: {status}')
 
-    saveConfiguration(session, sessionKey, fabricPrefix, fabricIP, effConf["effective-configuration"]["checksum"])
-    print(f'{target} has been added back to the defined configuration.')
     # logout of the fabric
-    restLogout(session, sessionKey, fabricIP, fabricPrefix)
-
-    pass
+    restLogout(client)
 
 
 # Press the green button in the gutter to run the script.
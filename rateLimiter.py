@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+# Version 23.2.1.1
+# Copyright 2023 Chip Copper
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this
+# software and associated documentation files (the "Software"), to deal in the Software
+# without restriction, including without limitation the rights to use, copy, modify, merge,
+# publish, distribute, sublicense, and/or sell copies of the Software, and to permit persons
+# to whom the Software is furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all copies or
+# substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING
+# BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM,
+# DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+# Adaptive token bucket used by the REST client to pace requests to the switch.
+# The rate starts at a configured value, is halved whenever the switch answers 429 or
+# 503 (and held off for any Retry-After it sends), and creeps back up by a fixed step
+# while the switch keeps answering quickly.
+
+import time
+import threading
+from email.utils import parsedate_to_datetime
+
+THROTTLE_STATUS = (429, 503)
+
+
+def getRetryAfter(response):
+    value = response.headers.get("Retry-After")
+    if value is None:
+        return None
+
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class AdaptiveThrottle:
+
+    def __init__(self, rate=2.0, minRate=0.2, maxRate=20.0, increaseStep=0.5,
+                 fastResponse=0.5, burst=1.0):
+        self.rate = float(rate)
+        self.minRate = float(minRate)
+        self.maxRate = max(float(maxRate), self.rate)
+        self.increaseStep = float(increaseStep)
+        self.fastResponse = float(fastResponse)
+        self.burst = float(burst)
+        self.tokens = self.burst
+        self.lastRefill = time.monotonic()
+        self.holdUntil = 0.0
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.burst, self.tokens + (now - self.lastRefill) * self.rate)
+                self.lastRefill = now
+
+                if now >= self.holdUntil and self.tokens >= 1.0:
+                    self.tokens -= 1.0
+                    return
+
+                wait = max(self.holdUntil - now, (1.0 - self.tokens) / self.rate)
+            time.sleep(wait)
+
+    def backOff(self, retryAfter=None):
+        with self.lock:
+            self.rate = max(self.minRate, self.rate / 2)
+            self.tokens = 0.0
+            if retryAfter is not None:
+                self.holdUntil = max(self.holdUntil, time.monotonic() + retryAfter)
+
+    def speedUp(self):
+        with self.lock:
+            self.rate = min(self.maxRate, self.rate + self.increaseStep)
+
+    def update(self, response):
+        # Feed a response back into the throttle; returns True if the request should be retried
+        if response.status_code in THROTTLE_STATUS:
+            self.backOff(getRetryAfter(response))
+            return True
+
+        if response.elapsed.total_seconds() < self.fastResponse:
+            self.speedUp()
+
+        return False
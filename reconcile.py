@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+# Version 23.2.1.1
+# Copyright 2023 Chip Copper
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this
+# software and associated documentation files (the "Software"), to deal in the Software
+# without restriction, including without limitation the rights to use, copy, modify, merge,
+# publish, distribute, sublicense, and/or sell copies of the Software, and to permit persons
+# to whom the Software is furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all copies or
+# substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING
+# BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM,
+# DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+# Brings the defined configuration of a fabric back to a saved snapshot with as few
+# changes as possible.  The live configuration is diffed against the snapshot and only
+# the objects that differ are touched, in this order:
+#
+#   POST     objects missing from the fabric                 aliases, zones, cfgs
+#   PATCH    members missing from objects on both sides       aliases, zones, cfgs
+#   DELETE   members the snapshot does not have               cfgs, zones, aliases
+#   DELETE   zones whose zone type changed from the cfgs listing them
+#   DELETE   objects the snapshot does not have               cfgs, zones, aliases
+#   POST     zones whose zone type changed, created again
+#   PATCH    those zones back into the cfgs the snapshot lists them in
+#
+# A zone type can only be changed by deleting the zone and creating it again, and a
+# zone cannot be deleted while a cfg lists it, hence the detour through the cfgs.  A
+# cfg that would have no other zone left for the while is reported and nothing is done.
+#
+# Each step goes out in batched list requests over the one session.  The first step
+# with a failure ends the run, and the configuration is only saved when every change
+# went through.
+
+import sys
+import argparse
+from decouple import config
+from restClient import NAME_KEYS, restLogin, restLogout, getDefinedConfiguration, \
+    getEffectiveConfiguration, batchDelete, batchCreate, batchUpdate, saveConfiguration
+from zoneDatabase import MEMBER_KEYS, getConfigurationFromFile
+from snapshotDiff import configurationObjects, diffConfigurations
+from phaseProfiler import PhaseProfiler
+
+
+def createPayload(objectType, entry):
+    return {key: value for key, value in entry.items() if key != NAME_KEYS[objectType]}
+
+
+def memberPayload(objectType, members):
+    return {MEMBER_KEYS[objectType][0]: members}
+
+
+class ReconcilePlan:
+
+    def __init__(self, live, snapshot):
+        liveObjects = configurationObjects(live)
+        snapshotObjects = configurationObjects(snapshot)
+        diff = diffConfigurations(live, snapshot)
+
+        self.creates = []
+        self.addMembers = []
+        self.removeMembers = []
+        self.detaches = []
+        self.deletes = list(diff.removed)
+        self.recreates = []
+        self.reattaches = []
+        self.errors = []
+
+        retyped = {name for objectType, name in diff.modified if 'zone-type' in diff.details[(objectType, name)]}
+        for name in sorted(retyped):
+            self.deletes.append(('zone', name))
+            self.recreates.append(('zone', name, createPayload('zone', snapshotObjects[('zone', name)])))
+
+        # Retyped zones join the cfgs of the snapshot only once they have been created again
+        for objectType, name in diff.added:
+            payload = createPayload(objectType, snapshotObjects[(objectType, name)])
+            if objectType == 'cfg':
+                zones = cfgZones(payload)
+                payload = memberPayload('cfg', {'zone-name': [i for i in zones if i not in retyped]})
+                if len(cfgZones(payload)) == 0:
+                    self.errors.append(f'cfg {name} only lists zones whose zone type changes')
+            self.creates.append((objectType, name, payload))
+
+        for objectType, name in diff.modified:
+            details = diff.details[(objectType, name)]
+            if name in retyped:
+                continue
+            added = details['added']
+            if objectType == 'cfg':
+                added = {key: [i for i in members if i not in retyped] for key, members in added.items()}
+                added = {key: members for key, members in added.items() if len(members) > 0}
+            if len(added) > 0:
+                self.addMembers.append((objectType, name, memberPayload(objectType, added)))
+            if len(details['removed']) > 0:
+                self.removeMembers.append((objectType, name, memberPayload(objectType, details['removed'])))
+
+        # Kept cfgs let go of the retyped zones they still list after the member removals
+        removed = {name: cfgZones(payload) for objectType, name, payload in self.removeMembers if objectType == 'cfg'}
+        added = {name: cfgZones(payload) for objectType, name, payload in self.addMembers if objectType == 'cfg'}
+        for (objectType, name), entry in sorted(liveObjects.items()):
+            if objectType != 'cfg' or (objectType, name) in diff.removed:
+                continue
+            zones = [i for i in cfgZones(entry) if i not in removed.get(name, [])]
+            detached = [i for i in zones if i in retyped]
+            if len(detached) == 0:
+                continue
+            if len([i for i in zones + added.get(name, []) if i not in retyped]) == 0:
+                self.errors.append(f'cfg {name} would be left with no zones while its zones are retyped')
+            self.detaches.append(('cfg', name, memberPayload('cfg', {'zone-name': detached})))
+
+        for (objectType, name), entry in sorted(snapshotObjects.items()):
+            if objectType != 'cfg':
+                continue
+            attached = [i for i in cfgZones(entry) if i in retyped]
+            if len(attached) > 0:
+                self.reattaches.append(('cfg', name, memberPayload('cfg', {'zone-name': attached})))
+
+    def steps(self):
+        return (
+            ("Create", self.creates),
+            ("Add members to", self.addMembers),
+            ("Remove members from", self.removeMembers),
+            ("Take retyped zones out of", self.detaches),
+            ("Delete", self.deletes),
+            ("Create again", self.recreates),
+            ("Put retyped zones back in", self.reattaches)
+        )
+
+    def ok(self):
+        return len(self.errors) == 0
+
+    def empty(self):
+        return all(len(targets) == 0 for title, targets in self.steps())
+
+
+def cfgZones(entry):
+    return entry['member-zone'].get('zone-name', [])
+
+
+def planReconcile(live, snapshot):
+    return ReconcilePlan(live, snapshot)
+
+
+def applyPlan(client, plan, batchSize):
+    # Each step relies on the ones before it, so a step with a failure ends the run
+    steps = (
+        lambda: batchCreate(client, plan.creates, batchSize),
+        lambda: batchUpdate(client, "PATCH", plan.addMembers, batchSize),
+        lambda: batchUpdate(client, "DELETE", plan.removeMembers, batchSize),
+        lambda: batchUpdate(client, "DELETE", plan.detaches, batchSize),
+        lambda: batchDelete(client, plan.deletes, batchSize),
+        lambda: batchCreate(client, plan.recreates, batchSize),
+        lambda: batchUpdate(client, "PATCH", plan.reattaches, batchSize)
+    )
+
+    results = list()
+    for step in steps:
+        results.extend(step())
+        if any(status >= 300 for zoneObject, name, status in results):
+            break
+
+    return results
+
+
+def printPlan(plan):
+    for title, targets in plan.steps():
+        for target in targets:
+            print(f'{title} {target[0]} {target[1]}')
+
+
+def main(sysArgv):
+    fabricIP = config('FABRICIP')
+    fabricUser = config('FABRICUSER')
+    fabricPassword = config('FABRICPASSWORD')
+    fabricPrefix = config('FABRICPREFIX')
+    overrideConfirm = config("OVERRIDECONFIRM", cast=bool, default=False)
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-d", "--defconfig", required=True,
+                        help="Previously saved defined configuration to bring the fabric back to")
+    parser.add_argument("-b", "--batch", type=int, default=50,
+                        help="Send up to this many objects of a type per request")
+    parser.add_argument("-n", "--dry-run", action="store_true",
+                        help="Only show the changes that would be made")
+    parser.add_argument("--profile", action="store_true",
+                        help="Profile each phase and write the stats to a .prof file")
+    args = parser.parse_args(sysArgv[1:])
+
+    profiler = PhaseProfiler(args.profile, sysArgv[0])
+
+    profiler.begin("load")
+
+    snapshot = getConfigurationFromFile(args.defconfig)
+    if 'defined-configuration' not in snapshot:
+        print(f'{args.defconfig} is not a saved defined configuration.')
+        exit(3)
+
+    # Log into the fabric
+    profiler.begin("fetch")
+    client = restLogin(fabricUser, fabricPassword, fabricIP, fabricPrefix)
+
+    # The checksum taken before the live configuration is read guards the save
+    effConf = getEffectiveConfiguration(client)
+    live = getDefinedConfiguration(client)
+
+    profiler.begin("plan")
+    plan = planReconcile(live, snapshot)
+    if plan.empty():
+        print('The defined configuration already matches the snapshot.')
+        restLogout(client, endSession=True)
+        return
+
+    printPlan(plan)
+    if not plan.ok():
+        for error in plan.errors:
+            print(f'Error: {error}; reconcile it by hand.')
+        restLogout(client, endSession=True)
+        exit(3)
+
+    if args.dry_run:
+        restLogout(client, endSession=True)
+        return
+
+    if not overrideConfirm:
+        commitConf = input(f'Apply and save these changes? Y or y to accept, anything else to reject: ')
+        if not (len(commitConf) == 1 and commitConf in "Yy"):
+            print(f'Changes discarded.')
+            restLogout(client, endSession=True)
+            return
+
+    profiler.begin("apply")
+    results = applyPlan(client, plan, max(args.batch, 1))
+    failed = [(zoneObject, name, status) for zoneObject, name, status in results if status >= 300]
+    for zoneObject, name, status in failed:
+        print(f'{zoneObject} {name} could not be changed: {status}')
+
+    # A partial reconcile is not saved; the fabric is left as it was
+    profiler.begin("save")
+    if len(failed) > 0:
+        print(f'{len(failed)} of {len(results)} changes failed, changes discarded.')
+        restLogout(client, endSession=True)
+        exit(3)
+
+    if saveConfiguration(client, effConf["effective-configuration"]["checksum"]) >= 300:
+        restLogout(client, endSession=True)
+        exit(3)
+    print(f'{len(results)} changes applied and saved.')
+
+    # logout of the fabric
+    restLogout(client)
+
+
+if __name__ == '__main__':
+    main(sys.argv)
@@ -0,0 +1,489 @@
+#!/usr/bin/env python3
+# Version 23.2.1.1
+# Copyright 2023 Chip Copper
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this
+# software and associated documentation files (the "Software"), to deal in the Software
+# without restriction, including without limitation the rights to use, copy, modify, merge,
+# publish, distribute, sublicense, and/or sell copies of the Software, and to permit persons
+# to whom the Software is furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all copies or
+# substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING
+# BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM,
+# DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+# Shared REST client for the batch tools.  One requests session is kept for the life of
+# the client so the TCP connection and TLS session are reused across calls, and the
+# session headers are built once at login instead of on every request.
+#
+# With SESSIONCACHE set to a file name, e.g. sessKey.txt, session keys are cached there and
+# reused by the next tool run against the same switch and user for as long as the switch
+# still accepts them.  By default every run logs in and out as before.
+#
+# An open session keeps any zoning transaction that has not been saved, so a tool that
+# discards its changes must log out with endSession=True even when the key is cached.
+#
+# Every request is paced by an adaptive token bucket starting at REQUESTRATE requests per
+# second (0 disables pacing).  429 and 503 answers slow it down and are retried.
+#
+# With RESTMETRICS set, every response is timed and counted by restMetrics and the
+# totals are written to that file when the tool exits.
+
+import re
+import json
+import time
+import base64
+import requests
+from requests.adapters import HTTPAdapter
+from decouple import config
+from sessionCache import sessionCacheKey, loadSession, storeSession, dropSession
+from rateLimiter import AdaptiveThrottle
+from restMetrics import METRICS_FILE, restMetrics
+from zoneDatabase import NAME_KEYS
+
+ZONE_BASE = "running/brocade-zone/"
+DEFINED_URI = ZONE_BASE + "defined-configuration"
+EFFECTIVE_URI = ZONE_BASE + "effective-configuration"
+CFG_ACTION_URI = EFFECTIVE_URI + "/cfg-action/1"
+CHECKSUM_URI = EFFECTIVE_URI + "/checksum"
+
+# Small resource used to check that a cached session key is still accepted
+SESSION_CHECK_URI = "running/brocade-fibrechannel-switch/fibrechannel-switch"
+
+YANG_JSON = 'application/yang-data+json'
+
+# Opening of the {"Response": ...} envelope FOS wraps around every GET body
+ENVELOPE_START = re.compile(rb'\s*\{\s*"Response"\s*:\s*')
+STREAM_CHUNK = 1 << 16
+
+# Deletes go cfgs, then zones, then aliases and creates go the other way round so that no
+# object ever refers to one that is not there
+DELETE_ORDER = ('cfg', 'zone', 'alias')
+CREATE_ORDER = ('alias', 'zone', 'cfg')
+
+SESSION_CACHE = config('SESSIONCACHE', default="")
+SESSION_TIMEOUT = config('SESSIONTIMEOUT', cast=int, default=7200)
+REQUEST_RATE = config('REQUESTRATE', cast=float, default=2.0)
+REQUEST_RATE_MAX = config('REQUESTRATEMAX', cast=float, default=20.0)
+REQUEST_RETRIES = config('REQUESTRETRIES', cast=int, default=5)
+REQUEST_BURST = config('REQUESTBURST', cast=float, default=2.0)
+
+
+class RestClient:
+
+    def __init__(self, switchAddress, prefix, poolSize=10, cacheFile=SESSION_CACHE, rate=None,
+                 timeout=None):
+        self.switchAddress = switchAddress
+        self.prefix = prefix
+        self.urlBase = prefix + "://" + switchAddress + "/rest/"
+        self.sessionKey = None
+        self.cacheFile = cacheFile
+        self.cacheKey = None
+        self.timeout = timeout
+        # perf_counter() time by which the whole job must be done, None for no limit
+        self.deadline = None
+
+        if rate is None:
+            rate = REQUEST_RATE
+        self.throttle = AdaptiveThrottle(rate, maxRate=REQUEST_RATE_MAX, burst=REQUEST_BURST) \
+            if rate > 0 else None
+
+        # Suppress warnings for self-signed certificates
+        requests.packages.urllib3.disable_warnings()
+
+        # Keep-alive pool for this switch; every call goes through the same session
+        self.session = requests.Session()
+        self.session.verify = False
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=poolSize)
+        self.session.mount(prefix + "://", adapter)
+        self.session.headers.update({
+            'Accept': YANG_JSON,
+            'Content-Type': YANG_JSON
+        })
+
+        # Every response, login and logout included, goes to the metrics collector
+        if METRICS_FILE:
+            self.session.hooks['response'].append(self.recordResponse)
+
+    def requestTimeout(self):
+        # The socket timeout for the next request, cut short so it cannot outlast the deadline
+        if self.deadline is None:
+            return self.timeout
+
+        remaining = self.deadline - time.perf_counter()
+        if remaining <= 0:
+            raise TimeoutError("deadline passed")
+
+        return remaining if self.timeout is None else min(self.timeout, remaining)
+
+    def recordResponse(self, response, *args, **kwargs):
+        restMetrics.recordResponse(self.switchAddress, response.request.url[len(self.urlBase):], response,
+                                   kwargs.get('stream', False))
+
+    def recordStreamedBytes(self, response, size):
+        if METRICS_FILE:
+            restMetrics.recordResponseBytes(self.switchAddress, response.request.method,
+                                            response.request.url[len(self.urlBase):], size)
+
+    def setSessionKey(self, sessionKey):
+        self.sessionKey = sessionKey
+        self.session.headers['Authorization'] = sessionKey
+
+    def login(self, username, password):
+        if self.cacheFile:
+            self.cacheKey = sessionCacheKey(self.switchAddress, self.prefix, username)
+            if self.resumeSession():
+                return self.sessionKey
+
+        credentials = base64.b64encode(bytearray(username + ":" + password, 'utf-8')).decode()
+
+        # Send the login and print the return status code
+        headers = {
+            'Authorization': 'Basic ' + credentials
+        }
+        response = self.session.post(self.urlBase + "login", headers=headers, timeout=self.requestTimeout())
+        if response.status_code != 200:
+            print("Error logging in: {}".format(response.status_code))
+            exit()
+
+        self.setSessionKey(response.headers["Authorization"])
+        if self.cacheFile:
+            storeSession(self.cacheFile, self.cacheKey, self.sessionKey, SESSION_TIMEOUT)
+
+        return self.sessionKey
+
+    def resumeSession(self):
+        sessionKey = loadSession(self.cacheFile, self.cacheKey)
+        if sessionKey is None:
+            return False
+
+        # Make sure the switch still honours the cached key before relying on it
+        self.setSessionKey(sessionKey)
+        response = self.session.get(self.urlBase + SESSION_CHECK_URI, timeout=self.requestTimeout())
+        if response.status_code != 200:
+            dropSession(self.cacheFile, self.cacheKey)
+            self.session.headers.pop('Authorization', None)
+            self.sessionKey = None
+            return False
+
+        return True
+
+    def logout(self, endSession=False):
+        if self.cacheFile and not endSession:
+            # Leave the session open on the switch for the next tool and push out its expiry
+            if self.sessionKey is not None:
+                storeSession(self.cacheFile, self.cacheKey, self.sessionKey, SESSION_TIMEOUT)
+            self.session.close()
+            return
+
+        # Send the logout and print the return status code
+        response = self.session.post(self.urlBase + "logout", timeout=self.timeout)
+        if response.status_code != 204:
+            print("Error logging out: {}".format(response.status_code))
+        if self.cacheFile:
+            dropSession(self.cacheFile, self.cacheKey)
+        self.session.headers.pop('Authorization', None)
+        self.sessionKey = None
+        self.session.close()
+
+    def request(self, method, uri, payload=None, **kwargs):
+        if payload is not None:
+            kwargs['json'] = payload
+
+        if self.throttle is None:
+            kwargs['timeout'] = self.requestTimeout()
+            return self.session.request(method, self.urlBase + uri, **kwargs)
+
+        for attempt in range(REQUEST_RETRIES + 1):
+            self.throttle.acquire()
+            kwargs['timeout'] = self.requestTimeout()
+            response = self.session.request(method, self.urlBase + uri, **kwargs)
+            if not self.throttle.update(response):
+                break
+            if METRICS_FILE:
+                restMetrics.recordRetry(self.switchAddress, method, uri)
+            response.close()
+
+        return response
+
+    def get(self, uri, **kwargs):
+        return self.request("GET", uri, **kwargs)
+
+    def delete(self, uri, payload=None, **kwargs):
+        return self.request("DELETE", uri, payload, **kwargs)
+
+    def post(self, uri, payload=None, **kwargs):
+        return self.request("POST", uri, payload, **kwargs)
+
+    def patch(self, uri, payload=None, **kwargs):
+        return self.request("PATCH", uri, payload, **kwargs)
+
+
+def restLogin(username, password, switchAddress, prefix, rate=None, timeout=None, deadline=None):
+    client = RestClient(switchAddress, prefix, rate=rate, timeout=timeout)
+    client.deadline = deadline
+    client.login(username, password)
+    return client
+
+
+def restLogout(client, endSession=False):
+    client.logout(endSession)
+
+
+def getErrorMessage(response):
+    try:
+        errorDict = json.loads(response.text)
+        return errorDict['errors']['error'][0]['error-message']
+    except (ValueError, KeyError, IndexError, TypeError):
+        return "{} {}".format(response.status_code, response.text)
+
+
+def getDefinedConfiguration(client):
+    response = client.get(DEFINED_URI)
+    if response.status_code != 200:
+        print("Error getting defined configuration: {}".format(response.status_code))
+        print(response.text)
+        exit(3)
+
+    return json.loads(response.text)["Response"]
+
+
+def getEffectiveConfiguration(client):
+    response = client.get(EFFECTIVE_URI)
+    if response.status_code != 200:
+        print("Error getting effective configuration: {}".format(response.status_code))
+        print(response.text)
+        exit(3)
+
+    return json.loads(response.text)["Response"]
+
+
+def getConfigurationChecksum(client):
+    # Only the checksum leaf, so checking for changes does not pull the enabled zones
+    response = client.get(CHECKSUM_URI)
+    if response.status_code != 200:
+        print("Error getting configuration checksum: {}".format(response.status_code))
+        print(response.text)
+        exit(3)
+
+    return json.loads(response.text)["Response"]["effective-configuration"]["checksum"]
+
+
+def streamConfiguration(client, uri, outfileFD, chunkSize=STREAM_CHUNK):
+    # Copy a GET body straight to a binary file, dropping the Response envelope on the way,
+    # so only a chunk of it is ever held in memory
+    response = client.get(uri, stream=True)
+    if response.status_code != 200:
+        print("Error getting {}: {}".format(uri, response.status_code))
+        client.recordStreamedBytes(response, len(response.content))
+        print(response.text)
+        exit(3)
+
+    head = b""
+    tail = b""
+    unwrapping = None
+    bytesRead = 0
+    for chunk in response.iter_content(chunkSize):
+        bytesRead += len(chunk)
+        if client.deadline is not None and time.perf_counter() > client.deadline:
+            response.close()
+            client.recordStreamedBytes(response, bytesRead)
+            raise TimeoutError("deadline passed")
+
+        if unwrapping is None:
+            # Wait for enough of the body to recognise the envelope
+            head += chunk
+            if len(head) < 64:
+                continue
+            match = ENVELOPE_START.match(head)
+            unwrapping = match is not None
+            chunk = head[match.end():] if unwrapping else head
+
+        if not unwrapping:
+            outfileFD.write(chunk)
+            continue
+
+        # Hold back everything from the last closing brace, which may be the envelope's
+        data = tail + chunk
+        end = data.rfind(b"}")
+        if end == -1:
+            tail = data
+        else:
+            outfileFD.write(data[:end])
+            tail = data[end:]
+
+    if unwrapping is None:
+        match = ENVELOPE_START.match(head)
+        unwrapping = match is not None
+        tail = head[match.end():] if unwrapping else head
+
+    if unwrapping and tail.rstrip().endswith(b"}"):
+        tail = tail.rstrip()[:-1]
+    outfileFD.write(tail)
+    response.close()
+    client.recordStreamedBytes(response, bytesRead)
+
+    return outfileFD.tell()
+
+
+def deleteZoneObject(client, uri):
+    # A 400 means the object is not there, which is fine for a delete
+    response = client.delete(DEFINED_URI + "/" + uri)
+    if response.status_code != 204 and response.status_code != 400:
+        print("Error deleting object: {}".format(getErrorMessage(response)))
+
+    return response.status_code
+
+
+def getZoneObject(client, zoneObject, name):
+    # The status and the object's entry; 400 or 404 means the object is not defined
+    response = client.get(f'{DEFINED_URI}/{zoneObject}/{NAME_KEYS[zoneObject]}/{name}')
+    if response.status_code != 200:
+        return response.status_code, None
+
+    entry = json.loads(response.text)["Response"][zoneObject]
+    return response.status_code, entry[0] if isinstance(entry, list) else entry
+
+
+def deleteZoneObjects(client, zoneObject, names):
+    # One DELETE with a list body removes every named object of this type
+    payload = {
+        zoneObject: [{NAME_KEYS[zoneObject]: name} for name in names]
+    }
+
+    response = client.delete(DEFINED_URI + "/" + zoneObject, payload)
+    if response.status_code != 204:
+        print("Error deleting {} batch: {}".format(zoneObject, getErrorMessage(response)))
+
+    return response.status_code
+
+
+def batchDelete(client, targets, batchSize):
+    results = list()
+    for zoneObject in DELETE_ORDER:
+        names = [name for objType, name in targets if objType == zoneObject]
+        for start in range(0, len(names), batchSize):
+            chunk = names[start:start + batchSize]
+            status = deleteZoneObjects(client, zoneObject, chunk)
+            if status == 204:
+                results.extend((zoneObject, name, status) for name in chunk)
+                continue
+
+            # Fall back to one request per object so one bad name does not sink the batch
+            print(f'Retrying {len(chunk)} {zoneObject} deletes one at a time.')
+            for name in chunk:
+                status = deleteZoneObject(client, f'{zoneObject}/{NAME_KEYS[zoneObject]}/{name}')
+                results.append((zoneObject, name, status))
+
+    return results
+
+
+def createZoneObject(client, uri, payload):
+    response = client.post(DEFINED_URI + "/" + uri, payload)
+    if response.status_code != 201:
+        print("Error creating object: {}".format(getErrorMessage(response)))
+
+    return response.status_code
+
+
+def createZoneObjects(client, zoneObject, entries):
+    # One POST with a list body creates every object of this type
+    payload = {
+        zoneObject: entries
+    }
+
+    response = client.post(DEFINED_URI + "/" + zoneObject, payload)
+    if response.status_code != 201:
+        print("Error creating {} batch: {}".format(zoneObject, getErrorMessage(response)))
+
+    return response.status_code
+
+
+def batchCreate(client, targets, batchSize):
+    results = list()
+    for zoneObject in CREATE_ORDER:
+        objects = [(name, payload) for objType, name, payload in targets if objType == zoneObject]
+        for start in range(0, len(objects), batchSize):
+            chunk = objects[start:start + batchSize]
+            entries = [dict({NAME_KEYS[zoneObject]: name}, **payload) for name, payload in chunk]
+            status = createZoneObjects(client, zoneObject, entries)
+            if status == 201:
+                results.extend((zoneObject, name, status) for name, payload in chunk)
+                continue
+
+            print(f'Retrying {len(chunk)} {zoneObject} creates one at a time.')
+            for name, payload in chunk:
+                status = createZoneObject(client, f'{zoneObject}/{NAME_KEYS[zoneObject]}/{name}', payload)
+                results.append((zoneObject, name, status))
+
+    return results
+
+
+def patchZoneObject(client, uri, payload):
+    # PATCH merges the members in the payload into the existing object
+    response = client.patch(DEFINED_URI + "/" + uri, payload)
+    if response.status_code != 204:
+        print("Error updating object: {}".format(getErrorMessage(response)))
+
+    return response.status_code
+
+
+def removeZoneMembers(client, uri, payload):
+    # DELETE with a member list only takes those members out of the object
+    response = client.delete(DEFINED_URI + "/" + uri, payload)
+    if response.status_code != 204:
+        print("Error removing members: {}".format(getErrorMessage(response)))
+
+    return response.status_code
+
+
+def updateZoneObjects(client, method, zoneObject, entries):
+    # One PATCH or DELETE with a list body changes the members of every object of this type
+    payload = {
+        zoneObject: entries
+    }
+
+    response = client.request(method, DEFINED_URI + "/" + zoneObject, payload)
+    if response.status_code != 204:
+        print("Error updating {} batch: {}".format(zoneObject, getErrorMessage(response)))
+
+    return response.status_code
+
+
+def batchUpdate(client, method, targets, batchSize):
+    # Members are added aliases first and removed cfgs first, like creates and deletes
+    singleUpdate = patchZoneObject if method == "PATCH" else removeZoneMembers
+    results = list()
+    for zoneObject in (CREATE_ORDER if method == "PATCH" else DELETE_ORDER):
+        objects = [(name, payload) for objType, name, payload in targets if objType == zoneObject]
+        for start in range(0, len(objects), batchSize):
+            chunk = objects[start:start + batchSize]
+            entries = [dict({NAME_KEYS[zoneObject]: name}, **payload) for name, payload in chunk]
+            status = updateZoneObjects(client, method, zoneObject, entries)
+            if status == 204:
+                results.extend((zoneObject, name, status) for name, payload in chunk)
+                continue
+
+            print(f'Retrying {len(chunk)} {zoneObject} updates one at a time.')
+            for name, payload in chunk:
+                status = singleUpdate(client, f'{zoneObject}/{NAME_KEYS[zoneObject]}/{name}', payload)
+                results.append((zoneObject, name, status))
+
+    return results
+
+
+def saveConfiguration(client, checksum):
+    payload = {
+        "checksum": checksum
+    }
+
+    response = client.patch(CFG_ACTION_URI, payload)
+    if response.status_code >= 300:
+        print("Error saving configuration: {}".format(getErrorMessage(response)))
+
+    return response.status_code
@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+# Version 23.2.1.1
+# Copyright 2023 Chip Copper
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this
+# software and associated documentation files (the "Software"), to deal in the Software
+# without restriction, including without limitation the rights to use, copy, modify, merge,
+# publish, distribute, sublicense, and/or sell copies of the Software, and to permit persons
+# to whom the Software is furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all copies or
+# substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING
+# BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM,
+# DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+# Per-request metrics for the REST client.  Every response is counted by switch,
+# method and endpoint, with object names folded out of the endpoint, into a latency
+# histogram, status code counts, request and response byte totals and the number of
+# 429/503 answers that were retried.  Response bytes are the body bytes actually read,
+# so chunked and streamed bodies count too.
+#
+# Set RESTMETRICS to a file name to have the metrics written there when the tool exits,
+# as a Prometheus textfile when the name ends in .prom and as JSON otherwise.
+
+import os
+import json
+import atexit
+import threading
+from decouple import config
+
+METRICS_FILE = config('RESTMETRICS', default="")
+
+# Upper bounds in seconds of the latency histogram buckets
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# Leaves followed by an object name in defined-configuration URIs
+NAME_LEAVES = ('alias-name', 'zone-name', 'cfg-name')
+
+
+def endpointName(uri):
+    # running/brocade-zone/defined-configuration/zone/zone-name/z1 -> .../zone/zone-name/{name}
+    parts = uri.split("?")[0].split("/")
+    for i in range(len(parts) - 1):
+        if parts[i] in NAME_LEAVES:
+            parts[i + 1] = "{name}"
+            return "/".join(parts[:i + 2])
+
+    return "/".join(parts)
+
+
+class EndpointMetrics:
+
+    def __init__(self):
+        self.buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.count = 0
+        self.seconds = 0.0
+        self.statuses = {}
+        self.requestBytes = 0
+        self.responseBytes = 0
+        self.retries = 0
+
+    def record(self, seconds, status, requestBytes, responseBytes):
+        index = 0
+        while index < len(LATENCY_BUCKETS) and seconds > LATENCY_BUCKETS[index]:
+            index += 1
+        self.buckets[index] += 1
+        self.count += 1
+        self.seconds += seconds
+        self.statuses[status] = self.statuses.get(status, 0) + 1
+        self.requestBytes += requestBytes
+        self.responseBytes += responseBytes
+
+    def asDict(self):
+        cumulative = 0
+        histogram = {}
+        for bound, count in zip(LATENCY_BUCKETS + ("+Inf",), self.buckets):
+            cumulative += count
+            histogram[str(bound)] = cumulative
+
+        return {
+            "requests": self.count,
+            "seconds": self.seconds,
+            "latencyBuckets": histogram,
+            "statuses": {str(status): count for status, count in sorted(self.statuses.items())},
+            "requestBytes": self.requestBytes,
+            "responseBytes": self.responseBytes,
+            "retries": self.retries
+        }
+
+
+class RestMetrics:
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.endpoints = {}
+
+    def endpoint(self, switch, method, uri):
+        key = (switch, method, endpointName(uri))
+        metrics = self.endpoints.get(key)
+        if metrics is None:
+            metrics = self.endpoints[key] = EndpointMetrics()
+        return metrics
+
+    def recordResponse(self, switch, uri, response, streamed=False):
+        # Time to the response headers.  A streamed body has not been read yet, so its
+        # reader adds the bytes with recordResponseBytes
+        request = response.request
+        body = request.body or b""
+        with self.lock:
+            self.endpoint(switch, request.method, uri).record(
+                response.elapsed.total_seconds(), response.status_code, len(body),
+                0 if streamed else len(response.content))
+
+    def recordResponseBytes(self, switch, method, uri, size):
+        with self.lock:
+            self.endpoint(switch, method, uri).responseBytes += size
+
+    def recordRetry(self, switch, method, uri):
+        with self.lock:
+            self.endpoint(switch, method, uri).retries += 1
+
+    def asDict(self):
+        with self.lock:
+            return {
+                "endpoints": [dict({"switch": switch, "method": method, "endpoint": endpoint}, **metrics.asDict())
+                              for (switch, method, endpoint), metrics in sorted(self.endpoints.items())]
+            }
+
+    def prometheusText(self):
+        lines = [
+            "# HELP fos_rest_request_duration_seconds Time to the REST response headers.",
+            "# TYPE fos_rest_request_duration_seconds histogram"
+        ]
+        counters = {
+            "fos_rest_responses_total": [],
+            "fos_rest_request_bytes_total": [],
+            "fos_rest_response_bytes_total": [],
+            "fos_rest_retries_total": []
+        }
+        for endpoint in self.asDict()["endpoints"]:
+            labels = 'switch="{switch}",method="{method}",endpoint="{endpoint}"'.format(**endpoint)
+            for bound, count in endpoint["latencyBuckets"].items():
+                lines.append('fos_rest_request_duration_seconds_bucket{{{},le="{}"}} {}'.format(labels, bound, count))
+            lines.append("fos_rest_request_duration_seconds_sum{{{}}} {}".format(labels, endpoint["seconds"]))
+            lines.append("fos_rest_request_duration_seconds_count{{{}}} {}".format(labels, endpoint["requests"]))
+            for status, count in endpoint["statuses"].items():
+                counters["fos_rest_responses_total"].append('{{{},status="{}"}} {}'.format(labels, status, count))
+            counters["fos_rest_request_bytes_total"].append("{{{}}} {}".format(labels, endpoint["requestBytes"]))
+            counters["fos_rest_response_bytes_total"].append("{{{}}} {}".format(labels, endpoint["responseBytes"]))
+            counters["fos_rest_retries_total"].append("{{{}}} {}".format(labels, endpoint["retries"]))
+
+        for name, samples in counters.items():
+            lines.append("# TYPE {} counter".format(name))
+            lines.extend(name + sample for sample in samples)
+
+        return "\n".join(lines) + "\n"
+
+    def write(self, filename):
+        # Written beside the target and renamed so a textfile collector never reads half a file
+        tmpFile = filename + ".tmp"
+        with open(tmpFile, "w") as fp:
+            if filename.endswith(".prom"):
+                fp.write(self.prometheusText())
+            else:
+                json.dump(self.asDict(), fp, indent=2)
+        os.replace(tmpFile, filename)
+
+
+# One collector for every client in the process
+restMetrics = RestMetrics()
+
+
+def writeMetricsAtExit():
+    if len(restMetrics.endpoints) > 0:
+        restMetrics.write(METRICS_FILE)
+
+
+if METRICS_FILE:
+    atexit.register(writeMetricsAtExit)
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+# Version 23.2.1.1
+# Copyright 2023 Chip Copper
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this
+# software and associated documentation files (the "Software"), to deal in the Software
+# without restriction, including without limitation the rights to use, copy, modify, merge,
+# publish, distribute, sublicense, and/or sell copies of the Software, and to permit persons
+# to whom the Software is furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all copies or
+# substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING
+# BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM,
+# DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+# Cache of FOS REST session keys so that tools run back to back can share one login.
+# The cache file holds one entry per switch and user with the Authorization token and
+# the time the switch will drop it if it stays idle.  The file is only ever readable
+# by its owner.
+
+import os
+import json
+import time
+import threading
+
+# Serialises updates from clients running in threads of the same process
+cacheLock = threading.Lock()
+
+
+def sessionCacheKey(switchAddress, prefix, username):
+    return "{}://{}/{}".format(prefix, switchAddress, username)
+
+
+def readSessionCache(cacheFile):
+    try:
+        with open(cacheFile, "r") as fp:
+            cache = json.load(fp)
+    except (OSError, ValueError):
+        # Missing, unreadable or an old bare-token sessKey.txt
+        return {}
+
+    if not isinstance(cache, dict):
+        return {}
+
+    return cache
+
+
+def writeSessionCache(cacheFile, cache):
+    tmpFile = cacheFile + ".tmp"
+    fd = os.open(tmpFile, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, "w") as fp:
+        json.dump(cache, fp)
+    os.chmod(tmpFile, 0o600)
+    os.replace(tmpFile, cacheFile)
+
+
+def loadSession(cacheFile, key):
+    entry = readSessionCache(cacheFile).get(key)
+    if entry is None:
+        return None
+
+    if entry.get("expires", 0) <= time.time():
+        return None
+
+    return entry.get("sessionKey")
+
+
+def storeSession(cacheFile, key, sessionKey, idleTimeout):
+    with cacheLock:
+        cache = readSessionCache(cacheFile)
+        cache[key] = {
+            "sessionKey": sessionKey,
+            "expires": time.time() + idleTimeout
+        }
+        writeSessionCache(cacheFile, cache)
+
+
+def dropSession(cacheFile, key):
+    with cacheLock:
+        cache = readSessionCache(cacheFile)
+        if key in cache:
+            del cache[key]
+            writeSessionCache(cacheFile, cache)
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+# Version 23.2.1.1
+# Copyright 2023 Chip Copper
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this
+# software and associated documentation files (the "Software"), to deal in the Software
+# without restriction, including without limitation the rights to use, copy, modify, merge,
+# publish, distribute, sublicense, and/or sell copies of the Software, and to permit persons
+# to whom the Software is furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all copies or
+# substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING
+# BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM,
+# DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+# Per-fabric cache of the last defined configuration retrieved, tagged with the zone DB
+# checksum reported in the effective configuration at the time.  A matching checksum
+# means the defined configuration has not changed and the cached copy can be used
+# instead of downloading it again.
+
+import os
+import re
+import shutil
+
+
+def snapshotKey(switchAddress, name=None):
+    # Fleet inventories may list one address more than once, so entries there add their name
+    key = switchAddress if name is None else "{}_{}".format(name, switchAddress)
+    return re.sub(r'[^0-9A-Za-z.-]', '_', key)
+
+
+def cachedDefinedFile(cacheDir, key):
+    return os.path.join(cacheDir, key + "_defined.json")
+
+
+def cachedChecksumFile(cacheDir, key):
+    return os.path.join(cacheDir, key + ".checksum")
+
+
+def cachedChecksum(cacheDir, key):
+    if not os.path.exists(cachedDefinedFile(cacheDir, key)):
+        return None
+
+    try:
+        with open(cachedChecksumFile(cacheDir, key), "r") as fp:
+            return fp.read().strip()
+    except OSError:
+        return None
+
+
+def storeSnapshot(cacheDir, key, definedFile, checksum):
+    os.makedirs(cacheDir, exist_ok=True)
+
+    # Drop the old checksum first so a half written snapshot is never taken as current
+    checksumFile = cachedChecksumFile(cacheDir, key)
+    if os.path.exists(checksumFile):
+        os.remove(checksumFile)
+
+    cacheFile = cachedDefinedFile(cacheDir, key)
+    shutil.copyfile(definedFile, cacheFile + ".tmp")
+    os.replace(cacheFile + ".tmp", cacheFile)
+
+    with open(checksumFile, "w") as fp:
+        fp.write(checksum)
@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+# Version 23.2.1.1
+# Copyright 2023 Chip Copper
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this
+# software and associated documentation files (the "Software"), to deal in the Software
+# without restriction, including without limitation the rights to use, copy, modify, merge,
+# publish, distribute, sublicense, and/or sell copies of the Software, and to permit persons
+# to whom the Software is furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all copies or
+# substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING
+# BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM,
+# DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+# Compares two configurations written by getConfigs.py object by object.  Each alias,
+# zone and cfg is reduced to a canonical form, with its member lists sorted, and hashed,
+# so reordered members are not a change and unchanged objects are skipped after one
+# hash comparison.  Only objects whose hashes differ are compared member by member.
+# An effective configuration is compared as its cfg and enabled zones.
+#
+#   diff = diffConfigurations(before, after)
+#   diff.added, diff.removed      [(type, name), ...]
+#   diff.modified                 [(type, name), ...]
+#   diff.details[(type, name)]    {'added': {key: [...]}, 'removed': {key: [...]}, 'zone-type': (old, new)}
+#
+# usage: snapshotDiff.py -a <beforeFile> -b <afterFile> [-j]
+
+import sys
+import json
+import getopt
+import hashlib
+from zoneDatabase import NAME_KEYS, MEMBER_KEYS, getConfigurationFromFile
+from phaseProfiler import PhaseProfiler
+
+
+def configurationObjects(config):
+    # (type, name) -> entry for every object in a defined or effective configuration
+    objects = {}
+    if 'defined-configuration' in config:
+        for objectType, nameKey in NAME_KEYS.items():
+            for entry in config['defined-configuration'].get(objectType, []):
+                objects[(objectType, entry[nameKey])] = entry
+
+    if 'effective-configuration' in config:
+        effective = config['effective-configuration']
+        enabledZones = effective.get('enabled-zone', [])
+        for entry in enabledZones:
+            objects[('zone', entry['zone-name'])] = entry
+        if 'cfg-name' in effective:
+            objects[('cfg', effective['cfg-name'])] = {
+                'member-zone': {'zone-name': [i['zone-name'] for i in enabledZones]}}
+
+    return objects
+
+
+def canonicalMembers(objectType, entry):
+    container, keys = MEMBER_KEYS[objectType]
+    members = entry.get(container, {})
+    return {key: sorted(set(members.get(key, []))) for key in keys}
+
+
+def objectHash(objectType, entry):
+    canonical = [canonicalMembers(objectType, entry), entry.get('zone-type', 0)]
+    text = json.dumps(canonical, sort_keys=True, separators=(',', ':'))
+    return hashlib.blake2b(text.encode(), digest_size=16).digest()
+
+
+def memberChanges(objectType, before, after):
+    beforeMembers = canonicalMembers(objectType, before)
+    afterMembers = canonicalMembers(objectType, after)
+
+    details = {'added': {}, 'removed': {}}
+    for key in beforeMembers:
+        added = sorted(set(afterMembers[key]).difference(beforeMembers[key]))
+        removed = sorted(set(beforeMembers[key]).difference(afterMembers[key]))
+        if len(added) > 0:
+            details['added'][key] = added
+        if len(removed) > 0:
+            details['removed'][key] = removed
+    if before.get('zone-type', 0) != after.get('zone-type', 0):
+        details['zone-type'] = (before.get('zone-type', 0), after.get('zone-type', 0))
+
+    return details
+
+
+class ConfigurationDiff:
+
+    def __init__(self, before, after):
+        beforeObjects = configurationObjects(before)
+        afterObjects = configurationObjects(after)
+
+        self.added = sorted(i for i in afterObjects if i not in beforeObjects)
+        self.removed = sorted(i for i in beforeObjects if i not in afterObjects)
+        self.modified = []
+        self.details = {}
+        for key, entry in beforeObjects.items():
+            afterEntry = afterObjects.get(key)
+            if afterEntry is None or afterEntry is entry:
+                continue
+            if objectHash(key[0], entry) != objectHash(key[0], afterEntry):
+                self.modified.append(key)
+                self.details[key] = memberChanges(key[0], entry, afterEntry)
+        self.modified.sort()
+
+    def changed(self):
+        return len(self.added) > 0 or len(self.removed) > 0 or len(self.modified) > 0
+
+    def asDict(self):
+        return {
+            'added': [{'type': t, 'name': n} for t, n in self.added],
+            'removed': [{'type': t, 'name': n} for t, n in self.removed],
+            'modified': [dict({'type': t, 'name': n}, **self.details[(t, n)]) for t, n in self.modified]
+        }
+
+
+def diffConfigurations(before, after):
+    return ConfigurationDiff(before, after)
+
+
+def diffFiles(beforeFile, afterFile):
+    return ConfigurationDiff(getConfigurationFromFile(beforeFile), getConfigurationFromFile(afterFile))
+
+
+def printDiff(diff):
+    print("Added:")
+    for objectType, name in diff.added:
+        print("\t{} {}".format(objectType, name))
+
+    print("\nRemoved:")
+    for objectType, name in diff.removed:
+        print("\t{} {}".format(objectType, name))
+
+    print("\nModified:")
+    for objectType, name in diff.modified:
+        details = diff.details[(objectType, name)]
+        print("\t{} {}".format(objectType, name))
+        for key, members in details['added'].items():
+            for i in members:
+                print("\t\t+ {} {}".format(key, i))
+        for key, members in details['removed'].items():
+            for i in members:
+                print("\t\t- {} {}".format(key, i))
+        if 'zone-type' in details:
+            print("\t\tzone-type {} -> {}".format(*details['zone-type']))
+
+
+def main(argv):
+    beforeFile = None
+    afterFile = None
+    asJson = False
+    profile = False
+
+    # Retrieve and parse command line arguments.
+    try:
+        opts, args = getopt.getopt(argv[1:], "a:b:jh",
+            ["before=", "after=", "json", "profile"])
+    except getopt.GetoptError:
+        print("usage: {} -a <beforeFile> -b <afterFile> [-j] [--profile]".format(argv[0]))
+        sys.exit(2)
+    for opt, arg in opts:
+        if opt == '-h':
+            print("usage: {} -a <beforeFile> -b <afterFile> [-j] [--profile]".format(argv[0]))
+            sys.exit()
+        elif opt in ("-a", "--before"):
+            beforeFile = arg
+        elif opt in ("-b", "--after"):
+            afterFile = arg
+        elif opt in ("-j", "--json"):
+            asJson = True
+        elif opt in ("--profile"):
+            profile = True
+
+    if (beforeFile is None or afterFile is None):
+        print("usage: {} -a <beforeFile> -b <afterFile> [-j] [--profile]".format(argv[0]))
+        sys.exit(2)
+
+    profiler = PhaseProfiler(profile, argv[0])
+
+    profiler.begin("load")
+    before = getConfigurationFromFile(beforeFile)
+    after = getConfigurationFromFile(afterFile)
+
+    profiler.begin("diff")
+    diff = ConfigurationDiff(before, after)
+
+    profiler.begin("report")
+    if asJson:
+        json.dump(diff.asDict(), sys.stdout, indent=2)
+        print()
+    else:
+        printDiff(diff)
+
+    # Like diff(1), exit 1 when the configurations differ
+    if diff.changed():
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main(sys.argv)
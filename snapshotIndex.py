@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+# Version 23.2.1.1
+# Copyright 2023 Chip Copper
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this
+# software and associated documentation files (the "Software"), to deal in the Software
+# without restriction, including without limitation the rights to use, copy, modify, merge,
+# publish, distribute, sublicense, and/or sell copies of the Software, and to permit persons
+# to whom the Software is furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all copies or
+# substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING
+# BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM,
+# DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+# Imports a saved defined configuration into an indexed SQLite file so that repeated
+# lookups against the same snapshot do not have to parse the JSON each time.  The index
+# answers the same queries as ZoneDatabase, and checks.py, wwnsToAliases.py and
+# putBack.py accept it wherever they take a defined configuration file.
+#
+# usage: snapshotIndex.py -d <definedDB> -o <indexFile>
+
+import os
+import sys
+import getopt
+import sqlite3
+from zoneDatabase import ZoneDatabase, ZoneQueries, getConfigurationFromFile
+from phaseProfiler import PhaseProfiler
+
+SCHEMA = '''
+CREATE TABLE alias (name TEXT PRIMARY KEY);
+CREATE TABLE zone (name TEXT PRIMARY KEY, zone_type INTEGER NOT NULL);
+CREATE TABLE cfg (name TEXT PRIMARY KEY);
+CREATE TABLE alias_member (alias TEXT NOT NULL, wwn TEXT NOT NULL);
+CREATE TABLE zone_member (zone TEXT NOT NULL, member TEXT NOT NULL, principal INTEGER NOT NULL);
+CREATE TABLE cfg_member (cfg TEXT NOT NULL, zone TEXT NOT NULL);
+'''
+
+INDEXES = '''
+CREATE INDEX alias_member_alias ON alias_member (alias);
+CREATE INDEX alias_member_wwn ON alias_member (wwn);
+CREATE INDEX zone_member_zone ON zone_member (zone);
+CREATE INDEX zone_member_member ON zone_member (member);
+CREATE INDEX cfg_member_cfg ON cfg_member (cfg);
+CREATE INDEX cfg_member_zone ON cfg_member (zone);
+'''
+
+
+def importSnapshot(zoneDB, indexFile):
+    if os.path.exists(indexFile):
+        os.remove(indexFile)
+
+    conn = sqlite3.connect(indexFile)
+    conn.executescript(SCHEMA)
+
+    # Rows go in file order so rowid order matches the order the switch listed them in
+    conn.executemany("INSERT INTO alias VALUES (?)", ((name,) for name in zoneDB.aliases))
+    conn.executemany("INSERT INTO alias_member VALUES (?, ?)",
+                     ((record.name, wwn) for record in zoneDB.aliases.values() for wwn in record.members))
+    conn.executemany("INSERT INTO zone VALUES (?, ?)",
+                     ((record.name, record.zoneType) for record in zoneDB.zones.values()))
+    conn.executemany("INSERT INTO zone_member VALUES (?, ?, ?)",
+                     ((record.name, member, 0) for record in zoneDB.zones.values() for member in record.members))
+    conn.executemany("INSERT INTO zone_member VALUES (?, ?, ?)",
+                     ((record.name, member, 1) for record in zoneDB.zones.values()
+                      for member in record.principalMembers))
+    conn.executemany("INSERT INTO cfg VALUES (?)", ((name,) for name in zoneDB.cfgs))
+    conn.executemany("INSERT INTO cfg_member VALUES (?, ?)",
+                     ((record.name, zone) for record in zoneDB.cfgs.values() for zone in record.members))
+
+    # Building the indexes after the bulk insert is much cheaper than maintaining them
+    conn.executescript(INDEXES)
+    conn.commit()
+    conn.execute("ANALYZE")
+    conn.close()
+
+
+class SnapshotIndex(ZoneQueries):
+
+    def __init__(self, indexFile):
+        self.conn = sqlite3.connect("file:{}?mode=ro".format(indexFile), uri=True)
+
+    def column(self, query, args):
+        return [row[0] for row in self.conn.execute(query, args)]
+
+    def objectType(self, name):
+        for objectType in ('alias', 'zone', 'cfg'):
+            if self.conn.execute("SELECT 1 FROM {} WHERE name = ?".format(objectType), (name,)).fetchone():
+                return objectType
+        return None
+
+    def matchNames(self, pattern):
+        # fnmatch negates a set with [! where SQLite GLOB uses [^
+        glob = pattern.replace("[!", "[^")
+        return self.column("SELECT name FROM alias WHERE name GLOB ?1 UNION "
+                           "SELECT name FROM zone WHERE name GLOB ?1 UNION "
+                           "SELECT name FROM cfg WHERE name GLOB ?1 ORDER BY name", (glob,))
+
+    def wwnsForAlias(self, alias):
+        return self.column("SELECT wwn FROM alias_member WHERE alias = ? ORDER BY rowid", (alias,))
+
+    def aliasesForWwn(self, wwn):
+        return self.column("SELECT alias FROM alias_member WHERE wwn = ? ORDER BY rowid", (wwn,))
+
+    def zonesForMember(self, member):
+        return self.column("SELECT zone FROM zone_member WHERE member = ? GROUP BY zone ORDER BY MIN(rowid)",
+                           (member,))
+
+    def cfgsForZone(self, zone):
+        return self.column("SELECT cfg FROM cfg_member WHERE zone = ? ORDER BY rowid", (zone,))
+
+    def zoneEntry(self, zone):
+        zoneType = self.conn.execute("SELECT zone_type FROM zone WHERE name = ?", (zone,)).fetchone()[0]
+        members = self.column("SELECT member FROM zone_member WHERE zone = ? AND principal = 0 "
+                              "ORDER BY rowid", (zone,))
+        principalMembers = self.column("SELECT member FROM zone_member WHERE zone = ? AND principal = 1 "
+                                       "ORDER BY rowid", (zone,))
+        return zoneType, members, principalMembers
+
+    def cfgZones(self, cfg):
+        return self.column("SELECT zone FROM cfg_member WHERE cfg = ? ORDER BY rowid", (cfg,))
+
+
+def main(argv):
+    defCfgFile = None
+    indexFile = None
+    profile = False
+
+    # Retrieve and parse command line arguments.
+    try:
+        opts, args = getopt.getopt(argv[1:], "d:o:h",
+            ["definedDB=", "outfile=", "profile"])
+    except getopt.GetoptError:
+        print("usage: {} -d <definedDB> -o <indexFile> [--profile]".format(argv[0]))
+        sys.exit(2)
+    for opt, arg in opts:
+        if opt == '-h':
+            print("usage: {} -d <definedDB> -o <indexFile> [--profile]".format(argv[0]))
+            sys.exit()
+        elif opt in ("-d", "--definedDB"):
+            defCfgFile = arg
+        elif opt in ("-o", "--outfile"):
+            indexFile = arg
+        elif opt in ("--profile"):
+            profile = True
+
+    if (defCfgFile is None or indexFile is None):
+        print("usage: {} -d <definedDB> -o <indexFile> [--profile]".format(argv[0]))
+        sys.exit(2)
+
+    profiler = PhaseProfiler(profile, argv[0])
+
+    profiler.begin("load")
+    defined = getConfigurationFromFile(defCfgFile)
+
+    profiler.begin("index build")
+    zoneDB = ZoneDatabase(defined)
+
+    profiler.begin("write")
+    importSnapshot(zoneDB, indexFile)
+
+
+if __name__ == "__main__":
+    main(sys.argv)
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+# Version 23.2.1.1
+# Copyright 2023 Chip Copper
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this
+# software and associated documentation files (the "Software"), to deal in the Software
+# without restriction, including without limitation the rights to use, copy, modify, merge,
+# publish, distribute, sublicense, and/or sell copies of the Software, and to permit persons
+# to whom the Software is furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all copies or
+# substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING
+# BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM,
+# DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+# WWNs held as 64-bit integers.  A WWN is accepted as eight hex byte pairs separated
+# by ':' or '-', or as 16 bare hex digits, in either case, and is always written back
+# out in the lowercase colon form the switch uses.  Whole lists are kept sorted and
+# de-duplicated in a NumPy uint64 array when NumPy is installed, or an array('Q')
+# otherwise, so validation, membership and intersections run over the whole list at
+# once rather than one string at a time.  Importing NumPy costs more than a short list
+# takes to parse, so it is only loaded the first time a list of NUMPY_MIN_ENTRIES or more
+# comes along.
+
+import re
+import array
+from bisect import bisect_left
+
+numpy = None
+numpyLoaded = False
+NUMPY_MIN_ENTRIES = 1000
+
+WWN_PATTERN = re.compile(r'[0-9a-fA-F]{2}([:-]?)[0-9a-fA-F]{2}(?:\1[0-9a-fA-F]{2}){6}')
+SEPARATOR_POSITIONS = tuple(range(2, 23, 3))
+DIGIT_POSITIONS = tuple(i for i in range(23) if i not in SEPARATOR_POSITIONS)
+
+
+def loadNumpy():
+    global numpy, numpyLoaded
+    if not numpyLoaded:
+        numpyLoaded = True
+        try:
+            import numpy
+        except ImportError:
+            numpy = None
+
+    return numpy
+
+
+def parseWwn(text):
+    match = WWN_PATTERN.fullmatch(text.strip())
+    if match is None:
+        return None
+
+    return int(match.group(0).replace(":", "").replace("-", ""), 16)
+
+
+def formatWwn(value):
+    digits = "{:016x}".format(value)
+    return ":".join(digits[i:i + 2] for i in range(0, 16, 2))
+
+
+def parseWwnsArray(entries):
+    # Validate and convert the whole list as a byte matrix, one row per entry
+    encoded = [i.encode("ascii", "replace") for i in entries]
+    lengths = numpy.fromiter(map(len, encoded), dtype=numpy.int64, count=len(encoded))
+    raw = numpy.array(encoded, dtype="S23")
+    chars = raw.view(numpy.uint8).reshape(len(entries), 23)
+
+    hexValues = numpy.full(256, 255, dtype=numpy.uint8)
+    hexValues[numpy.frombuffer(b"0123456789", dtype=numpy.uint8)] = numpy.arange(10)
+    hexValues[numpy.frombuffer(b"abcdef", dtype=numpy.uint8)] = numpy.arange(10, 16)
+    hexValues[numpy.frombuffer(b"ABCDEF", dtype=numpy.uint8)] = numpy.arange(10, 16)
+
+    # Separated form: the same ':' or '-' between every pair
+    separators = chars[:, SEPARATOR_POSITIONS]
+    separated = ((lengths == 23) & ((separators[:, 0] == ord(":")) | (separators[:, 0] == ord("-")))
+                 & (separators == separators[:, :1]).all(axis=1))
+    digits = numpy.where(separated[:, None], chars[:, DIGIT_POSITIONS], chars[:, :16])
+    nibbles = hexValues[digits]
+    valid = (separated | (lengths == 16)) & (nibbles != 255).all(axis=1)
+
+    shifts = numpy.arange(60, -4, -4, dtype=numpy.uint64)
+    values = (nibbles[valid].astype(numpy.uint64) << shifts).sum(axis=1, dtype=numpy.uint64)
+    invalid = [entries[i] for i in numpy.flatnonzero(~valid)]
+
+    return numpy.unique(values), invalid
+
+
+def parseWwns(entries):
+    entries = [i.strip() for i in entries]
+    entries = [i for i in entries if len(i) > 0]
+
+    if len(entries) >= NUMPY_MIN_ENTRIES and loadNumpy() is not None:
+        return parseWwnsArray(entries)
+
+    values = set()
+    invalid = list()
+    for i in entries:
+        value = parseWwn(i)
+        if value is None:
+            invalid.append(i)
+        else:
+            values.add(value)
+
+    return array.array('Q', sorted(values)), invalid
+
+
+class WwnSet:
+
+    def __init__(self, values):
+        # values must already be sorted and free of duplicates
+        self.values = values
+
+    @classmethod
+    def fromStrings(cls, entries):
+        values, invalid = parseWwns(entries)
+        return cls(values), invalid
+
+    @classmethod
+    def fromFile(cls, filename):
+        with open(filename, "r") as fp:
+            return cls.fromStrings(fp.read().splitlines())
+
+    def __len__(self):
+        return len(self.values)
+
+    def __iter__(self):
+        return (int(i) for i in self.values)
+
+    def __contains__(self, wwn):
+        value = parseWwn(wwn) if isinstance(wwn, str) else wwn
+        if value is None:
+            return False
+        i = bisect_left(self.values, value)
+        return i < len(self.values) and self.values[i] == value
+
+    def strings(self):
+        return [formatWwn(i) for i in self]
+
+    def intersection(self, other):
+        if numpy is not None:
+            return WwnSet(numpy.intersect1d(numpy.asarray(self.values, dtype=numpy.uint64),
+                                            numpy.asarray(other.values, dtype=numpy.uint64), assume_unique=True))
+
+        return WwnSet(array.array('Q', sorted(set(self.values).intersection(other.values))))
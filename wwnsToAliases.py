@@ -17,108 +17,70 @@
 # DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, 
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
 import sys
-import json
 import getopt
 from sortedcontainers import SortedSet, SortedList
-import re
+from zoneDatabase import readDefinedFile, indexDefinedConfiguration
+from wwn import WwnSet
+from phaseProfiler import PhaseProfiler
 
-def getConfigurationFromFile(filename):
+def getAliasesFromWwns(zoneDB, wwnList):
+    aliasList = SortedSet(zoneDB.aliasesForWwns(wwnList))
 
-    with open(filename, "r") as fp:
-        config = json.load(fp)
-
-    if "Response" in config.keys():
-        config = config["Response"]
-
-    return config
-
-def getSetFromFile(filename):
-    fileSet = SortedSet()
-
-    with open(filename, "r") as fp:
-        fileLines = fp.readlines()
-
-    for i in fileLines:
-        entry = i.strip()
-        if len(entry) > 0:
-            fileSet.add(entry)
-
-    return fileSet
-
-def buildAliasToWwn(config):
-
-    aliasTable = {}
-
-    aliases = config['defined-configuration']['alias']
-
-    for i in aliases:
-        aliasTable[i['alias-name']] = i['member-entry']['alias-entry-name']
-
-    return aliasTable
-
-def flipAliastoWWN(aliasTable):
-    wwnTable = {}
-    for i in aliasTable.keys():
-        for j in aliasTable[i]:
-            if j not in wwnTable.keys():
-                wwnTable[j] = list()
-            wwnTable[j].append(i)
-    return wwnTable
-
-def getAliasesFromWwns(wwnLookupTable, wwnList):
-    aliasList = SortedSet()
-    for i in wwnList:
-        if i in wwnLookupTable.keys():
-            for j in wwnLookupTable[i]:
-                aliasList.add(j)
-                
     return aliasList
 
 def main(argv):
     defCfgFile = None
     wwnFile = None
+    profile = False
 
     # Retrieve and parse command line arguments.
     try:
         opts, args = getopt.getopt(argv[1:],"d:w:",
-            ["definedDB=", "wwnFile="])
+            ["definedDB=", "wwnFile=", "profile"])
     except getopt.GetoptError:
-        print("usage: {} -d <definedDB -w <wwnsFile>".format(sys.argv[0]))
+        print("usage: {} -d <definedDB -w <wwnsFile> [--profile]".format(argv[0]))
         sys.exit(2)
     for opt, arg in opts:
         if opt == '-h':
-            print("usage: {} -d <definedDB -w <wwnsFile>".format(sys.argv[0]))
+            print("usage: {} -d <definedDB -w <wwnsFile> [--profile]".format(argv[0]))
             sys.exit()
         elif opt in ("-d", "--definedDB"):
             defCfgFile = arg
         elif opt in ("-w", "--wwnsFile"):
             wwnFile = arg
+        elif opt in ("--profile"):
+            profile = True
 
 
     # Verify all required arguments are present
     if (defCfgFile is None or wwnFile is None):
-        print("usage: {} -d <definedDB -w <wwnsFile>".format(sys.argv[0]))
+        print("usage: {} -d <definedDB -w <wwnsFile> [--profile]".format(argv[0]))
         sys.exit(2)
 
-    defined = getConfigurationFromFile(defCfgFile)
-    wwnList = getSetFromFile(wwnFile)
-    
-    aliasTable = buildAliasToWwn(defined)
-    wwnLookupTable = flipAliastoWWN(aliasTable)
+    profiler = PhaseProfiler(profile, argv[0])
+
+    profiler.begin("load")
+    defined = readDefinedFile(defCfgFile)
+    wwnSet, invalidWwns = WwnSet.fromFile(wwnFile)
+
+    profiler.begin("index build")
+    zoneDB = indexDefinedConfiguration(defined)
 
+    profiler.begin("validation")
     # Check 1: Verify format of all WWNs
     problem = False
-    for i in wwnList:
-        if not re.search("([0-9a-fA-F]{2}:){7}[0-9a-fA-F]{2}", i):
-            if not problem:
-                print("\nERROR: Non-WWN(s) found in WWN List:")
-            problem = True
+    if len(invalidWwns) > 0:
+        problem = True
+        print("\nERROR: Non-WWN(s) found in WWN List:")
+        for i in invalidWwns:
             print("\t{}".format(i))
     if problem:
         exit(2)   
 
+    wwnList = wwnSet.strings()
+
     # Check 2: Verify all WWNs are currently assigned an alias
-    notFoundList = wwnList - set(wwnLookupTable.keys())
+    notFoundList = [i for i in wwnList if len(zoneDB.aliasesForWwn(i)) == 0]
     if len(notFoundList) > 0:
         problem = True
         print("\nERROR: WWNs in list do not have corresponding aliases:")
@@ -128,7 +90,9 @@ def main(argv):
     if problem:
         exit(2)  
 
-    aliasesFound = getAliasesFromWwns(wwnLookupTable, wwnList)
+    aliasesFound = getAliasesFromWwns(zoneDB, wwnList)
+
+    profiler.begin("report")
 
     for i in aliasesFound:
     	print(i)
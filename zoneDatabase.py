@@ -0,0 +1,280 @@
+#!/usr/bin/env python3
+# Version 23.2.1.1
+# Copyright 2023 Chip Copper
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this
+# software and associated documentation files (the "Software"), to deal in the Software
+# without restriction, including without limitation the rights to use, copy, modify, merge,
+# publish, distribute, sublicense, and/or sell copies of the Software, and to permit persons
+# to whom the Software is furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all copies or
+# substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING
+# BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM,
+# DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+# In-memory model of a defined configuration shared by all the tools.  The aliases, zones
+# and cfgs are read into small records with interned names, and the lookups the tools
+# need are kept as forward and reverse indexes, each built on first use:
+#
+#   aliases / zones / cfgs   name -> record
+#   wwnToAliases             WWN -> aliases holding it
+#   memberToZones            alias, WWN or D,I member -> zones listing it
+#   zoneToCfgs               zone -> cfgs listing it
+#   objectTypes              name -> 'alias', 'zone' or 'cfg'
+#
+# ZoneQueries holds the queries built from the primitive lookups, so the snapshot index,
+# binary snapshot and overlay forms only supply the lookups themselves.
+
+import sys
+import json
+import fnmatch
+from functools import cached_property
+
+intern = sys.intern
+
+# Leaf that names each entry of the defined-configuration lists
+NAME_KEYS = {
+    'alias': 'alias-name',
+    'zone': 'zone-name',
+    'cfg': 'cfg-name'
+}
+
+# Where each object type keeps its members in a REST payload
+MEMBER_KEYS = {
+    'alias': ('member-entry', ('alias-entry-name',)),
+    'zone': ('member-entry', ('entry-name', 'principal-entry-name')),
+    'cfg': ('member-zone', ('zone-name',))
+}
+
+
+def getConfigurationFromFile(filename):
+
+    with open(filename, "r") as fp:
+        config = json.load(fp)
+
+    if "Response" in config.keys():
+        config = config["Response"]
+
+    return config
+
+
+def readDefinedFile(filename):
+    # Defined configurations can be the JSON written by getConfigs.py, an index built from
+    # one by snapshotIndex.py or a binary snapshot; the two snapshot forms come back ready
+    # to query and the JSON comes back parsed for indexDefinedConfiguration
+    with open(filename, "rb") as fp:
+        header = fp.read(16)
+
+    if header == b"SQLite format 3\x00":
+        from snapshotIndex import SnapshotIndex
+        return SnapshotIndex(filename)
+
+    if header.startswith(b"BZDBSNAP"):
+        from binarySnapshot import BinarySnapshot
+        return BinarySnapshot(filename)
+
+    return getConfigurationFromFile(filename)
+
+
+def indexDefinedConfiguration(source):
+    return ZoneDatabase(source) if isinstance(source, dict) else source
+
+
+def getZonesAndWWPNsFromEffectiveConfig(config):
+    enabledZone = config['effective-configuration']['enabled-zone']
+
+    zoneNames = set()
+    wwns = set()
+
+    for i in enabledZone:
+        zoneName = i['zone-name']
+        zoneNames.add(zoneName)
+        if 'entry-name' in i['member-entry'].keys():
+            for j in i['member-entry']['entry-name']:
+                wwns.add(j)
+        if 'principal-entry-name' in i['member-entry'].keys():
+            for j in i['member-entry']['principal-entry-name']:
+                wwns.add(j)
+
+    return zoneNames, wwns
+
+
+class AliasRecord:
+    __slots__ = ('name', 'members')
+
+    def __init__(self, name, members):
+        self.name = name
+        self.members = members
+
+
+class ZoneRecord:
+    __slots__ = ('name', 'zoneType', 'members', 'principalMembers')
+
+    def __init__(self, name, zoneType, members, principalMembers):
+        self.name = name
+        self.zoneType = zoneType
+        self.members = members
+        self.principalMembers = principalMembers
+
+
+class CfgRecord:
+    __slots__ = ('name', 'members')
+
+    def __init__(self, name, members):
+        self.name = name
+        self.members = members
+
+
+class ZoneQueries:
+    # Needs objectType, wwnsForAlias, aliasesForWwn, zonesForMember, zoneEntry and cfgZones
+
+    def aliasesForWwns(self, wwns):
+        aliases = set()
+        for i in wwns:
+            aliases.update(self.aliasesForWwn(i))
+        return aliases
+
+    def zonesForWwn(self, wwn):
+        # Zones naming the WWN directly or through any alias holding it
+        zones = set(self.zonesForMember(wwn))
+        for alias in self.aliasesForWwn(wwn):
+            zones.update(self.zonesForMember(alias))
+        return zones
+
+    def payload(self, name):
+        # Body used to create the object again through the REST API
+        objectType = self.objectType(name)
+        if objectType == 'alias':
+            return {'member-entry': {'alias-entry-name': list(self.wwnsForAlias(name))}}
+        if objectType == 'zone':
+            zoneType, members, principalMembers = self.zoneEntry(name)
+            memberEntry = {}
+            if len(members) > 0:
+                memberEntry['entry-name'] = list(members)
+            if len(principalMembers) > 0:
+                memberEntry['principal-entry-name'] = list(principalMembers)
+            return {'member-entry': memberEntry, 'zone-type': zoneType}
+        if objectType == 'cfg':
+            return {'member-zone': {'zone-name': list(self.cfgZones(name))}}
+        return None
+
+
+class ZoneDatabase(ZoneQueries):
+
+    def __init__(self, config):
+        # Only the parsed lists are kept here; each table below is built the first time a
+        # lookup needs it, so a tool pays only for the indexes it uses
+        self.defined = config['defined-configuration']
+
+    @cached_property
+    def aliases(self):
+        aliases = {}
+        for i in self.defined.get('alias', []):
+            name = intern(i['alias-name'])
+            aliases[name] = AliasRecord(name, i['member-entry'].get('alias-entry-name', []))
+        return aliases
+
+    @cached_property
+    def zones(self):
+        zones = {}
+        for i in self.defined.get('zone', []):
+            name = intern(i['zone-name'])
+            memberEntry = i['member-entry']
+            zones[name] = ZoneRecord(name, i.get('zone-type', 0), memberEntry.get('entry-name', []),
+                                     memberEntry.get('principal-entry-name', []))
+        return zones
+
+    @cached_property
+    def cfgs(self):
+        cfgs = {}
+        for i in self.defined.get('cfg', []):
+            name = intern(i['cfg-name'])
+            cfgs[name] = CfgRecord(name, i['member-zone'].get('zone-name', []))
+        return cfgs
+
+    @cached_property
+    def objectTypes(self):
+        # Later types win a name clash, as aliases, zones and cfgs are read in that order
+        objectTypes = {}
+        for objectType, key in NAME_KEYS.items():
+            for i in self.defined.get(objectType, []):
+                objectTypes[i[key]] = objectType
+        return objectTypes
+
+    # The reverse indexes are read straight from the parsed lists so that building one
+    # does not also build the records
+    @cached_property
+    def wwnToAliases(self):
+        wwnToAliases = {}
+        for i in self.defined.get('alias', []):
+            name = i['alias-name']
+            for j in i['member-entry'].get('alias-entry-name', []):
+                aliases = wwnToAliases.get(j)
+                if aliases is None:
+                    wwnToAliases[j] = [name]
+                else:
+                    aliases.append(name)
+        return wwnToAliases
+
+    @cached_property
+    def memberToZones(self):
+        memberToZones = {}
+        for i in self.defined.get('zone', []):
+            name = i['zone-name']
+            memberEntry = i['member-entry']
+            for key in ('entry-name', 'principal-entry-name'):
+                for j in memberEntry.get(key, []):
+                    zones = memberToZones.get(j)
+                    if zones is None:
+                        memberToZones[j] = [name]
+                    elif zones[-1] is not name:
+                        zones.append(name)
+        return memberToZones
+
+    @cached_property
+    def zoneToCfgs(self):
+        zoneToCfgs = {}
+        for i in self.defined.get('cfg', []):
+            name = i['cfg-name']
+            for j in i['member-zone'].get('zone-name', []):
+                cfgs = zoneToCfgs.get(j)
+                if cfgs is None:
+                    zoneToCfgs[j] = [name]
+                else:
+                    cfgs.append(name)
+        return zoneToCfgs
+
+    @classmethod
+    def fromFile(cls, filename):
+        return cls(getConfigurationFromFile(filename))
+
+    def objectType(self, name):
+        return self.objectTypes.get(name)
+
+    def matchNames(self, pattern):
+        return sorted(fnmatch.filter(self.objectTypes.keys(), pattern))
+
+    def wwnsForAlias(self, alias):
+        record = self.aliases.get(alias)
+        return record.members if record is not None else []
+
+    def aliasesForWwn(self, wwn):
+        return self.wwnToAliases.get(wwn, [])
+
+    def zonesForMember(self, member):
+        return self.memberToZones.get(member, [])
+
+    def cfgsForZone(self, zone):
+        return self.zoneToCfgs.get(zone, [])
+
+    def zoneEntry(self, zone):
+        record = self.zones[zone]
+        return record.zoneType, record.members, record.principalMembers
+
+    def cfgZones(self, cfg):
+        return self.cfgs[cfg].members